@@ -0,0 +1,105 @@
+"""
+캐시 코덱 벤치마크. /posts 한 페이지(포스트 20개 x 링크 5개) 캐시 히트 1회 비용
+
+PYTHONPATH=./ python benchmark/cache_codec_bench.py
+"""
+
+import json
+import timeit
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from src.cache_codec import (
+    CODECS,
+    COMPRESSION_NONE,
+    COMPRESSION_ZLIB,
+    COMPRESSION_ZSTD,
+    pack,
+    unpack,
+    zstandard,
+)
+from src.schemas.common import Link
+from src.schemas.post import (
+    CommentPartial,
+    LikePartial,
+    PostsResponse,
+    PostsResponseBody,
+)
+
+HIT_COUNT = 2000
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB}
+if zstandard is not None:
+    COMPRESSIONS["zstd"] = COMPRESSION_ZSTD
+
+
+def build_response() -> PostsResponse:
+    now = datetime(2024, 1, 1, 12, 0, 0, 123456)
+    return PostsResponse(
+        posts=[
+            PostsResponseBody(
+                id=2**40 + i,
+                author=f"user_{i}",
+                title=f"post title {i}",
+                created_at=now,
+                updated_at=now,
+                view_count=i * 10,
+                comment=CommentPartial(count=i),
+                like=LikePartial(count=i * 2),
+                links=[
+                    Link(href=f"/posts/{i}", rel="self", method="GET"),
+                    Link(href=f"/posts/{i}", rel="update_partial", method="PATCH"),
+                    Link(href=f"/posts/{i}", rel="update_whole", method="PUT"),
+                    Link(href=f"/posts/{i}", rel="delete", method="DELETE"),
+                    Link(href=f"/likes/?post_id={i}", rel="liked_users", method="GET"),
+                ],
+            )
+            for i in range(20)
+        ],
+        links=[
+            Link(href="/posts", rel="self", method="GET"),
+            Link(href="/posts", rel="create", method="POST"),
+        ],
+    )
+
+
+def fastapi_render(response: PostsResponse) -> bytes:
+    # 모델을 반환했을 때 FastAPI가 하는 일 (response_model 검증 생략)
+    return json.dumps(
+        jsonable_encoder(response), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def per_hit_us(fn) -> float:
+    return timeit.timeit(fn, number=HIT_COUNT) / HIT_COUNT * 1e6
+
+
+def main() -> None:
+    response = build_response()
+
+    # 변경 전: json.dumps(model_dump()) -> json.loads -> PostsResponse(**...) -> FastAPI 직렬화
+    legacy = json.dumps(response.model_dump(mode="json"))
+    legacy_hit = per_hit_us(lambda: fastapi_render(PostsResponse(**json.loads(legacy))))
+    print(f"{'legacy json.dumps':24}: {len(legacy):6} B  hit {legacy_hit:8.1f} us")
+
+    for codec in CODECS.values():
+        for compression_name, compression in COMPRESSIONS.items():
+            value = pack(codec, codec.dumps(response), 0.0, compression)
+
+            def model_hit():
+                _, payload_codec, payload = unpack(value)
+                fastapi_render(payload_codec.loads(payload, PostsResponse))
+
+            def raw_hit():
+                _, payload_codec, payload = unpack(value)
+                payload_codec.to_json(payload)
+
+            print(
+                f"{codec.name + ' + ' + compression_name:24}: {len(value):6} B  "
+                f"hit {per_hit_us(model_hit):8.1f} us (model)  "
+                f"{per_hit_us(raw_hit):8.1f} us (raw bytes)"
+            )
+
+
+if __name__ == "__main__":
+    main()
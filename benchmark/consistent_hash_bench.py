@@ -0,0 +1,86 @@
+"""
+캐시 링(ConsistentHash) 벤치마크
+
+PYTHONPATH=./ python benchmark/consistent_hash_bench.py
+"""
+
+import bisect
+import hashlib
+import random
+import timeit
+
+from src.consistent_hash import ConsistentHash
+
+NODE_COUNT = 1000
+VIRTUAL_NODES = 1000
+LOOKUP_COUNT = 100_000
+# 이전 구현은 insort 때문에 1k x 1k 링을 만드는 데 수 분이 걸려 작은 링으로 비교한다
+LEGACY_NODE_COUNT = 100
+
+
+class LegacyConsistentHash:
+    # 변경 전 구현 (md5 hexdigest -> int, 가상 노드마다 insort, nodes.index 탐색)
+    def __init__(self, nodes: list[str], virtual_nodes: int = 100):
+        self.nodes = nodes
+        self.virtual_nodes = virtual_nodes
+        self.ring: dict[int, str] = {}
+        self.sorted_keys: list[int] = []
+        for node in self.nodes:
+            for i in range(self.virtual_nodes):
+                key = self._hash(f"{node}:{i}")
+                self.ring[key] = node
+                bisect.insort(self.sorted_keys, key)
+
+    def _hash(self, key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+    def get_node(self, key: str) -> tuple:
+        hash_key = self._hash(key)
+        index = bisect.bisect(self.sorted_keys, hash_key) % len(self.sorted_keys)
+        return self.ring[self.sorted_keys[index]], self.nodes.index(
+            self.ring[self.sorted_keys[index]]
+        )
+
+
+def main() -> None:
+    nodes = [f"10.0.{i // 256}.{i % 256}:6379" for i in range(NODE_COUNT)]
+    keys = [f"post:post_id:{random.randrange(2**62)}" for _ in range(LOOKUP_COUNT)]
+    legacy_nodes = nodes[:LEGACY_NODE_COUNT]
+
+    build_time = timeit.timeit(lambda: ConsistentHash(nodes, VIRTUAL_NODES), number=1)
+    small_build_time = timeit.timeit(
+        lambda: ConsistentHash(legacy_nodes, VIRTUAL_NODES), number=1
+    )
+    legacy_build_time = timeit.timeit(
+        lambda: LegacyConsistentHash(legacy_nodes, VIRTUAL_NODES), number=1
+    )
+
+    ring = ConsistentHash(nodes, VIRTUAL_NODES)
+    lookup_time = timeit.timeit(lambda: [ring.get_node(key) for key in keys], number=1)
+    legacy_ring = LegacyConsistentHash(legacy_nodes, VIRTUAL_NODES)
+    small_ring = ConsistentHash(legacy_nodes, VIRTUAL_NODES)
+    small_lookup_time = timeit.timeit(
+        lambda: [small_ring.get_node(key) for key in keys], number=1
+    )
+    legacy_lookup_time = timeit.timeit(
+        lambda: [legacy_ring.get_node(key) for key in keys], number=1
+    )
+
+    print(f"build  {NODE_COUNT} x {VIRTUAL_NODES}       : {build_time * 1e3:8.1f} ms")
+    print(
+        f"build  {LEGACY_NODE_COUNT} x {VIRTUAL_NODES}        : "
+        f"{small_build_time * 1e3:8.1f} ms (legacy {legacy_build_time * 1e3:.1f} ms)"
+    )
+    print(
+        f"lookup {NODE_COUNT} x {VIRTUAL_NODES}       : "
+        f"{lookup_time / LOOKUP_COUNT * 1e9:8.1f} ns/call"
+    )
+    print(
+        f"lookup {LEGACY_NODE_COUNT} x {VIRTUAL_NODES}        : "
+        f"{small_lookup_time / LOOKUP_COUNT * 1e9:8.1f} ns/call "
+        f"(legacy {legacy_lookup_time / LOOKUP_COUNT * 1e9:.1f} ns/call)"
+    )
+
+
+if __name__ == "__main__":
+    main()
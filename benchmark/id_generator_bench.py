@@ -0,0 +1,55 @@
+"""
+id 생성기 벤치마크
+
+PYTHONPATH=./ python benchmark/id_generator_bench.py
+"""
+
+import hashlib
+import time
+from datetime import datetime
+
+from ulid import ULID
+
+from src.id_generator import SnowflakeIdGenerator
+
+ID_COUNT = 200_000
+WORKER_COUNT = 8
+
+
+def ulid_md5_id() -> int:
+    new_id = str(ULID.from_datetime(datetime.now()))
+    return int(hashlib.md5(new_id.encode()).hexdigest(), 16) % (2**30)
+
+
+def measure(name: str, make_id, count: int) -> list[int]:
+    start = time.perf_counter()
+    ids = [make_id() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    collisions = count - len(set(ids))
+    print(
+        f"{name:<18}: {count / elapsed:>12,.0f} ids/s, "
+        f"{elapsed / count * 1e9:8.1f} ns/id, collisions={collisions}"
+    )
+    return ids
+
+
+def main() -> None:
+    measure("ulid -> md5 % 2^30", ulid_md5_id, ID_COUNT)
+    snowflake_ids = measure("snowflake", SnowflakeIdGenerator().next_id, ID_COUNT)
+    ordered = sum(1 for a, b in zip(snowflake_ids, snowflake_ids[1:]) if a < b)
+    print(f"snowflake ordered pairs: {ordered / (ID_COUNT - 1):.1%}")
+
+    # 여러 워커가 같은 시각에 id를 만들어도 겹치지 않는지 확인
+    generators = [SnowflakeIdGenerator(worker_id=i) for i in range(WORKER_COUNT)]
+    per_worker = ID_COUNT // WORKER_COUNT
+    start = time.perf_counter()
+    ids = [generator.next_id() for _ in range(per_worker) for generator in generators]
+    elapsed = time.perf_counter() - start
+    print(
+        f"snowflake x{WORKER_COUNT} workers: {len(ids) / elapsed:>10,.0f} ids/s, "
+        f"collisions={len(ids) - len(set(ids))}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+처리율 제한 미들웨어만 붙인 앱. locust로 ASGI 미들웨어와 BaseHTTPMiddleware 구현을 비교한다.
+REDIS_URL의 Redis가 필요하다.
+
+RATE_LIMIT_MIDDLEWARE=asgi BUCKET_SIZE=1000000000 REQUESTS_PER_MINUTE=1000000000 \
+    PYTHONPATH=./ uvicorn benchmark.rate_limit_app:app --port 8000
+RATE_LIMIT_MIDDLEWARE=base_http ...
+locust -f locust-test/rate_limit_test.py
+"""
+
+import os
+
+from fastapi import FastAPI, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from src.config import config
+from src.middlewares.rate_limit import (
+    BucketRateLimitMiddleware,
+    rate_limit_headers,
+    take_token,
+)
+
+
+class BaseHTTPBucketRateLimitMiddleware(BaseHTTPMiddleware):
+    # 변경 전 구현 (같은 토큰 버킷 스크립트를 BaseHTTPMiddleware에서 호출)
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        try:
+            granted, tokens, retry_after = await take_token(
+                f"bucket:{request.client.host}",  # type: ignore
+                config.BUCKET_SIZE,
+                config.REQUESTS_PER_MINUTE / 60,
+            )
+        except:
+            return await call_next(request)
+
+        headers = rate_limit_headers(tokens, retry_after, config.BUCKET_SIZE)
+        if not granted:
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "detail": "처리율 제한을 초과하였습니다. 나중에 다시 시도해주세요"
+                },
+                headers=headers,
+            )
+        response: Response = await call_next(request)
+        for key, value in headers.items():
+            response.headers.append(key=key, value=value)
+        return response
+
+
+MIDDLEWARES = {
+    "asgi": BucketRateLimitMiddleware,
+    "base_http": BaseHTTPBucketRateLimitMiddleware,
+}
+
+app = FastAPI()
+app.add_middleware(MIDDLEWARES[os.environ.get("RATE_LIMIT_MIDDLEWARE", "asgi")])
+
+
+# "/"는 처리율 제한 허용 목록(헬스 체크)
+@app.get("/items")
+async def index() -> dict:
+    return {}
+
+
+@app.get("/stream")
+async def stream() -> StreamingResponse:
+    # BaseHTTPMiddleware는 청크마다 메모리 스트림을 한 번 더 거친다
+    async def chunks():
+        for _ in range(100):
+            yield b"x" * 1024
+
+    return StreamingResponse(chunks())
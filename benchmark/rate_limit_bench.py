@@ -0,0 +1,131 @@
+"""
+처리율 제한 미들웨어 벤치마크. 요청당 미들웨어 비용과 동시 요청 시 초과 허용 수
+REDIS_URL의 Redis가 필요하다.
+
+PYTHONPATH=./ python benchmark/rate_limit_bench.py
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from benchmark.rate_limit_app import BaseHTTPBucketRateLimitMiddleware
+from src.config import config
+from src.database import redis
+from src.middlewares.rate_limit import BucketRateLimitMiddleware
+
+REQUEST_COUNT = 2000
+CONCURRENT_REQUESTS = 50
+BUCKET_SIZE = 10.0
+LEASE_SIZE = 5
+
+
+class Bucket(BaseModel):
+    tokens: float
+    last_refill: float
+
+
+class LegacyBucketRateLimitMiddleware(BaseHTTPMiddleware):
+    # 변경 전 구현 (hgetall + hset 2회, 요청마다 Bucket 모델 검증)
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        current_time = time.time()
+        bucket_key = f"bucket:{request.client.host}"  # type: ignore
+        bucket_data = await redis.hgetall(bucket_key)
+        if not bucket_data:
+            bucket = Bucket(tokens=config.BUCKET_SIZE, last_refill=current_time)
+        else:
+            bucket = Bucket.model_validate(bucket_data)
+        refill_amount = int(
+            (current_time - bucket.last_refill) * (config.REQUESTS_PER_MINUTE / 60)
+        )
+        bucket.tokens = min(bucket.tokens + refill_amount, config.BUCKET_SIZE)
+        bucket.last_refill = current_time
+        if bucket.tokens < 1:
+            return JSONResponse(status_code=429, content={})
+        await redis.hset(bucket_key, "tokens", bucket.tokens - 1)
+        await redis.hset(bucket_key, "last_refill", current_time)
+        return await call_next(request)
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+    if middleware:
+        app.add_middleware(middleware)
+
+    # "/"는 처리율 제한 허용 목록(헬스 체크)이라 다른 경로로 측정한다
+    @app.get("/items")
+    async def index() -> dict:
+        return {}
+
+    return app
+
+
+def client_for(app: FastAPI, client_ip: str) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(client_ip, 50000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+async def per_request_us(app: FastAPI, client_ip: str) -> float:
+    async with client_for(app, client_ip) as client:
+        await client.get("/items")
+        started = time.perf_counter()
+        for _ in range(REQUEST_COUNT):
+            await client.get("/items")
+        return (time.perf_counter() - started) / REQUEST_COUNT * 1e6
+
+
+async def allowed_of_concurrent(app: FastAPI, client_ip: str) -> int:
+    # 버킷이 가득 찬 상태에서 동시에 요청. BUCKET_SIZE개보다 많이 허용되면 토큰을 중복 사용한 것
+    await redis.delete(f"bucket:{client_ip}")
+    async with client_for(app, client_ip) as client:
+        responses = await asyncio.gather(
+            *(client.get("/items") for _ in range(CONCURRENT_REQUESTS))
+        )
+    return sum(1 for response in responses if response.status_code == 200)
+
+
+async def main() -> None:
+    base_http_app = build_app(BaseHTTPBucketRateLimitMiddleware)
+    asgi_app = build_app(BucketRateLimitMiddleware)
+    # (이름, 앱, 워커가 한 번에 빌려오는 토큰 수)
+    scenarios = [
+        ("no middleware", build_app(), 1),
+        ("legacy", build_app(LegacyBucketRateLimitMiddleware), 1),
+        ("lua + BaseHTTP", base_http_app, 1),
+        ("lua + ASGI", asgi_app, 1),
+        (f"lua + ASGI lease {LEASE_SIZE}", asgi_app, LEASE_SIZE),
+    ]
+
+    # 비용 측정 중에는 제한에 걸리지 않도록 충분히 크게
+    config.BUCKET_SIZE, config.REQUESTS_PER_MINUTE = 1e9, 10**9
+    baseline = None
+    for index, (name, app, lease_size) in enumerate(scenarios):
+        config.RATE_LIMIT_LEASE_SIZE = lease_size
+        await redis.delete(f"bucket:10.0.0.{index}")
+        elapsed = await per_request_us(app, f"10.0.0.{index}")
+        baseline = elapsed if baseline is None else baseline
+        print(
+            f"{name:22}: {elapsed:8.1f} us/request "
+            f"(middleware {elapsed - baseline:8.1f} us)"
+        )
+
+    config.BUCKET_SIZE, config.REQUESTS_PER_MINUTE = BUCKET_SIZE, 60
+    config.RATE_LIMIT_LEASE_SIZE = 1
+    apps = {name: app for name, app, _ in scenarios}
+    for index, name in enumerate(("legacy", "lua + ASGI")):
+        allowed = await allowed_of_concurrent(apps[name], f"10.0.1.{index}")
+        print(
+            f"{name:22}: {allowed} / {CONCURRENT_REQUESTS} concurrent requests "
+            f"allowed (bucket {int(BUCKET_SIZE)})"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
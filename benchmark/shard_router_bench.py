@@ -0,0 +1,58 @@
+"""
+샤드 라우팅 벤치마크
+
+python benchmark/shard_router_bench.py
+"""
+
+import random
+import timeit
+
+from src.shard_router import ShardRouter
+
+KEY_COUNT = 100_000
+SHARDS = ["shard_1", "shard_2"]
+
+
+def modulo_shard(pk: int, shard_count: int) -> str:
+    return f"shard_{pk % shard_count + 1}"
+
+
+def moved_ratio_modulo(keys: list[int], before: int, after: int) -> float:
+    moved = sum(
+        1 for key in keys if modulo_shard(key, before) != modulo_shard(key, after)
+    )
+    return moved / len(keys)
+
+
+def moved_ratio_router(
+    keys: list[int], before: ShardRouter, after: ShardRouter
+) -> float:
+    moved = sum(1 for key in keys if before.get_shard(key) != after.get_shard(key))
+    return moved / len(keys)
+
+
+def main() -> None:
+    keys = [random.randrange(2**30) for _ in range(KEY_COUNT)]
+    router = ShardRouter(SHARDS)
+    grown_router = ShardRouter(SHARDS + ["shard_3"])
+
+    modulo_time = timeit.timeit(
+        lambda: [modulo_shard(key, len(SHARDS)) for key in keys], number=10
+    )
+    router_time = timeit.timeit(
+        lambda: [router.get_shard(key) for key in keys], number=10
+    )
+    build_time = timeit.timeit(lambda: ShardRouter(SHARDS + ["shard_3"]), number=5)
+
+    print(f"modulo get_shard : {modulo_time / (KEY_COUNT * 10) * 1e9:8.1f} ns/call")
+    print(f"router get_shard : {router_time / (KEY_COUNT * 10) * 1e9:8.1f} ns/call")
+    print(f"router build     : {build_time / 5 * 1e3:8.1f} ms")
+    print(
+        "moved keys 2->3  : "
+        f"modulo {moved_ratio_modulo(keys, 2, 3):.1%}, "
+        f"router {moved_ratio_router(keys, router, grown_router):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
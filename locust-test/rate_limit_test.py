@@ -0,0 +1,17 @@
+from locust import HttpUser, constant, task
+
+HOST = "http://127.0.0.1:8000"
+
+
+# benchmark/rate_limit_app.py를 RATE_LIMIT_MIDDLEWARE=asgi / base_http로 띄워 각각 실행
+class RateLimitUser(HttpUser):
+    host = HOST
+    wait_time = constant(0)
+
+    @task(4)
+    def index(self) -> None:
+        self.client.get("/items", name="rate-limit")
+
+    @task(1)
+    def stream(self) -> None:
+        self.client.get("/stream", name="rate-limit-stream")
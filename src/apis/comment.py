@@ -1,11 +1,15 @@
-import json
-
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from redis.asyncio import Redis
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from src.auth import get_current_user
-from src.database import get_redis
+from src.cache import (
+    COMMENTS_NAMESPACE,
+    get_or_build_response,
+    invalidate_namespace,
+    namespaced_key,
+)
+from src.config import config
 from src.domains.user import Role
+from src.pagination import decode_cursor, next_cursor
 from src.schemas.auth import SessionContent
 from src.schemas.comment import (
     CommentResponse,
@@ -29,7 +33,6 @@ async def create_comment(
     request: CreateCommentRequest,
     comment_service: CommentService = Depends(CommentService),
     post_service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> CreateCommentResponse:
     user_id = current_user.id
@@ -53,10 +56,7 @@ async def create_comment(
         updated_at=new_comment.updated_at,
     )
 
-    try:
-        await redis.delete("comments:*")
-    except:
-        pass
+    await invalidate_namespace(COMMENTS_NAMESPACE)
 
     return response
 
@@ -70,39 +70,48 @@ async def get_comments(
     post_id: int | None = None,
     user_id: int | None = None,
     page: int = Query(1),
-    redis: Redis = Depends(get_redis),
+    cursor: str | None = Query(None),
     service: CommentService = Depends(CommentService),
-) -> CommentsResponse:
-    cache_key = f"comments:post_id:{post_id}:user_id:{user_id}:page:{page}"
-    try:
-        cached_data = await redis.get(cache_key)
-        if cached_data:
-            return CommentsResponse(**json.loads(cached_data))
-    except:
-        pass
-
-    comments = await service.get_comments(post_id=post_id, user_id=user_id, page=page)
-    response = CommentsResponse(
-        comments=[
-            CommentResponse(
-                id=comment.id,  # type: ignore
-                post_id=comment.post_id,
-                author_id=comment.author_id,
-                content=comment.content,
-                created_at=comment.created_at,
-                updated_at=comment.updated_at,
-            )
-            for comment in comments
-        ]
-    )
+) -> CommentsResponse | Response:
+    after = decode_cursor(cursor) if cursor else None
+    position = f"cursor:{cursor}" if cursor else f"page:{page}"
+
+    async def _build_comments() -> CommentsResponse:
+        comments = await service.get_comments(
+            post_id=post_id, user_id=user_id, page=page, after=after
+        )
+        response = CommentsResponse(
+            comments=[
+                CommentResponse(
+                    id=comment.id,  # type: ignore
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    content=comment.content,
+                    created_at=comment.created_at,
+                    updated_at=comment.updated_at,
+                )
+                for comment in comments
+            ],
+            next_cursor=next_cursor(comments, service.items_per_page),
+        )
+        return response
+
     try:
-        await redis.setex(
-            name=cache_key, time=3600, value=json.dumps(response.model_dump())
+        cache_key = await namespaced_key(
+            COMMENTS_NAMESPACE,
+            f"post_id:{post_id}:user_id:{user_id}:{position}",
         )
     except:
-        pass
-
-    return response
+        # 세대 번호를 읽지 못하면 캐시 없이 응답
+        return await _build_comments()
+
+    return await get_or_build_response(
+        cache_key,
+        CommentsResponse,
+        _build_comments,
+        soft_ttl=config.COMMENTS_CACHE_SOFT_TTL,
+        hard_ttl=config.COMMENTS_CACHE_HARD_TTL,
+    )
 
 
 @router.patch("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -110,7 +119,6 @@ async def edit_comment(
     comment_id: int,
     request: EditComment,
     service: CommentService = Depends(CommentService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> None:
     user_id = current_user.id
@@ -129,17 +137,13 @@ async def edit_comment(
 
     await service.edit_comment(comment=comment, content=request.content)
 
-    try:
-        await redis.delete("comments:*")
-    except:
-        pass
+    await invalidate_namespace(COMMENTS_NAMESPACE)
 
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_comment(
     comment_id: int,
     service: CommentService = Depends(CommentService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> None:
     user_id = current_user.id
@@ -160,7 +164,4 @@ async def delete_comment(
 
     await service.delete_comment(comment)
 
-    try:
-        await redis.delete("comments:*")
-    except:
-        pass
+    await invalidate_namespace(COMMENTS_NAMESPACE)
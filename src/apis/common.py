@@ -1,8 +1,19 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, HTTPException, status
 
+from src.auth import get_admin_user
+from src.cache import get_cache_stats
+from src.cache_migration import plan_ring_change
 from src.config import config
-from src.database import consistent_hash
-from src.schemas.common import EditRateLimitRequest
+from src.database import cache_client, consistent_hash, get_pool_stats, redis
+from src.rate_limit_policy import (
+    delete_policy,
+    load_policies,
+    policy_table,
+    save_policy,
+)
+from src.schemas.auth import SessionContent
+from src.schemas.common import CacheStats, DbPoolStats, EditRateLimitRequest
+from src.schemas.rate_limit import RateLimitPolicy
 
 router = APIRouter(tags=["common"])
 
@@ -19,18 +30,100 @@ async def health() -> None:
 
 
 @router.patch("/update_rate_limit", status_code=status.HTTP_200_OK)
-async def update_rate_limit(request: EditRateLimitRequest):
+async def update_rate_limit(
+    request: EditRateLimitRequest,
+    admin: SessionContent = Depends(get_admin_user),
+):
     if request.requests_per_minute:
         config.REQUESTS_PER_MINUTE = request.requests_per_minute
     if request.bucket_size:
         config.BUCKET_SIZE = float(request.bucket_size)
+    # 기본 정책을 Redis에 저장해 모든 워커에 반영한다
+    await save_policy(
+        redis,
+        policy_table.default.model_copy(
+            update={
+                "limit": config.REQUESTS_PER_MINUTE,
+                "period": 60.0,
+                "burst": config.BUCKET_SIZE,
+            }
+        ),
+    )
 
     return {
         "message": f"REQUESTS_PER_MINUTE={config.REQUESTS_PER_MINUTE}, BUCKET_SIZE={config.BUCKET_SIZE}"
     }
 
 
+@router.get(
+    "/rate_limit/policies",
+    status_code=status.HTTP_200_OK,
+    response_model=list[RateLimitPolicy],
+)
+async def get_rate_limit_policies(
+    admin: SessionContent = Depends(get_admin_user),
+) -> list[RateLimitPolicy]:
+    """
+    Redis에 저장된 처리율 제한 정책
+    """
+    return await load_policies(redis)
+
+
+@router.put("/rate_limit/policies", status_code=status.HTTP_200_OK)
+async def put_rate_limit_policy(
+    policy: RateLimitPolicy, admin: SessionContent = Depends(get_admin_user)
+) -> RateLimitPolicy:
+    """
+    같은 이름의 정책이 있으면 덮어쓴다. 모든 워커가 재시작 없이 반영한다
+    """
+    await save_policy(redis, policy)
+    return policy
+
+
+@router.delete("/rate_limit/policies/{name}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rate_limit_policy(
+    name: str, admin: SessionContent = Depends(get_admin_user)
+) -> None:
+    if not await delete_policy(redis, name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="존재하지 않는 처리율 제한 정책입니다",
+        )
+
+
 @router.post("/set_virtual_nodes")
 async def set_virtual_nodes(virtual_nodes: int):
-    consistent_hash.set_virtual_nodes(virtual_nodes)
-    return {"message": f"Virtual nodes set to {virtual_nodes}"}
+    # 링은 스레드에서 새로 만들고 완성되면 한 번에 교체한다
+    previous = consistent_hash.copy()
+    await consistent_hash.rebuild(virtual_nodes)
+    # 주인이 바뀐 키는 유예 시간 동안 이전 노드에서도 읽어 DB로 미스가 몰리지 않게 한다
+    cache_client.start_grace(previous, config.CACHE_RING_GRACE_SECONDS)
+    plan = plan_ring_change(previous, consistent_hash)
+    return {
+        "message": f"Virtual nodes set to {virtual_nodes}",
+        "moved_fraction": round(plan.moved_fraction, 4),
+    }
+
+
+@router.get(
+    "/metrics/db_pools",
+    status_code=status.HTTP_200_OK,
+    response_model=list[DbPoolStats],
+)
+async def db_pool_metrics() -> list[DbPoolStats]:
+    """
+    샤드별 커넥션 풀 사용량
+    """
+    return [DbPoolStats.model_validate(stats) for stats in get_pool_stats()]
+
+
+@router.get(
+    "/metrics/cache",
+    status_code=status.HTTP_200_OK,
+    response_model=list[CacheStats],
+)
+async def cache_metrics() -> list[CacheStats]:
+    """
+    캐시 계층별 히트/미스
+    """
+    return [CacheStats.model_validate(stats) for stats in get_cache_stats()]
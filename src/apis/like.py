@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.auth import get_current_user
+from src.pagination import decode_cursor, next_cursor
 from src.schemas.auth import SessionContent
 from src.schemas.like import (
     CreateLikeRequest,
@@ -67,9 +68,11 @@ async def create_like(
 )
 async def get_liked_users(
     post_id: int | None = None,
+    cursor: str | None = Query(None),
     like_service: LikeServiceBase = Depends(LikeService),
     post_service: PostService = Depends(PostService),
 ) -> GetLikeUsersResponse:
+    after = decode_cursor(cursor) if cursor else None
     if post_id:
         post = await post_service.get_post(post_id)
         if not post:
@@ -78,18 +81,21 @@ async def get_liked_users(
                 detail="존재하지 않는 포스트입니다",
             )
 
-    users = await like_service.get_liked_users(post_id=post_id)
+    likes = await like_service.get_likes(post_id=post_id, after=after)
     response = GetLikeUsersResponse(
         users=[
             LikeUserResponse(
-                id=user.id,  # type: ignore
-                nickname=user.nickname,
-                role=user.role,
-                created_at=user.created_at,
-                updated_at=user.updated_at,
+                id=like.user.id,  # type: ignore
+                nickname=like.user.nickname,
+                role=like.user.role,
+                created_at=like.user.created_at,
+                updated_at=like.user.updated_at,
             )
-            for user in users
-        ]
+            for like in likes
+            # 유저를 찾지 못한 좋아요는 목록에서 빼고, 커서는 전체 좋아요 기준으로 만든다
+            if like.user is not None
+        ],
+        next_cursor=next_cursor(likes, like_service.items_per_page),
     )
 
     return response
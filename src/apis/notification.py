@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 
 from src.auth import get_current_user
+from src.pagination import decode_cursor, next_cursor
 from src.schemas.auth import SessionContent
 from src.schemas.notification import GetNotificationsResponse, NotificationResponseBody
 from src.servicies.notification import NotificationService, NotificationServiceBase
@@ -12,12 +13,16 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
     "/", response_model=GetNotificationsResponse, status_code=status.HTTP_200_OK
 )
 async def get_notifications(
+    cursor: str | None = Query(None),
     service: NotificationServiceBase = Depends(NotificationService),
     current_user: SessionContent = Depends(get_current_user),
 ) -> GetNotificationsResponse:
     user_id = current_user.id
+    after = decode_cursor(cursor) if cursor else None
 
-    notifications = await service.get_notifications_by_user_id(user_id=user_id)
+    notifications = await service.get_notifications_by_user_id(
+        user_id=user_id, after=after
+    )
 
     response = GetNotificationsResponse(
         notifications=[
@@ -28,7 +33,8 @@ async def get_notifications(
                 created_at=notification.created_at,
             )
             for notification in notifications
-        ]
+        ],
+        next_cursor=next_cursor(notifications, service.items_per_page),
     )
 
     return response
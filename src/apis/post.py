@@ -1,11 +1,26 @@
-import json
-
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from redis.asyncio import Redis
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
 
 from src.auth import get_current_user
-from src.database import cache_servers, consistent_hash, get_redis
+from src.cache import (
+    POSTS_NAMESPACE,
+    get_or_build_response,
+    invalidate_key,
+    invalidate_namespace,
+    namespaced_key,
+    refresh_key,
+)
+from src.config import config
+from src.database import cache_servers, consistent_hash
 from src.domains.user import Role
+from src.pagination import decode_cursor, next_cursor
 from src.schemas.auth import SessionContent
 from src.schemas.common import Link
 from src.schemas.post import (
@@ -23,6 +38,16 @@ from src.servicies.post import PostService
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+# 작성자를 찾지 못한 포스트(탈퇴 등)에 표시하는 이름
+UNKNOWN_AUTHOR = "(알 수 없음)"
+
+
+def _author_name(post) -> str:
+    if post.user is None:
+        return UNKNOWN_AUTHOR
+    nickname: str = post.user.nickname
+    return nickname
+
 
 @router.post(
     "/", status_code=status.HTTP_201_CREATED, response_model=CreatePostResponse
@@ -30,7 +55,6 @@ router = APIRouter(prefix="/posts", tags=["posts"])
 async def create_post(
     request: CreatePostRequest,
     service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> CreatePostResponse:
     user_id = current_user.id
@@ -53,10 +77,7 @@ async def create_post(
         ],
     )
 
-    try:
-        await redis.delete("posts:*")
-    except:
-        pass
+    await invalidate_namespace(POSTS_NAMESPACE)
 
     return response
 
@@ -64,104 +85,77 @@ async def create_post(
 @router.get("/", response_model=PostsResponse, status_code=status.HTTP_200_OK)
 async def get_posts(
     page: int = Query(1),
+    cursor: str | None = Query(None),
     service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
-) -> PostsResponse:
-    cache_key = f"posts:page:{page}"
-    try:
-        cached_data = await redis.get(cache_key)
-        if cached_data:
-            return PostsResponse(**json.loads(cached_data))
-    except:
-        pass
-
-    posts = await service.get_posts(page)
-
-    response = PostsResponse(
-        posts=[
-            PostsResponseBody(
-                id=post.id,  # type: ignore
-                author=post.user.nickname,
-                title=post.title,
-                created_at=post.created_at,
-                updated_at=post.updated_at,
-                comment=CommentPartial(count=len(post.comments)),
-                like=LikePartial(count=len(post.likes)),
-                view_count=post.post_view.count,
-                links=[
-                    Link(href=f"/posts/{post.id}", rel="self", method="GET"),
-                    Link(
-                        href=f"/posts/{post.id}", rel="update_partial", method="PATCH"
-                    ),
-                    Link(href=f"/posts/{post.id}", rel="update_whole", method="PUT"),
-                    Link(href=f"/posts/{post.id}", rel="delete", method="DELETE"),
-                    Link(
-                        href=f"/likes/?post_id={post.id}",
-                        rel="liked_users",
-                        method="GET",
-                    ),
-                ],
-            )
-            for post in posts
-        ],
-        links=[
-            Link(href=f"/posts", rel="self", method="GET"),
-            Link(href="/posts", rel="create", method="POST"),
-        ],
-    )
-    try:
-        await redis.setex(
-            name=cache_key, time=3600, value=json.dumps(response.model_dump())
+) -> PostsResponse | Response:
+    after = decode_cursor(cursor) if cursor else None
+    position = f"cursor:{cursor}" if cursor else f"page:{page}"
+
+    async def _build_posts() -> PostsResponse:
+        posts = await service.get_posts(page=page, after=after)
+
+        response = PostsResponse(
+            posts=[
+                PostsResponseBody(
+                    id=post.id,  # type: ignore
+                    author=_author_name(post),
+                    title=post.title,
+                    created_at=post.created_at,
+                    updated_at=post.updated_at,
+                    comment=CommentPartial(count=len(post.comments)),
+                    like=LikePartial(count=len(post.likes)),
+                    view_count=post.post_view.count,
+                    links=[
+                        Link(href=f"/posts/{post.id}", rel="self", method="GET"),
+                        Link(
+                            href=f"/posts/{post.id}",
+                            rel="update_partial",
+                            method="PATCH",
+                        ),
+                        Link(
+                            href=f"/posts/{post.id}", rel="update_whole", method="PUT"
+                        ),
+                        Link(href=f"/posts/{post.id}", rel="delete", method="DELETE"),
+                        Link(
+                            href=f"/likes/?post_id={post.id}",
+                            rel="liked_users",
+                            method="GET",
+                        ),
+                    ],
+                )
+                for post in posts
+            ],
+            links=[
+                Link(href=f"/posts", rel="self", method="GET"),
+                Link(href="/posts", rel="create", method="POST"),
+            ],
+            partial=posts.partial,
+            next_cursor=next_cursor(posts, service.items_per_page),
         )
-    except:
-        pass
-
-    return response
-
-
-@router.get("/{post_id}", response_model=PostResponse, status_code=status.HTTP_200_OK)
-async def get_post(
-    response: Response,
-    post_id: int,
-    service: PostService = Depends(PostService),
-) -> PostResponse:
-    cache_key = f"post:post_id:{post_id}"
-
-    # 안정해시로 캐시 서버 로드밸런싱 모사
-    _, server_index = consistent_hash.get_node(cache_key)
-
-    # 캐시 미스일때도 캐시정보를 반환?
-    response.headers["X-CacheServer-Index"] = str(server_index)
-    response.headers["X-CacheServer-Count"] = str(len(cache_servers))
-    try:
-        # cache_key를 key로 입력하느라 Depends()에서 직접 호출로 변경되었음.
-        # Depends()를 유지하는 방법은 없을까?
-        redis = await get_redis(cache_key)
-
-        # 선택된 캐시 서버에 연결
-        cached_data = await redis.get(cache_key)
-
-        if cached_data:
-            return PostResponse(**json.loads(cached_data))
-    except:
-        pass
+        return response
 
     try:
-        cached_data = await redis.get(cache_key)
-        if cached_data:
-            return PostResponse(**json.loads(cached_data))
+        cache_key = await namespaced_key(POSTS_NAMESPACE, position)
     except:
-        pass
+        # 세대 번호를 읽지 못하면 캐시 없이 응답
+        return await _build_posts()
+
+    # 일부 샤드가 빠진 결과는 캐시하지 않음
+    # 캐시 히트는 저장된 JSON을 그대로 응답한다 (pydantic 모델을 만들지 않음)
+    return await get_or_build_response(
+        cache_key,
+        PostsResponse,
+        _build_posts,
+        soft_ttl=config.POSTS_CACHE_SOFT_TTL,
+        hard_ttl=config.POSTS_CACHE_HARD_TTL,
+        cacheable=lambda response: not response.partial,
+    )
 
-    post = await service.get_post(post_id)
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="존재하지 않는 포스트입니다"
-        )
 
-    post_response = PostResponse(
+def _post_response(post) -> PostResponse:
+    return PostResponse(
         id=post.id,  # type: ignore
-        author=post.user.nickname,
+        author=_author_name(post),
         title=post.title,
         content=post.content,
         created_at=post.created_at,
@@ -177,16 +171,51 @@ async def get_post(
             # like? 좋아요 기능을 넣었을 때 게시물에서는 보통 동작해야 할 것 같다
         ],
     )
-    await service.increase_post_view(post_id=post.id)  # type: ignore
 
-    try:
-        await redis.setex(
-            name=cache_key, time=3600, value=json.dumps(post_response.model_dump())
-        )
-    except:
-        pass
 
-    return post_response
+@router.get("/{post_id}", response_model=PostResponse, status_code=status.HTTP_200_OK)
+async def get_post(
+    post_id: int,
+    background_tasks: BackgroundTasks,
+    service: PostService = Depends(PostService),
+) -> PostResponse | Response:
+    cache_key = f"post:post_id:{post_id}"
+
+    # 안정해시로 캐시 서버 로드밸런싱 모사
+    _, server_index = consistent_hash.get_node(cache_key)
+
+    # 캐시 미스일때도 캐시정보를 반환?
+    headers = {
+        "X-CacheServer-Index": str(server_index),
+        "X-CacheServer-Count": str(len(cache_servers)),
+    }
+
+    async def _build_post() -> PostResponse:
+        post = await service.get_post(post_id)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="존재하지 않는 포스트입니다",
+            )
+
+        return _post_response(post)
+
+    # L1(프로세스) -> L2(cache_key가 배정된 캐시 서버) 순으로 조회.
+    # 캐시 미스가 동시에 몰려도 DB 조회는 키마다 한 번만 실행된다
+    response = await get_or_build_response(
+        cache_key,
+        PostResponse,
+        _build_post,
+        soft_ttl=config.POST_CACHE_SOFT_TTL,
+        hard_ttl=config.POST_CACHE_HARD_TTL,
+        headers=headers,
+        versioned=True,
+    )
+
+    # 조회수는 캐시 히트 여부와 관계없이 요청마다 한 번 올린다.
+    # 응답을 보낸 뒤 올려서 조회 요청이 쓰기로 취급되어 primary에 고정되지 않게 한다
+    background_tasks.add_task(service.increase_post_view, post_id=post_id)
+    return response
 
 
 @router.patch("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -194,7 +223,6 @@ async def edit_post(
     post_id: int,
     request: EditPostRequest,
     service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> None:
     user_id = current_user.id
@@ -214,11 +242,14 @@ async def edit_post(
     await service.edit_post(post=post, title=request.title, content=request.content)
 
     # 204 상태코드에선 어떻게? 보통 header의 Link에 HATEOAS 구성하면 문제없을 것 같은데 response 객체로 구성했을 때는?
-    try:
-        await redis.delete(f"post:post_id:{post_id}")
-        await redis.delete("posts:*")
-    except:
-        pass
+    # 지우지 않고 수정된 응답으로 바로 갱신해 다음 조회가 DB까지 가지 않게 한다
+    await refresh_key(
+        f"post:post_id:{post_id}",
+        _post_response(post),
+        soft_ttl=config.POST_CACHE_SOFT_TTL,
+        hard_ttl=config.POST_CACHE_HARD_TTL,
+    )
+    await invalidate_namespace(POSTS_NAMESPACE)
 
 
 @router.put("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -226,7 +257,6 @@ async def edit_post_whole(
     post_id: int,
     request: EditPostWholeRequest,
     service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> None:
     user_id = current_user.id
@@ -246,18 +276,19 @@ async def edit_post_whole(
     await service.edit_post(post=post, title=request.title, content=request.content)
     # 204 상태코드
 
-    try:
-        await redis.delete(f"post:post_id:{post_id}")
-        await redis.delete("posts:*")
-    except:
-        pass
+    await refresh_key(
+        f"post:post_id:{post_id}",
+        _post_response(post),
+        soft_ttl=config.POST_CACHE_SOFT_TTL,
+        hard_ttl=config.POST_CACHE_HARD_TTL,
+    )
+    await invalidate_namespace(POSTS_NAMESPACE)
 
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
     post_id: int,
     service: PostService = Depends(PostService),
-    redis: Redis = Depends(get_redis),
     current_user: SessionContent = Depends(get_current_user),
 ) -> None:
     user_id = current_user.id
@@ -279,8 +310,5 @@ async def delete_post(
     await service.delete_post(post)
     # 204 상태코드
 
-    try:
-        await redis.delete(f"post:post_id:{post_id}")
-        await redis.delete("posts:*")
-    except:
-        pass
+    await invalidate_key(f"post:post_id:{post_id}", versioned=True)
+    await invalidate_namespace(POSTS_NAMESPACE)
@@ -6,6 +6,7 @@ from ulid import ULID
 from src.auth import get_current_user, verify_password
 from src.config import config
 from src.domains.image import Image, SaveType
+from src.rate_limit_policy import forget_session
 from src.schemas.auth import SessionContent
 from src.schemas.user import (
     LoginRequest,
@@ -97,6 +98,7 @@ async def logout(
 
     if session:
         await auth_service.delete_session(session)
+        forget_session(session_id)
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="존재하지 않는 세션입니다"
@@ -1,9 +1,10 @@
-import json
 from datetime import datetime, timezone
 
 from fastapi import Cookie, Depends, HTTPException, status
 from passlib.context import CryptContext
 
+from src.domains.user import Role
+from src.rate_limit_policy import remember_session
 from src.schemas.auth import SessionContent
 from src.servicies.auth import AuthService
 
@@ -29,26 +30,39 @@ async def get_current_user(
             detail="세션 아이디가 입력되지 않았습니다. 다시 로그인 해 주세요",
         )
 
-    session_result = await service.find_session(session_id)
+    # 캐시에 있으면 DB를 조회하지 않는다. 만료는 캐시 TTL이, 로그아웃은 로그아웃 표시가 처리한다
+    session_content = await service.get_cached_session(session_id)
+    if session_content is None:
+        session_result = await service.find_session(session_id)
 
-    if not session_result:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="존재하지 않는 세션입니다. 다시 로그인 해 주세요",
+        if not session_result:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="존재하지 않는 세션입니다. 다시 로그인 해 주세요",
+            )
+
+        session_content = SessionContent.model_validate_json(
+            session_result.session_data
         )
+        is_expired = datetime.now(tz=timezone.utc) >= session_content.expire  # type: ignore
+        if is_expired:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="만료된 세션입니다. 다시 로그인 해주세요",
+            )
+        await service.cache_session(session_id, session_content)
+
+    # 처리율 제한 미들웨어가 이 세션을 유저별로 셀 수 있게 기억한다
+    remember_session(session_id, session_content.id)
+    return session_content
 
-    session_content_json = json.loads(session_result.session_data)
-    session_content = SessionContent(
-        id=session_content_json["id"],
-        nickname=session_content_json["nickname"],
-        role=session_content_json["role"],
-        expire=session_content_json["expire"],
-    )
 
-    is_expired = datetime.now(tz=timezone.utc) >= session_content.expire  # type: ignore
-    if is_expired:
+async def get_admin_user(
+    current_user: SessionContent = Depends(get_current_user),
+) -> SessionContent:
+    if not current_user.role == Role.admin:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="만료된 세션입니다. 다시 로그인 해주세요",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="관리자만 사용할 수 있습니다",
         )
-    return session_content
+    return current_user
@@ -0,0 +1,431 @@
+import asyncio
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, TypeVar, cast
+
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.cache_codec import JsonCodec, get_codec, get_compression, pack, unpack
+from src.config import config
+from src.database import cache_client, read_from_primary, redis
+
+# 목록 캐시 네임스페이스. 키에 세대 번호를 넣고, 무효화는 세대 번호만 올린다.
+# Redis DEL은 glob("posts:*")을 해석하지 않으므로 패턴 삭제 대신 이 방식을 사용한다.
+POSTS_NAMESPACE = "posts"
+COMMENTS_NAMESPACE = "comments"
+
+# 단건 캐시 무효화를 모든 워커에 알리는 채널
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# 락을 건 워커의 토큰과 같을 때만 지운다 (만료 후 다른 워커가 잡은 락을 지우지 않도록)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# 캐시 값과 함께 저장된 버전보다 오래된 버전이면 쓰지 않는다.
+# 수정 후 갱신(refresh_key)과 느린 재구성이 겹쳐도 오래된 응답이 새 응답을 덮어쓰지 않는다
+# KEYS[1] 캐시 키, KEYS[2] 버전 키, ARGV[1] 버전, ARGV[2] 값, ARGV[3] TTL(초)
+SET_IF_NEWER_SCRIPT = """
+local current = tonumber(redis.call("get", KEYS[2]) or "0")
+if tonumber(ARGV[1]) < current then
+    return 0
+end
+redis.call("set", KEYS[2], ARGV[1], "EX", ARGV[3])
+redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+return 1
+"""
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+codec = get_codec(config.CACHE_CODEC)
+compression = get_compression(config.CACHE_COMPRESSION)
+
+
+class LocalCache:
+    # 프로세스 안의 L1 캐시. 크기를 넘으면 가장 오래 안 쓴 키부터 버린다 (LRU + TTL)
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, str | bytes]] = OrderedDict()
+
+    def get(self, key: str) -> str | bytes | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str | bytes) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+local_cache = LocalCache(maxsize=config.L1_CACHE_SIZE, ttl=config.L1_CACHE_TTL)
+
+# 계층별 히트/미스 횟수. 예) cache_stats["l1_hit"]
+cache_stats: Counter[str] = Counter()
+
+
+def get_cache_stats() -> list[dict]:
+    stats = []
+    for tier in ("l1", "l2"):
+        hits, misses = cache_stats[f"{tier}_hit"], cache_stats[f"{tier}_miss"]
+        stats.append(
+            {
+                "tier": tier,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+        )
+    return stats
+
+
+async def get_cached(key: str) -> str | bytes | None:
+    # L1 -> L2(Redis 캐시 링) 순으로 조회. L2에서 찾으면 L1에도 넣는다
+    value = local_cache.get(key)
+    if value is not None:
+        cache_stats["l1_hit"] += 1
+        return value
+    cache_stats["l1_miss"] += 1
+
+    try:
+        value = await cache_client.get(key)
+    except:
+        value = None
+    if value is None:
+        cache_stats["l2_miss"] += 1
+        return None
+
+    cache_stats["l2_hit"] += 1
+    local_cache.set(key, value)
+    return value
+
+
+async def set_cached(key: str, value: str | bytes, ttl: int) -> None:
+    local_cache.set(key, value)
+    try:
+        await cache_client.setex(key, ttl, value)
+    except:
+        pass
+
+
+def version_key(key: str) -> str:
+    return f"version:{key}"
+
+
+def version_nodes(key: str) -> list[str]:
+    # 값이 놓일 수 있는 노드. 스크립트는 노드마다 저장된 버전과 비교하므로
+    # 버전도 값과 같은 노드들에 있어야 한다
+    nodes: list[str] = cache_client.get_replicas(key) or cache_client.get_nodes(key)[:1]
+    return nodes
+
+
+async def get_version(key: str, servers: list[str] | None = None) -> int:
+    # 재구성은 DB를 읽기 전에 값을 쓸 노드들에서 버전을 받아 둔다.
+    # 읽지 못한 노드는 0으로 보지만, 쓸 때 그 노드에 저장된 버전과 다시 비교한다
+    servers = servers or cache_client.get_write_nodes(key)
+    versions = await cache_client.fanout(servers, "get", version_key(key))
+    return max(int(version or 0) for version in versions)
+
+
+async def next_version(key: str) -> int:
+    # 부하 분산으로 다른 사본에 쓰인 값도 오래된 재구성에 덮이지 않도록 모든 사본에서 올린다
+    versions = await cache_client.fanout(version_nodes(key), "incr", version_key(key))
+    stored = [int(version) for version in versions if version is not None]
+    if not stored:
+        raise RedisConnectionError("사용 가능한 캐시 서버가 없습니다")
+    return max(stored)
+
+
+async def set_cached_if_newer(
+    key: str, value: bytes, ttl: int, version: int, servers: list[str] | None = None
+) -> bool:
+    servers = servers or cache_client.get_write_nodes(key)
+    results = await cache_client.eval_on(
+        servers, SET_IF_NEWER_SCRIPT, [key, version_key(key)], version, value, ttl
+    )
+    stored = any(results)
+    if stored:
+        local_cache.set(key, value)
+    return stored
+
+
+# 워커 안에서 진행 중인 캐시 재구성. 같은 키의 요청은 이 태스크의 결과를 함께 기다린다
+_rebuilds: dict[str, asyncio.Task] = {}
+
+
+def _rebuild_task(key: str, fn: Callable[[], Awaitable]) -> asyncio.Task:
+    task = _rebuilds.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn())
+        _rebuilds[key] = task
+
+        def _done(task: asyncio.Task) -> None:
+            _rebuilds.pop(key, None)
+            # 기다리던 요청이 모두 취소됐어도 예외를 회수해 경고가 남지 않게 한다
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(_done)
+    return task
+
+
+async def single_flight(key: str, fn: Callable[[], Awaitable]):
+    # 요청 하나가 취소돼도 재구성은 계속되도록 shield
+    return await asyncio.shield(_rebuild_task(key, fn))
+
+
+def _pack(payload: bytes, soft_ttl: int) -> bytes:
+    return pack(
+        codec,
+        payload,
+        time.time() + soft_ttl,
+        compression,
+        config.CACHE_COMPRESS_MIN_SIZE,
+    )
+
+
+def _unpack(value: str | bytes) -> tuple[float, JsonCodec, bytes]:
+    return unpack(value)  # type: ignore
+
+
+async def get_or_build(
+    key: str,
+    model: type[ResponseT],
+    build: Callable[[], Awaitable[ResponseT]],
+    soft_ttl: int,
+    hard_ttl: int,
+    cacheable: Callable[[ResponseT], bool] | None = None,
+    versioned: bool = False,
+) -> ResponseT:
+    """
+    캐시에서 응답을 읽고, 없으면 build()로 만들어 캐시한다.
+    소프트 TTL이 지난 응답은 그대로 반환하고 백그라운드에서 갱신한다 (stale-while-revalidate).
+    캐시 미스가 몰려도 워커 안에서는 single flight로, 워커 사이에서는 Redis 락으로
+    키마다 재구성이 한 번만 실행된다.
+    versioned=True이면 refresh_key로 갱신되는 키로, 재구성한 값은 버전을 비교해 쓴다.
+    """
+    response, payload_codec, payload = await _get_or_build(
+        key, model, build, soft_ttl, hard_ttl, cacheable, versioned
+    )
+    if response is not None:
+        return cast(ResponseT, response)
+    return payload_codec.loads(payload, model)  # type: ignore
+
+
+async def get_or_build_response(
+    key: str,
+    model: type[ResponseT],
+    build: Callable[[], Awaitable[ResponseT]],
+    soft_ttl: int,
+    hard_ttl: int,
+    cacheable: Callable[[ResponseT], bool] | None = None,
+    headers: dict[str, str] | None = None,
+    versioned: bool = False,
+) -> Response:
+    """
+    get_or_build와 같지만 캐시된 JSON을 pydantic 모델로 만들지 않고 그대로 응답한다.
+    """
+    _, payload_codec, payload = await _get_or_build(
+        key, model, build, soft_ttl, hard_ttl, cacheable, versioned
+    )
+    return Response(
+        content=payload_codec.to_json(payload),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+async def _get_or_build(key, model, build, soft_ttl, hard_ttl, cacheable, versioned):
+    # (새로 만든 응답 또는 None, 코덱, 페이로드)
+    def _rebuild(wait: bool) -> Callable[[], Awaitable]:
+        return lambda: _rebuild_with_lock(
+            key, model, build, soft_ttl, hard_ttl, cacheable, versioned, wait
+        )
+
+    cached = await get_cached(key)
+    if cached is not None:
+        try:
+            soft_expires_at, payload_codec, payload = _unpack(cached)
+        except ValueError:
+            # 형식이 다른 이전 캐시 값은 미스로 처리
+            payload = None
+        if payload is not None:
+            if soft_expires_at < time.time():
+                _rebuild_task(f"refresh:{key}", _rebuild(wait=False))
+            return None, payload_codec, payload
+
+    return await single_flight(key, _rebuild(wait=True))
+
+
+async def _rebuild_with_lock(
+    key, model, build, soft_ttl, hard_ttl, cacheable, versioned, wait
+):
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    try:
+        locked = await cache_client.set(
+            lock_key, token, nx=True, px=int(config.CACHE_LOCK_TIMEOUT * 1000)
+        )
+        connected = True
+    except:
+        # 캐시 서버에 연결할 수 없으면 락 없이 재구성
+        connected, locked = False, False
+
+    if connected and not locked:
+        if not wait:
+            # 다른 워커가 갱신 중. 다음 요청은 L2에서 새 값을 읽도록 L1만 비운다
+            local_cache.delete(key)
+            return None
+
+        # 다른 워커가 재구성 중이면 캐시가 채워지기를 기다린다
+        deadline = time.monotonic() + config.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            try:
+                cached = await cache_client.get(key)
+                _, payload_codec, payload = (
+                    _unpack(cached) if cached else (0, None, None)
+                )
+            except:
+                break
+            if payload is not None:
+                local_cache.set(key, cached)
+                return None, payload_codec, payload
+        # 락을 잡은 워커가 실패했거나 너무 오래 걸리면 직접 재구성
+
+    try:
+        version = None
+        # 버전을 읽은 노드들에만 쓴다
+        servers = cache_client.get_write_nodes(key)
+        if versioned and connected:
+            try:
+                version = await get_version(key, servers)
+            except:
+                pass
+        if versioned:
+            # 버전을 읽은 뒤 지연된 리플리카에서 읽으면 이전 값이 새 버전으로 캐시된다
+            with read_from_primary():
+                response = await build()
+        else:
+            response = await build()
+        # 캐시에 넣을 값과 응답 본문을 한 번의 직렬화로 만든다
+        payload = codec.dumps(response)
+        if cacheable is None or cacheable(response):
+            if not versioned:
+                await set_cached(key, _pack(payload, soft_ttl), hard_ttl)
+            elif version is not None:
+                # 버전을 모르면 최신 값을 덮어쓸 수 있으므로 캐시하지 않는다
+                try:
+                    await set_cached_if_newer(
+                        key, _pack(payload, soft_ttl), hard_ttl, version, servers
+                    )
+                except:
+                    pass
+        return response, codec, payload
+    finally:
+        if locked:
+            try:
+                await cache_client.eval(lock_key, RELEASE_LOCK_SCRIPT, token)
+            except:
+                pass
+
+
+async def refresh_key(
+    key: str, response: BaseModel, soft_ttl: int, hard_ttl: int
+) -> None:
+    """
+    DB 수정이 커밋된 뒤 캐시를 지우는 대신 새 응답으로 덮어쓴다 (write-through).
+    버전을 올린 뒤 쓰므로 그 전에 DB를 읽은 재구성은 이 값을 덮어쓰지 못한다.
+    갱신에 실패하면 지워서 다음 요청이 DB에서 다시 읽게 한다.
+    """
+    value = _pack(codec.dumps(response), soft_ttl)
+    try:
+        version = await next_version(key)
+        # 부하 때문에 다른 노드에 쓰였거나 복제된 사본까지 모두 갱신한다
+        await set_cached_if_newer(
+            key, value, hard_ttl, version, servers=version_nodes(key)
+        )
+    except:
+        await invalidate_key(key)
+        return
+    try:
+        await publish_invalidation(key)
+    except:
+        pass
+
+
+async def invalidate_key(key: str, versioned: bool = False) -> None:
+    # 키가 저장된 노드에서 지우고, 모든 워커의 L1에서도 지우도록 알린다
+    local_cache.delete(key)
+    try:
+        if versioned:
+            # 지우기 전에 DB를 읽은 재구성이 지운 값을 다시 쓰지 못하게 버전을 올린다
+            await next_version(key)
+        await cache_client.delete(key)
+    except:
+        pass
+    try:
+        await publish_invalidation(key)
+    except:
+        pass
+
+
+async def publish_invalidation(key: str) -> None:
+    await redis.publish(INVALIDATION_CHANNEL, key)
+
+
+async def listen_invalidations(redis: Redis) -> None:
+    while True:
+        try:
+            # 다시 연결할 때마다 이전 구독 커넥션을 닫는다
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # 구독이 끊긴 동안의 무효화 메시지는 받지 못했으므로 L1을 비운다
+                local_cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        local_cache.delete(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except:
+            await asyncio.sleep(1)
+
+
+@asynccontextmanager
+async def cache_invalidation_listener(app: FastAPI):
+    task = asyncio.create_task(listen_invalidations(redis))
+    yield
+    task.cancel()
+
+
+async def namespaced_key(namespace: str, key: str) -> str:
+    # 세대 번호는 모든 노드에 있으므로 네임스페이스가 배정된 노드에서 읽는다
+    generation = await cache_client.get(f"{namespace}:generation")
+    return f"{namespace}:{int(generation or 0)}:{key}"
+
+
+async def invalidate_namespace(namespace: str) -> None:
+    # 모든 캐시 노드의 세대 번호를 올린다. 이전 세대 키는 더 이상 읽히지 않고 TTL로 사라진다
+    await cache_client.broadcast("incr", f"{namespace}:generation")
@@ -0,0 +1,149 @@
+import importlib
+import json
+import struct
+import zlib
+from types import ModuleType
+from typing import cast
+
+import pydantic_core
+from pydantic import BaseModel
+
+
+def _optional_import(name: str) -> ModuleType | None:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+orjson: ModuleType | None = _optional_import("orjson")
+msgpack: ModuleType | None = _optional_import("msgpack")
+zstandard: ModuleType | None = _optional_import("zstandard")
+
+# 캐시 값 형식
+# | 1바이트 매직 | 8바이트 소프트 만료 시각(double) | 1바이트 코덱 | 1바이트 압축 | 페이로드 |
+# 하드 TTL은 Redis 키의 TTL. 형식이 다른 값(이전 텍스트 형식 등)은 ValueError로 미스 처리한다
+MAGIC = 0xCA
+HEADER = struct.Struct(">BdBB")
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+
+class JsonCodec:
+    # pydantic(Rust)으로 바로 JSON bytes를 만든다. 페이로드가 곧 응답 본문
+    codec_id = 0
+    name = "json"
+
+    def dumps(self, response: BaseModel) -> bytes:
+        return pydantic_core.to_json(response)
+
+    def to_json(self, payload: bytes) -> bytes:
+        return payload
+
+    def loads(self, payload: bytes, model: type[BaseModel]) -> BaseModel:
+        return model.model_validate_json(payload)
+
+
+class OrjsonCodec(JsonCodec):
+    codec_id = 1
+    name = "orjson"
+
+    def __init__(self, orjson: ModuleType):
+        self.orjson = orjson
+
+    def dumps(self, response: BaseModel) -> bytes:
+        return cast(bytes, self.orjson.dumps(response.model_dump()))
+
+
+class MsgpackCodec(JsonCodec):
+    # 페이로드가 JSON이 아니므로 응답할 때 JSON으로 다시 바꿔야 한다
+    codec_id = 2
+    name = "msgpack"
+
+    def __init__(self, msgpack: ModuleType, orjson: ModuleType | None = None):
+        self.msgpack = msgpack
+        self.orjson = orjson
+
+    def dumps(self, response: BaseModel) -> bytes:
+        return cast(bytes, self.msgpack.packb(response.model_dump(mode="json")))
+
+    def to_json(self, payload: bytes) -> bytes:
+        data = self.msgpack.unpackb(payload)
+        if self.orjson is not None:
+            return cast(bytes, self.orjson.dumps(data))
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def loads(self, payload: bytes, model: type[BaseModel]) -> BaseModel:
+        return model.model_validate(self.msgpack.unpackb(payload))
+
+
+# 설치된 라이브러리의 코덱만 사용할 수 있다
+CODECS = {JsonCodec.codec_id: JsonCodec()}
+if orjson is not None:
+    CODECS[OrjsonCodec.codec_id] = OrjsonCodec(orjson)
+if msgpack is not None:
+    CODECS[MsgpackCodec.codec_id] = MsgpackCodec(msgpack, orjson)
+
+
+def get_codec(name: str) -> JsonCodec:
+    for codec in CODECS.values():
+        if codec.name == name:
+            return codec
+    raise ValueError(f"사용할 수 없는 캐시 코덱입니다: {name}")
+
+
+def get_compression(name: str) -> int:
+    if name == "zstd":
+        # zstandard가 없으면 표준 라이브러리 zlib으로 압축
+        return COMPRESSION_ZSTD if zstandard is not None else COMPRESSION_ZLIB
+    if name == "zlib":
+        return COMPRESSION_ZLIB
+    return COMPRESSION_NONE
+
+
+def _compress(payload: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard가 설치되지 않았습니다")
+        return cast(bytes, zstandard.ZstdCompressor(level=3).compress(payload))
+    return zlib.compress(payload, 6)
+
+
+def _decompress(payload: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard가 설치되지 않았습니다")
+        return cast(bytes, zstandard.ZstdDecompressor().decompress(payload))
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    return payload
+
+
+def pack(
+    codec: JsonCodec,
+    payload: bytes,
+    soft_expires_at: float,
+    compression: int = COMPRESSION_NONE,
+    compress_min_size: int = 0,
+) -> bytes:
+    # 작은 값은 압축해도 줄어드는 양보다 CPU 비용이 커서 min_size 이상만 압축한다
+    if compression == COMPRESSION_NONE or len(payload) < compress_min_size:
+        compression = COMPRESSION_NONE
+    else:
+        payload = _compress(payload, compression)
+    return HEADER.pack(MAGIC, soft_expires_at, codec.codec_id, compression) + payload
+
+
+def unpack(value: bytes) -> tuple[float, JsonCodec, bytes]:
+    if isinstance(value, str):
+        value = value.encode()
+    if len(value) < HEADER.size or value[0] != MAGIC:
+        raise ValueError("캐시 값 형식이 아닙니다")
+    _, soft_expires_at, codec_id, compression = HEADER.unpack_from(value)
+    codec = CODECS.get(codec_id)
+    if codec is None:
+        raise ValueError(f"사용할 수 없는 캐시 코덱입니다: {codec_id}")
+    payload = _decompress(value[HEADER.size :], compression)
+    return soft_expires_at, codec, payload
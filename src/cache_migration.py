@@ -0,0 +1,152 @@
+"""
+캐시 링 변경 도구
+
+캐시 서버 목록이나 가상 노드 수가 바뀌면 일부 키의 주인 노드가 바뀌어 DB로 미스가 몰린다.
+config.PREVIOUS_CACHE_SERVERS에 이전 서버 목록을 지정하고 배포하면
+CACHE_RING_GRACE_SECONDS 동안 새 노드에서 미스가 난 키는 이전 노드에서 읽어 옮겨 담는다.
+그 사이 아래 명령으로 주인이 바뀐 키를 새 노드에 미리 복사하고, 끝나면 PREVIOUS_CACHE_SERVERS를 비운다.
+
+python -m src.cache_migration          # 옮겨가는 해시 구간 요약만 출력
+python -m src.cache_migration --copy   # SCAN/DUMP/RESTORE로 복사
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from src.cache import version_key
+from src.consistent_hash import ConsistentHash, MovedRange, diff_rings
+from src.database import cache_client, consistent_hash, redis_pool
+
+
+@dataclass
+class RingChangePlan:
+    previous: ConsistentHash
+    current: ConsistentHash
+    moved: list[MovedRange]
+
+    @property
+    def moved_fraction(self) -> float:
+        return sum(moved_range.fraction for moved_range in self.moved)
+
+    def summary(self) -> dict[tuple[str, str], float]:
+        # (이전 노드, 새 노드) -> 옮겨가는 키 비율
+        fractions: dict[tuple[str, str], float] = defaultdict(float)
+        for moved_range in self.moved:
+            fractions[(moved_range.source, moved_range.target)] += moved_range.fraction
+        return dict(fractions)
+
+    def get_move(self, key: str) -> tuple[str, str] | None:
+        source, _ = self.previous.get_node(key)
+        target, _ = self.current.get_node(key)
+        if source == target:
+            return None
+        return source, target
+
+
+def plan_ring_change(
+    previous: ConsistentHash, current: ConsistentHash
+) -> RingChangePlan:
+    return RingChangePlan(previous, current, diff_rings(previous, current))
+
+
+# 새 노드에 이미 값이 있거나, 버전이 있어 그 사이 갱신 또는 무효화된 키에는 복원하지 않는다
+# KEYS[1] 캐시 키, KEYS[2] 버전 키, ARGV[1] TTL(밀리초), ARGV[2] DUMP 값
+RESTORE_IF_ABSENT_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 1 or redis.call("exists", KEYS[2]) == 1 then
+    return 0
+end
+redis.call("restore", KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+
+def _is_copyable(key: str) -> bool:
+    # 락과 네임스페이스 세대 번호, 버전은 노드마다 따로 관리되므로 옮기지 않는다.
+    # 세션은 로그아웃으로 지운 뒤 이전 노드의 사본이 되살아나면 안 되므로 옮기지 않는다
+    return not key.startswith(("lock:", "version:", "session:")) and not key.endswith(
+        ":generation"
+    )
+
+
+@dataclass
+class WarmStats:
+    scanned: int = 0
+    copied: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        pool,
+        plan: RingChangePlan,
+        batch_size: int = 500,
+        pause: float = 0.05,
+    ) -> None:
+        self.pool = pool
+        self.plan = plan
+        self.batch_size = batch_size
+        # 배치 사이 쉬는 시간. 캐시 서버에 주는 부하를 제한한다.
+        self.pause = pause
+        self.stats = WarmStats()
+
+    async def run(self) -> WarmStats:
+        sources = {moved_range.source for moved_range in self.plan.moved}
+        for source in sorted(sources):
+            await self.copy_node(source)
+        return self.stats
+
+    async def copy_node(self, source: str) -> None:
+        connection = await self.pool.get_connection(source)
+        cursor = 0
+        while True:
+            cursor, keys = await connection.scan(cursor, count=self.batch_size)
+            self.stats.scanned += len(keys)
+            for key in keys:
+                key = key.decode() if isinstance(key, bytes) else key
+                move = self.plan.get_move(key)
+                # 이전 링에서 이 노드가 주인인 키만 옮긴다 (대체/복제 노드에 있던 사본은 제외)
+                if move is None or move[0] != source or not _is_copyable(key):
+                    continue
+                await self._copy_key(connection, key, move[1])
+            if cursor == 0:
+                return
+            await asyncio.sleep(self.pause)
+
+    async def _copy_key(self, connection, key: str, target: str) -> None:
+        dumped = await connection.dump(key)
+        ttl = await connection.pttl(key)
+        # 복사 사이에 만료됐거나 지워진 키
+        if dumped is None or ttl == -2:
+            return
+        target_connection = await self.pool.get_connection(target)
+        # 새 노드에 이미 있는 값이 더 최신일 수 있으므로 덮어쓰지 않는다
+        restored = await target_connection.eval(
+            RESTORE_IF_ABSENT_SCRIPT, 2, key, version_key(key), max(ttl, 0), dumped
+        )
+        if restored:
+            self.stats.copied[target] += 1
+
+
+async def main(copy: bool) -> None:
+    if cache_client.previous_ring is None:
+        print("PREVIOUS_CACHE_SERVERS가 지정되지 않았습니다")
+        return
+
+    plan = plan_ring_change(cache_client.previous_ring, consistent_hash)
+    print(f"moved={plan.moved_fraction:.2%}")
+    for (source, target), fraction in sorted(plan.summary().items()):
+        print(f"{source} -> {target}: {fraction:.2%}")
+
+    if copy:
+        stats = await CacheWarmer(redis_pool, plan).run()
+        print(f"scanned={stats.scanned}")
+        for target, count in stats.copied.items():
+            print(f"{target}: copied={count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copy", action="store_true")
+    asyncio.run(main(parser.parse_args().copy))
@@ -4,6 +4,16 @@ from pydantic_settings import BaseSettings
 
 class Config(BaseSettings):
     DATABASE_URL: str = Field(default="sqlite+aiosqlite:///:memory:")
+    # 샤드 DB URL 목록(shard_1부터). 비어 있으면 DATABASE_URL 하나만 사용
+    DATABASE_URLS: list[str] = Field(default=[])
+    # 샤드별 커넥션 풀 설정 (리플리카에도 같이 적용)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 0
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # 특정 샤드만 다르게 줄 때. 예) {"shard_1": {"pool_size": 40, "max_overflow": 10}}
+    DB_POOL_OVERRIDES: dict[str, dict[str, int | float | bool]] = Field(default={})
     REDIS_URL: str = Field(default="redis://localhost")
     LOCAL_UPLOAD_DIR: str = Field(default="./profile_img")
     GOOGLE_APPLICATION_CREDENTIALS: str = Field(default="")
@@ -11,9 +21,72 @@ class Config(BaseSettings):
     GCP_STORAGE_URL: str = Field(default="https://storage.googleapis.com")
     GCP_BUCKET_NAME: str = Field(default="fastapi-post-storage")
 
+    # 샤드 재배치 중일 때 이전 토폴로지의 샤드 이름 목록. 예) ["shard_1"]
+    PREVIOUS_SHARDS: list[str] = Field(default=[])
+    # 전체 샤드 조회시 샤드별 응답 제한 시간(초)
+    SHARD_QUERY_TIMEOUT: float = 3.0
+    # 스케줄러의 전체 샤드 정리 작업(삭제 후 커밋)은 사용자 요청이 아니므로 따로 길게 준다
+    SHARD_MAINTENANCE_TIMEOUT: float = 300.0
+    # id 생성기 워커 번호(0~31). 지정하지 않으면 시작할 때 Redis에서 임대한다
+    WORKER_ID: int | None = None
+    # 임대한 워커 번호의 TTL(초). TTL의 1/3마다 연장하고, 종료하면 반납한다
+    WORKER_ID_LEASE_SECONDS: int = 30
+    # 닉네임 인덱스에 없으면 전체 샤드에서 찾고 인덱스를 채운다. 백필을 마치면 끈다
+    NICKNAME_INDEX_FALLBACK: bool = True
+    # 샤드별 읽기 전용 리플리카 URL 목록. 예) {"shard_1": ["mysql+aiomysql://..."]}
+    DATABASE_REPLICA_URLS: dict[str, list[str]] = Field(default={})
+    # 쓰기 후 이 시간(초) 동안은 같은 클라이언트의 읽기를 primary로 보낸다
+    STICKY_PRIMARY_SECONDS: float = 5.0
+
+    # 프로세스 안 L1 캐시 크기(키 개수)와 TTL(초)
+    L1_CACHE_SIZE: int = 1000
+    L1_CACHE_TTL: float = 30.0
+    # 캐시 재구성 락 유지 시간(초). 다른 워커는 최대 이 시간만큼 재구성 결과를 기다린다
+    CACHE_LOCK_TIMEOUT: float = 5.0
+    # 응답 캐시 TTL(초). 소프트 TTL이 지나면 이전 응답을 주면서 백그라운드에서 갱신하고,
+    # 하드 TTL이 지나면 캐시에서 사라진다
+    POST_CACHE_SOFT_TTL: int = 60
+    POST_CACHE_HARD_TTL: int = 3600
+    POSTS_CACHE_SOFT_TTL: int = 10
+    POSTS_CACHE_HARD_TTL: int = 3600
+    COMMENTS_CACHE_SOFT_TTL: int = 10
+    COMMENTS_CACHE_HARD_TTL: int = 3600
+
+    # 캐시 값 직렬화 (json | orjson | msgpack)와 압축 (none | zlib | zstd, zstandard가 없으면 zlib)
+    CACHE_CODEC: str = "json"
+    CACHE_COMPRESSION: str = "zstd"
+    # 이 크기(바이트) 이상인 값만 압축
+    CACHE_COMPRESS_MIN_SIZE: int = 4096
+
+    # 캐시 서버 응답 제한 시간(초). 넘으면 노드를 내려간 것으로 보고 링의 다음 노드를 사용
+    CACHE_SOCKET_TIMEOUT: float = 0.5
+    # 내려간 노드 헬스 체크 주기(초)와 복귀에 필요한 연속 성공 횟수
+    CACHE_HEALTH_CHECK_INTERVAL: float = 5.0
+    CACHE_HEALTH_CHECK_PASSES: int = 2
+    # 핫 키를 복제하는 링의 연속 노드 수와, 핫 키를 읽을 때 지키는 노드별 부하 상한 (1+ε) x 평균
+    # 부하는 이 워커가 노드마다 보내고 있는 요청 수라 다른 워커의 부하는 보지 못한다 (워커별 근사)
+    CACHE_REPLICAS: int = 2
+    CACHE_LOAD_EPSILON: float = 0.25
+    # 워커에서 1초에 이 횟수 이상 읽히는 키는 CACHE_REPLICAS개 노드 모두에 쓴다. 0이면 끈다
+    # 부하 상한은 복제한 핫 키에만 적용되므로, 기본값(0)에서는 모든 키를 주인 노드에서 읽는다
+    CACHE_HOT_KEY_THRESHOLD: int = 0
+    # 캐시 링이 바뀐 뒤 이전 링의 주인 노드도 읽는 시간(초). 이전 서버 목록은 재배포 시 지정
+    CACHE_RING_GRACE_SECONDS: float = 600.0
+    PREVIOUS_CACHE_SERVERS: list[str] = Field(default=[])
+
     # bucket rate limit
     REQUESTS_PER_MINUTE: int = 60
     BUCKET_SIZE: float = 10.0
+    # 워커가 Redis 버킷에서 한 번에 빌려오는 토큰 수(버킷 크기의 1/4까지)와 빌린 토큰의 유효 시간(초). 1이면 요청마다 Redis
+    RATE_LIMIT_LEASE_SIZE: int = 5
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0
+    # 워커가 들고 있는 클라이언트별 버킷 수 (LRU)
+    RATE_LIMIT_LOCAL_BUCKETS: int = 10000
+    # 처리율 제한을 하지 않는 경로 (헬스 체크)
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = Field(default=["/"])
+    # 유저별 정책에 쓰는, 워커가 기억하는 검증된 세션 수와 유지 시간(초)
+    RATE_LIMIT_SESSION_CACHE_SIZE: int = 10000
+    RATE_LIMIT_SESSION_CACHE_TTL: float = 60.0
 
 
 config = Config()
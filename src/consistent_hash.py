@@ -1,36 +1,195 @@
+import asyncio
 import bisect
 import hashlib
+import math
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
 
+_MASK_64 = (1 << 64) - 1
+_RING_SIZE = 1 << 64
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
 
-class ConsistentHash:
-    def __init__(self, nodes: list[str], virtual_nodes: int = 100):
+
+def fast_hash(key: str) -> int:
+    # crc32(C 구현)를 피보나치 곱셈으로 64비트에 펼친다. md5 hexdigest -> int보다 훨씬 싸다
+    return (zlib.crc32(key.encode()) * _FIBONACCI_MULTIPLIER) & _MASK_64
+
+
+def md5_hash(key: str) -> int:
+    # 상위 64비트만 사용. 128비트 전체로 정렬했을 때와 링 순서가 같다
+    return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+
+class _Ring:
+    # 한 번 만들면 바뀌지 않는 링. 정렬된 해시 배열과 같은 위치의 노드 번호 배열
+    __slots__ = ("nodes", "hashes", "node_indexes")
+
+    def __init__(self, nodes: tuple[str, ...], hashes: array, node_indexes: array):
         self.nodes = nodes
+        self.hashes = hashes
+        self.node_indexes = node_indexes
+
+
+class ConsistentHash:
+    def __init__(
+        self,
+        nodes: list[str],
+        virtual_nodes: int = 100,
+        hash_fn: Callable[[str], int] = fast_hash,
+    ):
+        self.hash_fn = hash_fn
         self.virtual_nodes = virtual_nodes
-        self.ring: dict[str, str] = {}
-        self.sorted_keys: list[str] = []
-        self._build_ring()
-
-    def _build_ring(self):
-        self.ring = {}
-        self.sorted_keys = []
-        for node in self.nodes:
-            for i in range(self.virtual_nodes):
-                key = self._hash(f"{node}:{i}")
-                self.ring[key] = node
-                bisect.insort(self.sorted_keys, key)
-
-    def _hash(self, key: str) -> int:
-        return int(hashlib.md5(key.encode()).hexdigest(), 16)
+        self._ring = self._build_ring(nodes, virtual_nodes)
+        # 노드별로 처리 중인 요청 수. 링을 다시 만들어도 유지된다
+        self.loads: Counter[str] = Counter()
 
-    def get_node(self, key: str) -> tuple:
-        if not self.ring:
+    @property
+    def nodes(self) -> list[str]:
+        return list(self._ring.nodes)
+
+    def _build_ring(self, nodes: list[str], virtual_nodes: int) -> _Ring:
+        # 가상 노드 해시를 모두 구한 뒤 한 번만 정렬한다 O(NV log NV)
+        points = sorted(
+            (self.hash_fn(f"{node}:{i}"), node_index)
+            for node_index, node in enumerate(nodes)
+            for i in range(virtual_nodes)
+        )
+        hashes = array("Q", (hash_key for hash_key, _ in points))
+        node_indexes = array("I", (node_index for _, node_index in points))
+        return _Ring(tuple(nodes), hashes, node_indexes)
+
+    def _swap(self, ring: _Ring, virtual_nodes: int) -> None:
+        # 읽는 쪽은 self._ring 참조 하나만 잡으므로 교체 중에도 반쯤 만든 링을 보지 않는다
+        self._ring = ring
+        self.virtual_nodes = virtual_nodes
+
+    def copy(self) -> "ConsistentHash":
+        # 지금의 링을 공유하는 사본. 링을 바꾸기 전 배치를 남겨둘 때 사용 (부하 카운터는 새로)
+        other = ConsistentHash.__new__(ConsistentHash)
+        other.hash_fn = self.hash_fn
+        other.virtual_nodes = self.virtual_nodes
+        other._ring = self._ring
+        other.loads = Counter()
+        return other
+
+    def get_node_by_hash(self, hash_key: int) -> tuple:
+        ring = self._ring
+        if not ring.hashes:
             return None, -1
-        hash_key = self._hash(key)
-        index = bisect.bisect(self.sorted_keys, hash_key) % len(self.sorted_keys)
-        return self.ring[self.sorted_keys[index]], self.nodes.index(
-            self.ring[self.sorted_keys[index]]
+        index = bisect.bisect(ring.hashes, hash_key) % len(ring.hashes)
+        node_index = ring.node_indexes[index]
+        return ring.nodes[node_index], node_index
+
+    def get_node(self, key: str) -> tuple:
+        return self.get_node_by_hash(self.hash_fn(key))
+
+    def get_nodes(self, key: str, count: int) -> list[str]:
+        # 키의 위치에서 링을 시계 방향으로 돌며 서로 다른 노드를 count개까지 반환 (대체 노드 순서)
+        ring = self._ring
+        if not ring.hashes:
+            return []
+        count = min(count, len(ring.nodes))
+        index = bisect.bisect(ring.hashes, self.hash_fn(key))
+        node_indexes: list[int] = []
+        for offset in range(len(ring.hashes)):
+            node_index = ring.node_indexes[(index + offset) % len(ring.hashes)]
+            if node_index not in node_indexes:
+                node_indexes.append(node_index)
+                if len(node_indexes) == count:
+                    break
+        return [ring.nodes[node_index] for node_index in node_indexes]
+
+    def add_load(self, node: str, amount: int = 1) -> None:
+        self.loads[node] += amount
+
+    def remove_load(self, node: str, amount: int = 1) -> None:
+        self.loads[node] -= amount
+
+    def capacity(self, epsilon: float) -> int:
+        # 새 요청 하나를 포함한 평균 부하의 (1+ε)배. 어떤 노드도 이 값을 넘지 않는다
+        ring = self._ring
+        total = sum(self.loads[node] for node in ring.nodes) + 1
+        return math.ceil((1 + epsilon) * total / max(len(ring.nodes), 1))
+
+    def pick_bounded(self, nodes: list[str], epsilon: float) -> str | None:
+        # 링 순서대로 용량이 남은 첫 노드. 모두 가득 차면 첫 노드
+        if not nodes:
+            return None
+        capacity = self.capacity(epsilon)
+        for node in nodes:
+            if self.loads[node] < capacity:
+                return node
+        return nodes[0]
+
+    def get_node_bounded(
+        self, key: str, epsilon: float, count: int | None = None
+    ) -> str | None:
+        # 부하 상한이 있는 consistent hashing. count개의 다음 노드까지만 넘겨 보낸다
+        return self.pick_bounded(
+            self.get_nodes(key, count or len(self._ring.nodes)), epsilon
         )
 
     def set_virtual_nodes(self, virtual_nodes: int):
-        self.virtual_nodes = virtual_nodes
-        self._build_ring()
+        self._swap(
+            self._build_ring(list(self._ring.nodes), virtual_nodes), virtual_nodes
+        )
+
+    async def rebuild(self, virtual_nodes: int | None = None) -> None:
+        # 큰 링은 만드는 데 시간이 걸리므로 스레드에서 만들고 이벤트 루프에서는 교체만 한다
+        if virtual_nodes is None:
+            virtual_nodes = self.virtual_nodes
+        ring = await asyncio.to_thread(
+            self._build_ring, list(self._ring.nodes), virtual_nodes
+        )
+        self._swap(ring, virtual_nodes)
+
+
+@dataclass(frozen=True)
+class MovedRange:
+    # 해시 구간 [start, end)의 키가 source 노드에서 target 노드로 옮겨간다
+    start: int
+    end: int
+    source: str
+    target: str
+
+    @property
+    def fraction(self) -> float:
+        return (self.end - self.start) / _RING_SIZE
+
+
+def diff_rings(old: ConsistentHash, new: ConsistentHash) -> list[MovedRange]:
+    """
+    두 링의 가상 노드 위치를 합쳐 구간을 나누고, 주인 노드가 바뀌는 구간만 반환한다.
+    두 링은 같은 해시 함수를 사용해야 한다.
+    """
+    points = sorted(set(old._ring.hashes) | set(new._ring.hashes))
+    if not points or not old._ring.hashes or not new._ring.hashes:
+        return []
+
+    # 해시가 가상 노드 위치와 같으면 다음 위치의 노드에 배정되므로 구간은 [p_i, p_i+1)
+    boundaries = [0] + points + [_RING_SIZE]
+    moved: list[MovedRange] = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        if start == end:
+            continue
+        source, _ = old.get_node_by_hash(start)
+        target, _ = new.get_node_by_hash(start)
+        if source == target:
+            continue
+        last = moved[-1] if moved else None
+        if (
+            last
+            and last.end == start
+            and (last.source, last.target)
+            == (
+                source,
+                target,
+            )
+        ):
+            moved[-1] = MovedRange(last.start, end, source, target)
+        else:
+            moved.append(MovedRange(start, end, source, target))
+    return moved
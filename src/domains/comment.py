@@ -1,19 +1,29 @@
 from datetime import datetime
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import BigInteger, Field, Index, Relationship, SQLModel, func
 
 from src.domains.post import Post
 from src.domains.user import User
 
 
 class Comment(SQLModel, table=True):  # type: ignore
-    id: int | None = Field(primary_key=True)
+    # 최신순 커서 페이지네이션용
+    __table_args__ = (
+        Index("ix_comment_post_id_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_comment_author_id_created_at_id", "author_id", "created_at", "id"),
+    )
+
+    id: int | None = Field(primary_key=True, sa_type=BigInteger)
     content: str
     created_at: datetime = Field(default=func.now())
     updated_at: datetime = Field(default_factory=func.now)
 
-    author_id: int = Field(foreign_key="user.id")
-    user: User = Relationship(back_populates="comments")
+    # 작성자는 유저 샤드에 있으므로 FK를 두지 않는다
+    author_id: int = Field(sa_type=BigInteger)
+    user: User = Relationship(
+        back_populates="comments",
+        sa_relationship_kwargs={"primaryjoin": "foreign(Comment.author_id) == User.id"},
+    )
 
-    post_id: int = Field(foreign_key="post.id")
+    post_id: int = Field(foreign_key="post.id", sa_type=BigInteger)
     post: Post = Relationship(back_populates="comments")
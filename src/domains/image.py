@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import BigInteger, Field, Relationship, SQLModel, func
 
 from src.domains.user import User
 
@@ -21,12 +21,18 @@ class UseType(str, Enum):
 
 
 class Image(SQLModel, table=True):  # type: ignore
-    id: int | None = Field(primary_key=True)
+    id: int | None = Field(primary_key=True, sa_type=BigInteger)
     name: str
     save_type: SaveType = Field(default=SaveType.LOCAL)
     use_type: UseType = Field(default=UseType.USER_PROFILE)
     state: State = Field(default=State.PENDING)
     created_at: datetime = Field(default=func.now())
 
-    user_id: int | None = Field(foreign_key="user.id", default=None, nullable=True)
-    user: User = Relationship(back_populates="images")
+    # 이미지는 자기 id의 샤드에, 유저는 유저 샤드에 있으므로 FK를 두지 않는다
+    user_id: int | None = Field(
+        default=None, nullable=True, index=True, sa_type=BigInteger
+    )
+    user: User = Relationship(
+        back_populates="images",
+        sa_relationship_kwargs={"primaryjoin": "foreign(Image.user_id) == User.id"},
+    )
@@ -1,14 +1,33 @@
 from datetime import datetime
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import (
+    BigInteger,
+    Field,
+    Index,
+    Relationship,
+    SQLModel,
+    UniqueConstraint,
+    func,
+)
 
 
 class Like(SQLModel, table=True):  # type: ignore
-    id: int | None = Field(primary_key=True)
+    # 최신순 커서 페이지네이션용
+    __table_args__ = (
+        Index("ix_like_post_id_created_at_id", "post_id", "created_at", "id"),
+        # 유저는 포스트마다 한 번만 좋아요할 수 있다. 좋아요는 포스트 샤드에 모이므로 샤드 안에서 보장된다
+        UniqueConstraint("user_id", "post_id"),
+    )
+
+    id: int | None = Field(primary_key=True, sa_type=BigInteger)
     created_at: datetime = Field(default=func.now())
 
-    user_id: int = Field(foreign_key="user.id")
-    user: "User" = Relationship(back_populates="likes")  # type: ignore
+    # 유저는 유저 샤드에 있으므로 FK를 두지 않는다
+    user_id: int = Field(sa_type=BigInteger)
+    user: "User" = Relationship(  # type: ignore
+        back_populates="likes",
+        sa_relationship_kwargs={"primaryjoin": "foreign(Like.user_id) == User.id"},
+    )
 
-    post_id: int = Field(foreign_key="post.id")
+    post_id: int = Field(foreign_key="post.id", sa_type=BigInteger)
     post: "Post" = Relationship(back_populates="likes")  # type: ignore
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import BigInteger, Field, Index, Relationship, SQLModel, func
 
 
 class Role(Enum):
@@ -10,22 +10,40 @@ class Role(Enum):
 
 
 class Notification(SQLModel, table=True):  # type: ignore
+    # 최신순 커서 페이지네이션용
+    __table_args__ = (
+        Index(
+            "ix_notification_target_user_id_created_at_id",
+            "target_user_id",
+            "created_at",
+            "id",
+        ),
+    )
+
     id: int | None = Field(primary_key=True)
     created_at: datetime = Field(default=func.now())
 
     # 포스트 작성자 유저
-    target_user_id: int = Field(foreign_key="user.id")
+    target_user_id: int = Field(foreign_key="user.id", sa_type=BigInteger)
     target_user: "User" = Relationship(  # type: ignore
         back_populates="target_notifications",
         sa_relationship_kwargs={"foreign_keys": "Notification.target_user_id"},
     )
 
-    # 포스트에 좋아요한 유저
-    actor_user_id: int = Field(foreign_key="user.id")
+    # 포스트에 좋아요한 유저. 알림은 대상 유저 샤드에 있고 좋아요한 유저와 포스트는
+    # 다른 샤드에 있을 수 있으므로 FK를 두지 않는다
+    actor_user_id: int = Field(index=True, sa_type=BigInteger)
     actor_user: "User" = Relationship(  # type: ignore
         back_populates="actor_notifications",
-        sa_relationship_kwargs={"foreign_keys": "Notification.actor_user_id"},
+        sa_relationship_kwargs={
+            "primaryjoin": "foreign(Notification.actor_user_id) == User.id"
+        },
     )
 
-    post_id: int = Field(foreign_key="post.id")
-    post: "Post" = Relationship(back_populates="notifications")  # type: ignore
+    post_id: int = Field(index=True, sa_type=BigInteger)
+    post: "Post" = Relationship(  # type: ignore
+        back_populates="notifications",
+        sa_relationship_kwargs={
+            "primaryjoin": "foreign(Notification.post_id) == Post.id"
+        },
+    )
@@ -1,13 +1,16 @@
 from datetime import datetime
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import BigInteger, Field, Index, Relationship, SQLModel, func
 
 from src.domains.post_view import PostView
 from src.domains.user import User
 
 
 class Post(SQLModel, table=True):  # type: ignore
-    id: int | None = Field(primary_key=True)
+    # 최신순 커서 페이지네이션용
+    __table_args__ = (Index("ix_post_created_at_id", "created_at", "id"),)
+
+    id: int | None = Field(primary_key=True, sa_type=BigInteger)
     title: str
     content: str
     # default: 정의한 값으로 정적 채우기
@@ -15,15 +18,24 @@ class Post(SQLModel, table=True):  # type: ignore
     # default_factory: 정의한 함수를 해당 시점에 호출해서 채우기
     updated_at: datetime = Field(default_factory=func.now)
 
-    author_id: int = Field(foreign_key="user.id")
-    user: User = Relationship(back_populates="posts")
+    # 작성자는 유저 샤드에 있으므로 FK를 두지 않는다 (샤드를 넘는 FK는 쓰기를 실패시킨다)
+    author_id: int = Field(index=True, sa_type=BigInteger)
+    user: User = Relationship(
+        back_populates="posts",
+        sa_relationship_kwargs={"primaryjoin": "foreign(Post.author_id) == User.id"},
+    )
 
     comments: list["Comment"] = Relationship(back_populates="post")  # type: ignore
     likes: list["Like"] = Relationship(back_populates="post")  # type: ignore
 
     post_view: PostView = Relationship(back_populates="post")  # type: ignore
 
-    notifications: list["Notification"] = Relationship(back_populates="post")  # type: ignore
+    notifications: list["Notification"] = Relationship(  # type: ignore
+        back_populates="post",
+        sa_relationship_kwargs={
+            "primaryjoin": "Post.id == foreign(Notification.post_id)"
+        },
+    )
 
     @property
     def author(self):
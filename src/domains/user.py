@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlmodel import Field, Relationship, SQLModel, func
+from sqlmodel import BigInteger, Field, Relationship, SQLModel, func
 
 
 class Role(str, Enum):
@@ -10,25 +10,40 @@ class Role(str, Enum):
 
 
 class User(SQLModel, table=True):  # type: ignore
-    id: int | None = Field(primary_key=True)
+    id: int | None = Field(primary_key=True, sa_type=BigInteger)
     nickname: str
     password: str
     role: Role = Field(default=Role.member)
     created_at: datetime = Field(default=func.now())
     updated_at: datetime = Field(default_factory=func.now)
 
-    posts: list["Post"] = Relationship(back_populates="user")  # type: ignore
-    comments: list["Comment"] = Relationship(back_populates="user")  # type: ignore
-    likes: list["Like"] = Relationship(back_populates="user")  # type: ignore
+    # 유저를 가리키는 테이블은 다른 샤드에 있을 수 있어 FK 없이 조인 조건만 둔다
+    posts: list["Post"] = Relationship(  # type: ignore
+        back_populates="user",
+        sa_relationship_kwargs={"primaryjoin": "User.id == foreign(Post.author_id)"},
+    )
+    comments: list["Comment"] = Relationship(  # type: ignore
+        back_populates="user",
+        sa_relationship_kwargs={"primaryjoin": "User.id == foreign(Comment.author_id)"},
+    )
+    likes: list["Like"] = Relationship(  # type: ignore
+        back_populates="user",
+        sa_relationship_kwargs={"primaryjoin": "User.id == foreign(Like.user_id)"},
+    )
     target_notifications: list["Notification"] = Relationship(  # type: ignore
         back_populates="target_user",
         sa_relationship_kwargs={"foreign_keys": "Notification.target_user_id"},
     )
     actor_notifications: list["Notification"] = Relationship(  # type: ignore
         back_populates="actor_user",
-        sa_relationship_kwargs={"foreign_keys": "Notification.actor_user_id"},
+        sa_relationship_kwargs={
+            "primaryjoin": "User.id == foreign(Notification.actor_user_id)"
+        },
+    )
+    images: list["Image"] = Relationship(  # type: ignore
+        back_populates="user",
+        sa_relationship_kwargs={"primaryjoin": "User.id == foreign(Image.user_id)"},
     )
-    images: list["Image"] = Relationship(back_populates="user")  # type: ignore
 
 
 from src.domains.image import Image
@@ -0,0 +1,7 @@
+from sqlmodel import BigInteger, Field, SQLModel
+
+
+class UserNickname(SQLModel, table=True):  # type: ignore
+    # 닉네임 -> 유저 id 전역 인덱스. 닉네임 해시로 샤드가 정해진다
+    nickname: str = Field(primary_key=True)
+    user_id: int = Field(sa_type=BigInteger)
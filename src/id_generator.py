@@ -0,0 +1,189 @@
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from redis.asyncio import Redis
+
+# 63비트 Snowflake 형식 id
+# | 41비트 타임스탬프(ms) | 10비트 슬롯 | 5비트 워커 | 7비트 시퀀스 |
+# 상위 비트가 시간이라 id가 대체로 증가하고(B-tree 끝에 삽입), 슬롯으로 샤드를 바로 찾는다.
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+TIMESTAMP_BITS = 41
+SLOT_BITS = 10
+WORKER_BITS = 5
+SEQUENCE_BITS = 7
+
+WORKER_SHIFT = SEQUENCE_BITS
+SLOT_SHIFT = WORKER_BITS + SEQUENCE_BITS
+TIMESTAMP_SHIFT = SLOT_BITS + WORKER_BITS + SEQUENCE_BITS
+
+SLOT_COUNT = 1 << SLOT_BITS
+WORKER_COUNT = 1 << WORKER_BITS
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# 이 범위 밖의 키(ULID -> md5 % 2**30으로 만든 이전 id, md5 세션 키)는 Snowflake id가 아니다
+LEGACY_ID_LIMIT = 2**30
+MAX_ID = 2**63
+
+
+def is_snowflake_id(key: int) -> bool:
+    return LEGACY_ID_LIMIT <= key < MAX_ID
+
+
+def get_slot(id: int) -> int:
+    return (id >> SLOT_SHIFT) & (SLOT_COUNT - 1)
+
+
+def get_timestamp_ms(id: int) -> int:
+    return (id >> TIMESTAMP_SHIFT) + EPOCH_MS
+
+
+class SnowflakeIdGenerator:
+    def __init__(
+        self, worker_id: int = 0, epoch_ms: int = EPOCH_MS, active: bool = True
+    ) -> None:
+        self.worker_id = worker_id
+        self.epoch_ms = epoch_ms
+        self.last_ms = -1
+        self.sequence = 0
+        self.next_slot = 0
+        # 워커 번호 임대를 잃으면 다른 워커와 id가 겹칠 수 있으므로 발급을 멈춘다
+        self.active = active
+
+    @property
+    def worker_id(self) -> int:
+        return self._worker_id
+
+    @worker_id.setter
+    def worker_id(self, worker_id: int) -> None:
+        if not 0 <= worker_id < WORKER_COUNT:
+            raise ValueError(f"worker_id는 0 ~ {WORKER_COUNT - 1} 사이여야 합니다")
+        self._worker_id = worker_id
+
+    def _now_ms(self) -> int:
+        return time.time_ns() // 1_000_000
+
+    def next_id(self, slot: int | None = None) -> int:
+        if not self.active:
+            raise RuntimeError(
+                "워커 번호를 임대하지 않았거나 임대가 만료되어 id를 발급할 수 없습니다"
+            )
+        # slot을 지정하면 같은 슬롯(같은 샤드)의 id를 만든다. 없으면 슬롯을 돌아가며 배정
+        if slot is None:
+            slot = self.next_slot
+            self.next_slot = (self.next_slot + 1) % SLOT_COUNT
+
+        now = self._now_ms()
+        # 시계가 뒤로 가면 마지막 시각을 계속 사용해 중복을 막는다
+        if now < self.last_ms:
+            now = self.last_ms
+        if now == self.last_ms:
+            self.sequence = (self.sequence + 1) & SEQUENCE_MASK
+            if self.sequence == 0:
+                # 1ms 안에 시퀀스를 다 쓰면 다음 ms까지 기다린다
+                while now <= self.last_ms:
+                    now = self._now_ms()
+        else:
+            self.sequence = 0
+        self.last_ms = now
+
+        return (
+            ((now - self.epoch_ms) << TIMESTAMP_SHIFT)
+            | (slot << SLOT_SHIFT)
+            | (self.worker_id << WORKER_SHIFT)
+            | self.sequence
+        )
+
+
+# 워커 번호를 임대하거나 지정하기 전에는 다른 프로세스와 id가 겹칠 수 있으므로 발급하지 않는다.
+# 스크립트나 스케줄러도 worker_id_lease 안에서 id를 만든다
+id_generator = SnowflakeIdGenerator(active=False)
+
+
+WORKER_LEASE_KEY = "id_generator:worker:{}"
+
+# 내가 임대한 키일 때만 연장/반납한다
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_worker_id(redis: Redis, token: str, ttl: int) -> int:
+    # 살아있는 워커마다 번호 하나를 SET NX EX로 임대한다. 종료하거나 죽으면 TTL 뒤에 다시 쓸 수 있다
+    for worker_id in range(WORKER_COUNT):
+        if await redis.set(WORKER_LEASE_KEY.format(worker_id), token, nx=True, ex=ttl):
+            return worker_id
+    # 번호를 추측하면 다른 워커와 id가 겹칠 수 있으므로 시작하지 않는다
+    raise RuntimeError(f"사용할 수 있는 워커 번호가 없습니다 (최대 {WORKER_COUNT}개)")
+
+
+async def renew_worker_id(
+    redis: Redis, worker_id: int, token: str, ttl: int, interval: float
+) -> None:
+    key = WORKER_LEASE_KEY.format(worker_id)
+    renew = redis.register_script(RENEW_LEASE_SCRIPT)
+    renewed_at = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        started_at = time.monotonic()
+        try:
+            # 키가 만료되어 사라졌으면 같은 번호를 다시 임대한다
+            if await renew(keys=[key], args=[token, ttl]) or await redis.set(
+                key, token, nx=True, ex=ttl
+            ):
+                renewed_at = started_at
+                id_generator.active = True
+                continue
+            # 다른 워커가 이 번호를 가져갔다
+            id_generator.active = False
+            continue
+        except asyncio.CancelledError:
+            raise
+        except:
+            pass
+        # Redis에 연결할 수 없는 동안 임대가 만료되었을 수 있다
+        if time.monotonic() - renewed_at >= ttl:
+            id_generator.active = False
+
+
+@asynccontextmanager
+async def worker_id_lease(redis: Redis, worker_id: int | None = None, ttl: int = 30):
+    # 워커 번호를 지정하면 겹치지 않게 하는 것은 운영자 책임이다
+    if worker_id is not None:
+        id_generator.worker_id = worker_id
+        id_generator.active = True
+        try:
+            yield
+        finally:
+            id_generator.active = False
+        return
+
+    token = uuid.uuid4().hex
+    id_generator.worker_id = await acquire_worker_id(redis, token, ttl)
+    id_generator.active = True
+    task = asyncio.create_task(
+        renew_worker_id(redis, id_generator.worker_id, token, ttl, ttl / 3)
+    )
+    try:
+        yield
+    finally:
+        task.cancel()
+        # 반납한 번호는 다른 워커가 가져갈 수 있다
+        id_generator.active = False
+        try:
+            release = redis.register_script(RELEASE_LEASE_SCRIPT)
+            await release(
+                keys=[WORKER_LEASE_KEY.format(id_generator.worker_id)], args=[token]
+            )
+        except:
+            pass
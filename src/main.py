@@ -11,16 +11,25 @@ from src.apis.like import router as like_router
 from src.apis.notification import router as notification_router
 from src.apis.post import router as post_router
 from src.apis.user import router as user_router
-from src.database import db_init
+from src.cache import cache_invalidation_listener
+from src.config import config
+from src.database import cache_health_checker, db_init, redis
+from src.id_generator import worker_id_lease
 from src.middlewares.rate_limit import BucketRateLimitMiddleware
+from src.middlewares.read_your_writes import ReadYourWritesMiddleware
+from src.rate_limit_policy import rate_limit_policy_listener
 from src.scheduler import scheduler_shutdown
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with db_init(app):
-        async with scheduler_shutdown(app):
-            yield
+    async with worker_id_lease(redis, config.WORKER_ID, config.WORKER_ID_LEASE_SECONDS):
+        async with db_init(app):
+            async with cache_invalidation_listener(app):
+                async with cache_health_checker(app):
+                    async with rate_limit_policy_listener(app):
+                        async with scheduler_shutdown(app):
+                            yield
 
 
 app = FastAPI(lifespan=lifespan)
@@ -33,6 +42,8 @@ app.include_router(router=like_router)
 app.include_router(router=notification_router)
 app.include_router(router=image_router)
 
+app.add_middleware(ReadYourWritesMiddleware)
+
 # 테스트시 처리율 제한 비활성화
 if os.environ.get("TESTING") != "True":
     app.add_middleware(BucketRateLimitMiddleware)
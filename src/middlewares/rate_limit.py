@@ -1,61 +1,349 @@
+import asyncio
+import math
 import time
+from collections import OrderedDict
 
-from fastapi import Request, Response, status
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.config import config
 from src.database import redis
-from src.schemas.common import Bucket
+from src.rate_limit_policy import get_session_user, policy_table
+from src.schemas.rate_limit import RateLimitAlgorithm, RateLimitPolicy, RateLimitScope
 
+# 토큰 버킷 충전과 차감을 Redis 안에서 한 번에 처리한다.
+# 왕복이 한 번이고, 같은 IP의 동시 요청이 같은 토큰을 쓰지 않는다.
+# 시각은 Redis 서버 시각을 사용해 워커마다 시계가 달라도 같은 기준으로 충전한다.
+# KEYS[1] 버킷 키, ARGV[1] 버킷 크기, ARGV[2] 초당 충전량,
+# ARGV[3] 최대로 가져갈 토큰 수, ARGV[4] 최소로 필요한 토큰 수, ARGV[5] 돌려주는 토큰 수
+# 반환 {가져간 토큰 수, 남은 토큰, 다시 시도할 수 있을 때까지 남은 시간(초)}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local minimum = tonumber(ARGV[4])
+local returned = tonumber(ARGV[5]) or 0
 
-# 토큰 버킷 알고리즘
-class BucketRateLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        if not request.client:
-            return JSONResponse(
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "last_refill")
+local tokens = tonumber(bucket[1]) or capacity
+local last_refill = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last_refill) * rate + returned)
+
+local granted = 0
+local retry_after = 0
+if tokens >= minimum then
+    granted = math.min(requested, math.floor(tokens))
+    tokens = tokens - granted
+else
+    retry_after = (minimum - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "last_refill", now)
+-- 가득 찰 때까지 요청이 없으면 새 버킷과 같으므로 만료시킨다
+redis.call("EXPIRE", KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+
+-- Lua 숫자는 정수로 잘려 반환되므로 문자열로 돌려준다
+return {granted, tostring(tokens), tostring(retry_after)}
+"""
+
+# GCRA: 다음 요청이 도착해야 할 이론상 시각(TAT) 하나만 저장한다.
+# 요청마다 TAT를 interval만큼 미루고, TAT가 지금보다 tolerance 이상 앞서면 거절한다
+# KEYS[1] TAT 키, ARGV[1] 요청 간격(초), ARGV[2] 버스트
+# 반환 {허용 여부, 남은 요청 수, 다시 시도할 수 있을 때까지 남은 시간(초)}
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tolerance = interval * burst
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local tat = math.max(tonumber(redis.call("GET", KEYS[1])) or now, now)
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if now < allow_at then
+    return {0, "0", tostring(allow_at - now)}
+end
+
+-- TAT가 지나면 새 클라이언트와 같으므로 만료시킨다
+redis.call("SET", KEYS[1], tostring(new_tat), "PX", math.ceil((new_tat - now) * 1000))
+return {1, tostring(math.floor((tolerance - (new_tat - now)) / interval)), "0"}
+"""
+
+# 슬라이딩 윈도 카운터: 현재 윈도와 직전 윈도의 요청 수만 저장하고
+# 직전 윈도 요청 수를 지난 비율만큼 줄여 더한 값으로 최근 period초의 요청 수를 추정한다
+# KEYS[1] 카운터 키, ARGV[1] 허용 요청 수, ARGV[2] 윈도 크기(초)
+# 반환 {허용 여부, 남은 요청 수, 다시 시도할 수 있을 때까지 남은 시간(초)}
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local window = math.floor(now / period)
+
+local counter = redis.call("HMGET", KEYS[1], "window", "current", "previous")
+local stored = tonumber(counter[1])
+local current = tonumber(counter[2]) or 0
+local previous = tonumber(counter[3]) or 0
+if stored ~= window then
+    if stored == window - 1 then
+        previous = current
+    else
+        previous = 0
+    end
+    current = 0
+end
+
+local elapsed = now / period - window
+local estimate = previous * (1 - elapsed) + current
+local allowed = 0
+local retry_after = 0
+if estimate + 1 <= limit then
+    allowed = 1
+    current = current + 1
+    estimate = estimate + 1
+else
+    -- 윈도가 넘어가거나, 직전 윈도 몫이 줄어 한 건이 들어갈 자리가 생길 때까지
+    retry_after = (1 - elapsed) * period
+    if previous > 0 then
+        retry_after = math.min(retry_after, (estimate + 1 - limit) / previous * period)
+    end
+end
+
+redis.call("HSET", KEYS[1], "window", window, "current", current, "previous", previous)
+redis.call("EXPIRE", KEYS[1], math.ceil(period * 2))
+return {allowed, tostring(math.max(0, limit - estimate)), tostring(retry_after)}
+"""
+
+# EVALSHA로 실행하고, 서버에 스크립트가 없으면(NOSCRIPT) 등록 후 다시 실행한다
+token_bucket = redis.register_script(TOKEN_BUCKET_SCRIPT)
+gcra = redis.register_script(GCRA_SCRIPT)
+sliding_window = redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+async def take_token(
+    bucket_key: str, capacity: float, rate: float, count: int = 1, returned: int = 0
+) -> tuple[int, float, float]:
+    # 쓰지 않은 토큰을 돌려준 뒤, 토큰이 1개 이상 있으면 count개까지 가져간다
+    granted, tokens, retry_after = await token_bucket(
+        keys=[bucket_key], args=[capacity, rate, count, 1, returned]
+    )
+    return int(granted), float(tokens), float(retry_after)
+
+
+class TokenLease:
+    __slots__ = ("tokens", "remaining", "expires_at", "retry_at")
+
+    def __init__(
+        self, tokens: int, remaining: float, expires_at: float, retry_at: float
+    ):
+        self.tokens = tokens
+        # 빌려올 때 Redis 버킷에 남아있던 토큰 수 (응답 헤더용)
+        self.remaining = remaining
+        self.expires_at = expires_at
+        # 거절된 경우 다시 시도할 수 있는 시각
+        self.retry_at = retry_at
+
+    @property
+    def denied(self) -> bool:
+        return self.retry_at > 0
+
+
+# 한 워커가 빌려가는 토큰은 버킷 크기의 1/LEASE_CAPACITY_SHARE까지.
+# 여러 워커로 나뉘어 들어오는 클라이언트의 토큰을 한 워커가 잡아두지 않도록 한다
+LEASE_CAPACITY_SHARE = 4
+
+
+class LocalTokenLeases:
+    """
+    워커 안의 토큰 버킷. Redis 버킷에서 토큰을 lease_size개씩 빌려와 요청마다 하나씩 쓰므로
+    lease_size번에 한 번만 Redis에 간다. lease_seconds가 지나도록 쓰지 않은 토큰은
+    다음에 빌려올 때 돌려주고, 거절된 클라이언트는 다시 시도할 수 있을 때까지 Redis에 묻지 않고 거절한다.
+    같은 키의 동시 요청은 한 번의 Redis 호출을 함께 기다린다.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.leases: OrderedDict[str, TokenLease] = OrderedDict()
+        # 진행 중인 Redis 호출
+        self.refills: dict[str, asyncio.Task] = {}
+
+    def get(self, key: str) -> TokenLease | None:
+        lease = self.leases.get(key)
+        # 만료된 대여는 남은 토큰을 돌려줄 때까지 지우지 않는다
+        if lease is None or lease.expires_at <= time.monotonic():
+            return None
+        self.leases.move_to_end(key)
+        return lease
+
+    def set(self, key: str, lease: TokenLease) -> None:
+        self.leases[key] = lease
+        self.leases.move_to_end(key)
+        while len(self.leases) > self.maxsize:
+            self.leases.popitem(last=False)
+
+    async def _refill(
+        self,
+        bucket_key: str,
+        capacity: float,
+        rate: float,
+        lease_size: int,
+        lease_seconds: float,
+    ) -> None:
+        previous = self.leases.get(bucket_key)
+        returned = previous.tokens if previous is not None else 0
+        granted, remaining, retry_after = await take_token(
+            bucket_key, capacity, rate, count=lease_size, returned=returned
+        )
+        now = time.monotonic()
+        if granted:
+            lease = TokenLease(granted, remaining, now + lease_seconds, 0)
+        else:
+            lease = TokenLease(
+                0,
+                remaining,
+                now + min(retry_after, lease_seconds),
+                now + retry_after,
+            )
+        self.set(bucket_key, lease)
+
+    def _refill_task(self, bucket_key: str, *args) -> asyncio.Task:
+        task = self.refills.get(bucket_key)
+        if task is None:
+            task = asyncio.ensure_future(self._refill(bucket_key, *args))
+            self.refills[bucket_key] = task
+
+            def _done(task: asyncio.Task) -> None:
+                self.refills.pop(bucket_key, None)
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(_done)
+        return task
+
+    async def acquire(
+        self,
+        bucket_key: str,
+        capacity: float,
+        rate: float,
+        lease_size: int,
+        lease_seconds: float,
+    ) -> tuple[bool, float, float]:
+        lease_size = min(lease_size, max(1, int(capacity // LEASE_CAPACITY_SHARE)))
+        while True:
+            lease = self.get(bucket_key)
+            if lease is not None and (lease.tokens >= 1 or lease.denied):
+                break
+            # 요청 하나가 취소돼도 다른 요청이 기다리는 호출은 계속되도록 shield
+            await asyncio.shield(
+                self._refill_task(bucket_key, capacity, rate, lease_size, lease_seconds)
+            )
+
+        if lease.denied:
+            return False, lease.remaining, max(0, lease.retry_at - time.monotonic())
+        lease.tokens -= 1
+        return True, lease.remaining + lease.tokens, 0.0
+
+
+token_leases = LocalTokenLeases(maxsize=config.RATE_LIMIT_LOCAL_BUCKETS)
+
+
+async def check_limit(policy: RateLimitPolicy, key: str) -> tuple[bool, float, float]:
+    # 반환 (허용 여부, 남은 요청 수, 다시 시도할 수 있을 때까지 남은 시간(초))
+    if policy.algorithm == RateLimitAlgorithm.gcra:
+        allowed, remaining, retry_after = await gcra(
+            keys=[key], args=[policy.period / policy.limit, policy.capacity]
+        )
+    elif policy.algorithm == RateLimitAlgorithm.sliding_window:
+        allowed, remaining, retry_after = await sliding_window(
+            keys=[key], args=[policy.limit, policy.period]
+        )
+    else:
+        # 토큰을 미리 빌려둘 수 있는 것은 토큰 버킷뿐이다
+        return await token_leases.acquire(
+            key,
+            policy.capacity,
+            policy.limit / policy.period,
+            config.RATE_LIMIT_LEASE_SIZE,
+            config.RATE_LIMIT_LEASE_SECONDS,
+        )
+    return bool(allowed), float(remaining), float(retry_after)
+
+
+def rate_limit_headers(
+    tokens: float, retry_after: float, limit: float
+) -> dict[str, str]:
+    return {
+        "X-Ratelimit-Remaining": str(int(tokens)),
+        "X-Ratelimit-Limit": str(limit),
+        "X-Ratelimit-Retry-After": str(math.ceil(retry_after)),
+    }
+
+
+# 경로/유저별 정책(src.rate_limit_policy)에 따라 토큰 버킷, GCRA, 슬라이딩 윈도 카운터로 제한한다
+# BaseHTTPMiddleware는 요청마다 태스크와 메모리 스트림으로 응답을 감싸므로
+# ASGI 미들웨어로 구현하고, 헤더는 http.response.start 메시지에 바로 넣는다
+class BucketRateLimitMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # 헬스 체크 등 허용 목록의 경로는 제한하지 않는다
+        if scope["type"] != "http" or scope["path"] in config.RATE_LIMIT_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        if not client:
+            response = JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"detail": "요청에 client 속성이 없습니다."},
             )
-        client_ip = request.client.host
-        current_time = time.time()
-        bucket_key = f"bucket:{client_ip}"
-        bucket_data = await redis.hgetall(bucket_key)
-        if not bucket_data:
-            bucket = Bucket(tokens=config.BUCKET_SIZE, last_refill=current_time)
+            await response(scope, receive, send)
+            return
+        user_id = None
+        if policy_table.needs_user:
+            # DB를 조회하지 않고 get_current_user가 검증해 둔 세션만 유저로 센다
+            user_id = get_session_user(HTTPConnection(scope).cookies.get("session_id"))
+        policy = policy_table.match(scope["path"], scope["method"], user_id)
+        if policy.scope == RateLimitScope.user and user_id is not None:
+            identity = f"user:{user_id}"
         else:
-            bucket = Bucket.model_validate(bucket_data)
-        time_passed = current_time - bucket.last_refill
-
-        # 정수로 계산하기 위해 형변환
-        refill_amount = int(time_passed * (config.REQUESTS_PER_MINUTE / 60))
-        bucket.tokens = min(bucket.tokens + refill_amount, config.BUCKET_SIZE)
-        bucket.last_refill = current_time
+            identity = f"ip:{client[0]}"
+        try:
+            allowed, tokens, retry_after = await check_limit(
+                policy, f"rate_limit:{policy.name}:{identity}"
+            )
+        except:
+            # 처리율 제한 저장소에 연결할 수 없으면 요청을 막지 않는다
+            await self.app(scope, receive, send)
+            return
 
-        retry_after = max(
-            0, int((1 - bucket.tokens) / (config.REQUESTS_PER_MINUTE / 60))
-        )
-        if bucket.tokens < 1:
-            return JSONResponse(
+        headers = rate_limit_headers(tokens, retry_after, policy.capacity)
+        if not allowed:
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 content={
                     "detail": "처리율 제한을 초과하였습니다. 나중에 다시 시도해주세요"
                 },
-                headers={
-                    "X-Ratelimit-Retry-After": str(retry_after),
-                    "X-Ratelimit-Remaining": str(bucket.tokens),
-                    "X-Ratelimit-Limit": str(config.BUCKET_SIZE),
-                },
+                headers=headers,
             )
-        await redis.hset(bucket_key, "tokens", bucket.tokens - 1)
-        await redis.hset(bucket_key, "last_refill", current_time)
-        response: Response = await call_next(request)
+            await response(scope, receive, send)
+            return
 
-        # 처리율 제한 헤더
-        response.headers.append(key="X-Ratelimit-Remaining", value=str(bucket.tokens))
-        response.headers.append(key="X-Ratelimit-Limit", value=str(config.BUCKET_SIZE))
-        response.headers.append(key="X-Ratelimit-Retry-After", value=str(retry_after))
+        async def send_with_headers(message: Message) -> None:
+            # 처리율 제한 헤더
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for key, value in headers.items():
+                    response_headers.append(key, value)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
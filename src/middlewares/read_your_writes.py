@@ -0,0 +1,60 @@
+import math
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import config
+from src.database import RequestState, request_state
+
+STICKY_PRIMARY_COOKIE = "primary_until"
+
+
+def sticky_primary_cookie(primary_until: float) -> str:
+    cookie: SimpleCookie = SimpleCookie()
+    cookie[STICKY_PRIMARY_COOKIE] = str(primary_until)
+    cookie[STICKY_PRIMARY_COOKIE]["max-age"] = math.ceil(config.STICKY_PRIMARY_SECONDS)
+    cookie[STICKY_PRIMARY_COOKIE]["path"] = "/"
+    cookie[STICKY_PRIMARY_COOKIE]["httponly"] = True
+    cookie[STICKY_PRIMARY_COOKIE]["samesite"] = "lax"
+    return cookie.output(header="").strip()
+
+
+# 쓰기 직후의 읽기가 아직 복제되지 않은 리플리카로 가지 않도록 잠시 primary에 고정한다
+# 모든 요청을 거치므로 BaseHTTPMiddleware 대신 ASGI 미들웨어로 구현한다
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current_time = time.time()
+        try:
+            primary_until = float(
+                HTTPConnection(scope).cookies.get(STICKY_PRIMARY_COOKIE, 0)
+            )
+        except ValueError:
+            primary_until = 0
+        # 클라이언트가 보낸 값이므로 발급할 수 있는 최대 시각으로 자른다
+        primary_until = min(primary_until, current_time + config.STICKY_PRIMARY_SECONDS)
+
+        state = RequestState(read_primary=primary_until > current_time)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.wrote:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    sticky_primary_cookie(current_time + config.STICKY_PRIMARY_SECONDS),
+                )
+            await send(message)
+
+        token = request_state.set(state)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            request_state.reset(token)
@@ -0,0 +1,126 @@
+"""
+닉네임 인덱스 백필/복구 도구
+
+인덱스 도입 전에 가입한 유저를 user_nickname 테이블에 채운다. 인덱스가 없거나 다른 유저를
+가리키면 고친다. 실행을 마치면 config.NICKNAME_INDEX_FALLBACK을 끈다.
+
+python -m src.nickname_index
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlmodel import select
+
+from src.database import get_session_factory, shard_router
+from src.domains.user import User
+from src.domains.user_nickname import UserNickname
+from src.servicies.user import get_nickname_key
+from src.shard_router import ShardRouter
+
+
+@dataclass
+class BackfillStats:
+    scanned: int = 0
+    inserted: int = 0
+    repaired: int = 0
+    # 같은 닉네임을 가진 유저가 여러 명인 경우. 먼저 인덱스에 들어간 유저를 남긴다
+    duplicated: int = 0
+
+
+class NicknameIndexBackfill:
+    def __init__(
+        self,
+        session_factory,
+        router: ShardRouter,
+        batch_size: int = 500,
+        pause: float = 0.1,
+    ) -> None:
+        self.session_factory = session_factory
+        self.router = router
+        self.batch_size = batch_size
+        self.pause = pause
+        self.stats = BackfillStats()
+
+    async def run(self) -> BackfillStats:
+        for shard in self.router.shards:
+            await self.backfill_shard(shard)
+        return self.stats
+
+    async def backfill_shard(self, shard: str) -> None:
+        last_id = None
+        while True:
+            orm_query = select(User).order_by(User.id).limit(self.batch_size)  # type: ignore
+            if last_id is not None:
+                orm_query = orm_query.where(User.id > last_id)
+
+            async with self.session_factory(shard) as session:  # type: ignore
+                result = await session.exec(orm_query)
+                users = list(result.all())
+            if not users:
+                return
+
+            last_id = users[-1].id
+            self.stats.scanned += len(users)
+
+            index_users: dict[str, list[User]] = defaultdict(list)
+            for user in users:
+                index_shard = self.router.get_shard(get_nickname_key(user.nickname))
+                index_users[index_shard].append(user)
+
+            for index_shard, shard_users in index_users.items():
+                await self._upsert_index(index_shard, shard_users)
+
+            if len(users) < self.batch_size:
+                return
+            await asyncio.sleep(self.pause)
+
+    async def _upsert_index(self, index_shard: str, users: list[User]) -> None:
+        async with self.session_factory(index_shard) as session:  # type: ignore
+            result = await session.exec(
+                select(UserNickname).where(
+                    UserNickname.nickname.in_([user.nickname for user in users])  # type: ignore
+                )
+            )
+            indexes = {index.nickname: index for index in result.all()}
+
+            for user in users:
+                index = indexes.get(user.nickname)
+                if index is None:
+                    index = UserNickname(nickname=user.nickname, user_id=user.id)  # type: ignore
+                    indexes[user.nickname] = index
+                    session.add(index)
+                    self.stats.inserted += 1
+                elif index.user_id == user.id:
+                    continue
+                elif await self._user_exists(index.user_id):
+                    self.stats.duplicated += 1
+                else:
+                    # 삭제된 유저를 가리키는 인덱스
+                    index.user_id = user.id  # type: ignore
+                    session.add(index)
+                    self.stats.repaired += 1
+            await session.commit()
+
+    async def _user_exists(self, user_id: int) -> bool:
+        async with self.session_factory(user_id) as session:  # type: ignore
+            result = await session.exec(select(User.id).where(User.id == user_id))
+            return result.first() is not None
+
+
+async def main() -> None:
+    session_factory = await get_session_factory()
+    backfill = NicknameIndexBackfill(
+        session_factory=session_factory, router=shard_router
+    )
+    stats = await backfill.run()
+
+    print(
+        f"scanned={stats.scanned} inserted={stats.inserted} "
+        f"repaired={stats.repaired} duplicated={stats.duplicated}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
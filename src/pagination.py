@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+# 마지막으로 본 행의 (created_at, id). 목록은 최신순(created_at, id 내림차순)으로 정렬된다.
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="잘못된 커서입니다"
+        )
+
+
+def after_cursor(model, cursor: Cursor):
+    # 내림차순 정렬에서 커서 다음에 오는 행 조건. (created_at, id) 복합 인덱스를 탄다.
+    created_at, id = cursor
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < id),
+    )
+
+
+def next_cursor(rows: list, limit: int) -> str | None:
+    # 한 페이지가 가득 찼을 때만 다음 페이지가 있다고 본다
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
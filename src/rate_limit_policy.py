@@ -0,0 +1,152 @@
+"""
+처리율 제한 정책
+
+정책은 Redis 해시(rate_limit:policies)에 이름 -> JSON으로 저장하고, 바뀌면 같은 이름의 채널로 알린다.
+워커는 채널을 구독하다가 알림을 받으면 정책 표를 다시 읽으므로
+재시작 없이 모든 워커, 모든 노드에 반영된다. 맞는 정책이 없으면 config의 기본값을 사용한다.
+"""
+
+import asyncio
+import fnmatch
+from contextlib import asynccontextmanager
+from typing import Awaitable, cast
+
+from fastapi import FastAPI
+from pydantic import ValidationError
+from redis.asyncio import Redis
+
+from src.cache import LocalCache
+from src.config import config
+from src.database import redis
+from src.schemas.rate_limit import RateLimitPolicy, RateLimitScope
+
+POLICIES_KEY = "rate_limit:policies"
+POLICY_CHANNEL = "rate_limit:policies"
+DEFAULT_POLICY = "default"
+
+
+def default_policy() -> RateLimitPolicy:
+    return RateLimitPolicy(
+        name=DEFAULT_POLICY,
+        limit=config.REQUESTS_PER_MINUTE,
+        period=60.0,
+        burst=config.BUCKET_SIZE,
+    )
+
+
+def _specificity(policy: RateLimitPolicy) -> tuple:
+    # 유저 지정 > 메서드 지정 > 와일드카드를 뺀 경로가 긴 순서
+    return (
+        policy.user_id is not None,
+        policy.method is not None,
+        len(policy.route.replace("*", "")),
+    )
+
+
+class PolicyTable:
+    def __init__(self) -> None:
+        self.policies: list[RateLimitPolicy] = []
+        # 맞는 정책이 없을 때 쓰는 정책. Redis에 "default"로 저장하면 config 값 대신 사용한다
+        self.default = default_policy()
+        # 유저별 정책이 있을 때만 요청에서 세션을 확인한다
+        self.needs_user = False
+
+    def replace(self, policies: list[RateLimitPolicy]) -> None:
+        self.default = next(
+            (policy for policy in policies if policy.name == DEFAULT_POLICY),
+            default_policy(),
+        )
+        policies = [policy for policy in policies if policy.name != DEFAULT_POLICY]
+        self.policies = sorted(policies, key=_specificity, reverse=True)
+        self.needs_user = any(
+            policy.user_id is not None or policy.scope == RateLimitScope.user
+            for policy in self.policies
+        )
+
+    def match(
+        self, path: str, method: str, user_id: int | None = None
+    ) -> RateLimitPolicy:
+        for policy in self.policies:
+            if policy.user_id is not None and policy.user_id != user_id:
+                continue
+            if policy.method is not None and policy.method.upper() != method:
+                continue
+            if fnmatch.fnmatchcase(path, policy.route):
+                return policy
+        return self.default
+
+
+policy_table = PolicyTable()
+
+# 검증된 세션 -> 유저 id. get_current_user가 세션을 확인할 때 채운다.
+# 미들웨어는 DB를 조회하지 않고 이 값으로 유저를 구분하며, 모르는(위조된) 세션은 IP로 센다
+verified_sessions = LocalCache(
+    maxsize=config.RATE_LIMIT_SESSION_CACHE_SIZE,
+    ttl=config.RATE_LIMIT_SESSION_CACHE_TTL,
+)
+
+
+def remember_session(session_id: str, user_id: int) -> None:
+    verified_sessions.set(session_id, str(user_id))
+
+
+def forget_session(session_id: str) -> None:
+    verified_sessions.delete(session_id)
+
+
+def get_session_user(session_id: str | None) -> int | None:
+    if not session_id:
+        return None
+    user_id = verified_sessions.get(session_id)
+    return int(user_id) if user_id is not None else None
+
+
+async def load_policies(redis: Redis) -> list[RateLimitPolicy]:
+    policies = []
+    # redis-py의 해시 명령은 동기/비동기 겸용 타입이라 비동기 클라이언트의 반환 타입으로 좁힌다
+    stored = await cast(Awaitable[dict[str, str]], redis.hgetall(POLICIES_KEY))
+    for value in stored.values():
+        try:
+            policies.append(RateLimitPolicy.model_validate_json(value))
+        except ValidationError:
+            # 잘못 저장된 정책 하나 때문에 나머지 정책을 버리지 않는다
+            continue
+    return policies
+
+
+async def save_policy(redis: Redis, policy: RateLimitPolicy) -> None:
+    await cast(
+        Awaitable[int], redis.hset(POLICIES_KEY, policy.name, policy.model_dump_json())
+    )
+    await redis.publish(POLICY_CHANNEL, policy.name)
+
+
+async def delete_policy(redis: Redis, name: str) -> bool:
+    if not await cast(Awaitable[int], redis.hdel(POLICIES_KEY, name)):
+        return False
+    await redis.publish(POLICY_CHANNEL, name)
+    return True
+
+
+async def listen_policy_changes(redis: Redis) -> None:
+    while True:
+        try:
+            # 다시 연결할 때마다 이전 구독 커넥션을 닫는다
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(POLICY_CHANNEL)
+                # 구독이 끊긴 동안 바뀐 정책이 있을 수 있으므로 구독할 때마다 다시 읽는다
+                policy_table.replace(await load_policies(redis))
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        policy_table.replace(await load_policies(redis))
+        except asyncio.CancelledError:
+            raise
+        except:
+            await asyncio.sleep(1)
+
+
+@asynccontextmanager
+async def rate_limit_policy_listener(app: FastAPI):
+    task = asyncio.create_task(listen_policy_changes(redis))
+    yield
+    task.cancel()
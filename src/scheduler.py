@@ -1,13 +1,16 @@
 from contextlib import asynccontextmanager
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from fastapi import Depends, FastAPI
+from fastapi import FastAPI
 
+from src.database import get_session_factory
 from src.servicies.image import ImageService
 
 
-async def scheduled_image_cleanup(image_service=Depends(ImageService)):
-    image_service = ImageService()
+async def scheduled_image_cleanup():
+    # 요청 밖에서 실행되므로 Depends 없이 직접 세션 팩토리를 주입
+    session_factory = await get_session_factory()
+    image_service = ImageService(session_factory=session_factory)  # type: ignore
     await image_service.remove_old_pending_images()
 
 
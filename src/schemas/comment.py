@@ -29,6 +29,8 @@ class CommentResponse(BaseModel):
 
 class CommentsResponse(BaseModel):
     comments: List[CommentResponse]
+    # 다음 페이지 커서. 마지막 페이지면 None
+    next_cursor: str | None = None
 
 
 class EditComment(BaseModel):
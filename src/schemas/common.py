@@ -7,9 +7,25 @@ class Link(BaseModel):
     method: str
 
 
-class Bucket(BaseModel):
-    tokens: float
-    last_refill: float
+class DbPoolStats(BaseModel):
+    name: str
+    size: int = 0
+    checked_out: int = 0
+    checked_in: int = 0
+    overflow: int = 0
+    max_overflow: int = 0
+    checkout_count: int = 0
+    wait_count: int = 0
+    wait_seconds_avg: float = 0.0
+    wait_seconds_max: float = 0.0
+    timeouts: int = 0
+
+
+class CacheStats(BaseModel):
+    tier: str
+    hits: int
+    misses: int
+    hit_rate: float
 
 
 class EditRateLimitRequest(BaseModel):
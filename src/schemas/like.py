@@ -27,3 +27,5 @@ class LikeUserResponse(BaseModel):
 
 class GetLikeUsersResponse(BaseModel):
     users: List[LikeUserResponse]
+    # 다음 페이지 커서. 마지막 페이지면 None
+    next_cursor: str | None = None
@@ -12,3 +12,5 @@ class NotificationResponseBody(BaseModel):
 
 class GetNotificationsResponse(BaseModel):
     notifications: list[NotificationResponseBody]
+    # 다음 페이지 커서. 마지막 페이지면 None
+    next_cursor: str | None = None
@@ -50,6 +50,10 @@ class PostsResponseBody(BaseModel):
 
 class PostsResponse(BaseModel):
     posts: List[PostsResponseBody]
+    # 일부 샤드가 응답하지 않아 결과가 빠졌을 수 있음
+    partial: bool = False
+    # 다음 페이지 커서. 마지막 페이지면 None
+    next_cursor: str | None = None
     # hateos
     links: list[Link]
 
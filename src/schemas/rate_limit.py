@@ -0,0 +1,36 @@
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class RateLimitAlgorithm(str, Enum):
+    token_bucket = "token_bucket"
+    gcra = "gcra"
+    sliding_window = "sliding_window"
+
+
+class RateLimitScope(str, Enum):
+    # 클라이언트 IP별 / 로그인한 유저별로 센다 (로그인 전이면 IP)
+    ip = "ip"
+    user = "user"
+
+
+class RateLimitPolicy(BaseModel):
+    name: str
+    # 경로 패턴 (fnmatch). 예) "/posts/*"
+    route: str = "*"
+    # None이면 모든 메서드
+    method: str | None = None
+    # 지정하면 해당 유저에게만 적용
+    user_id: int | None = None
+    scope: RateLimitScope = RateLimitScope.ip
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.token_bucket
+    # period초 동안 허용하는 요청 수
+    limit: int = Field(gt=0)
+    period: float = Field(default=60.0, gt=0)
+    # 한 번에 몰려도 허용하는 요청 수 (토큰 버킷 크기, GCRA 버스트). None이면 limit
+    burst: float | None = Field(default=None, gt=0)
+
+    @property
+    def capacity(self) -> float:
+        return self.burst or self.limit
@@ -1,15 +1,33 @@
 import hashlib
+import math
 from datetime import datetime, timedelta, timezone
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.database import get_session_factory
+from src.database import get_session_factory, read_first, redis
 from src.domains.login_session import LoginSession
 from src.schemas.auth import SessionContent
 
 
+def get_sharding_key(session_id: str) -> int:
+    return int(hashlib.md5(session_id.encode()).hexdigest(), 16)
+
+
+# 로그아웃한 세션 자리에 만료 시각까지 남겨 두는 값.
+# 로그아웃과 겹친 요청이 DB에서 읽은 세션을 다시 캐시하지 못하게 한다
+REVOKED_SESSION = "revoked"
+
+
+def session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def seconds_until(expire: datetime) -> int:
+    return math.ceil((expire - datetime.now(tz=timezone.utc)).total_seconds())
+
+
 class AuthService:
     def __init__(
         self, session_factory: AsyncSession = Depends(get_session_factory)
@@ -20,17 +38,43 @@ class AuthService:
         if not session_id:
             return None
 
-        sharding_key = int(hashlib.md5(session_id.encode()).hexdigest(), 16)
-        async with self.session_factory(sharding_key) as session:  # type: ignore
-            result = await session.exec(
-                select(LoginSession).where(LoginSession.id == session_id)
-            )
+        result_data: LoginSession | None = await read_first(
+            self.session_factory,
+            get_sharding_key(session_id),
+            select(LoginSession).where(LoginSession.id == session_id),
+        )
+        if not result_data:
+            return None
+
+        return result_data
 
-            result_data: LoginSession | None = result.first()
-            if not result_data:
-                return None
+    async def get_cached_session(self, session_id: str) -> SessionContent | None:
+        # 캐시 노드가 내려가거나 링이 바뀌어도 로그아웃 표시가 사라지지 않도록 캐시 링 대신 Redis에 둔다.
+        # 세션은 만료 시각에 TTL로 사라지므로 있으면 유효한 세션이다
+        try:
+            value = await redis.get(session_key(session_id))
+        except:
+            return None
+        if value is None:
+            return None
+        if value == REVOKED_SESSION:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="존재하지 않는 세션입니다. 다시 로그인 해 주세요",
+            )
+        return SessionContent.model_validate_json(value)
 
-            return result_data
+    async def cache_session(self, session_id: str, content: SessionContent) -> None:
+        ttl = seconds_until(content.expire)  # type: ignore
+        if ttl <= 0:
+            return
+        try:
+            # 이미 있는 값(로그아웃 표시 포함)은 덮어쓰지 않는다
+            await redis.set(
+                session_key(session_id), content.model_dump_json(), ex=ttl, nx=True
+            )
+        except:
+            pass
 
     async def insert_session(
         self, session_id: str, content: SessionContent, expires_delta: timedelta
@@ -41,15 +85,21 @@ class AuthService:
         new_login_session = LoginSession(
             id=session_id, session_data=content.model_dump_json()
         )
-        sharding_key = int(hashlib.md5(session_id.encode()).hexdigest(), 16)
+        sharding_key = get_sharding_key(session_id)
         async with self.session_factory(sharding_key) as session:  # type: ignore
             session.add(new_login_session)
             await session.commit()
+        await self.cache_session(session_id, content)
 
         return session_id
 
     async def delete_session(self, login_session: LoginSession) -> None:
-        sharding_key = int(hashlib.md5(login_session.id.encode()).hexdigest(), 16)  # type: ignore
+        # 로그아웃 표시를 먼저 남긴다. 실패하면 세션을 지우지 않고 로그아웃도 실패한다
+        content = SessionContent.model_validate_json(login_session.session_data)
+        ttl = seconds_until(content.expire)  # type: ignore
+        if ttl > 0:
+            await redis.set(session_key(login_session.id), REVOKED_SESSION, ex=ttl)  # type: ignore
+        sharding_key = get_sharding_key(login_session.id)  # type: ignore
         async with self.session_factory(sharding_key) as session:  # type: ignore
             await session.delete(login_session)
             await session.commit()
@@ -1,13 +1,20 @@
-import hashlib
-from datetime import datetime
-
 from fastapi import Depends
+from sqlalchemy import delete, update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from ulid import ULID
 
-from src.database import get_session_factory
+from src.database import (
+    Descending,
+    get_row_shards,
+    get_session_factory,
+    merge_sorted_shards,
+    read_by_id,
+    read_list,
+)
 from src.domains.comment import Comment
+from src.id_generator import id_generator
+from src.pagination import Cursor, after_cursor
+from src.shard_router import ShardRouter
 
 
 class CommentService:
@@ -18,8 +25,8 @@ class CommentService:
         self.session_factory = session_factory
 
     async def create_comment(self, user_id: int, post_id: int, content: str) -> Comment:
-        new_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_id.encode()).hexdigest(), 16) % (2**30)
+        # 포스트와 같은 슬롯의 id를 발급해 포스트가 있는 샤드에 저장한다
+        sharding_key = id_generator.next_id(slot=ShardRouter.get_slot(post_id))
         new_comment = Comment(
             id=sharding_key, author_id=user_id, post_id=post_id, content=content
         )
@@ -31,38 +38,87 @@ class CommentService:
             return new_comment
 
     async def get_comments(
-        self, page: int, post_id: int | None = None, user_id: int | None = None
+        self,
+        page: int = 1,
+        post_id: int | None = None,
+        user_id: int | None = None,
+        after: Cursor | None = None,
     ) -> list[Comment]:
-        offset = (page - 1) * self.items_per_page
-        results: list[Comment] = []
         orm_query = select(Comment)
-        # TODO 이거 문제. 여러개 걸침.
         if post_id:
             orm_query = orm_query.where(Comment.post_id == post_id)
         if user_id:
             orm_query = orm_query.where(Comment.author_id == user_id)
-        orm_query = orm_query.offset(offset).limit(self.items_per_page)
-        async with self.session_factory(post_id) as session:  # type: ignore
-            result = await session.exec(orm_query)
-            comments = result.all()
+        orm_query = orm_query.order_by(
+            Comment.created_at.desc(), Comment.id.desc()  # type: ignore
+        )
+        offset = 0 if after else (page - 1) * self.items_per_page
+
+        # 포스트의 코멘트는 포스트 샤드에 모여 있으므로 한 샤드만 조회
+        if post_id:
+            # 커서가 있으면 커서 다음부터, 없으면 page로 건너뛴다 (느린 레거시 방식)
+            if after:
+                orm_query = orm_query.where(after_cursor(Comment, after))
+            # 재배치 중에는 옮기고 있는 이전 샤드의 코멘트도 함께 읽는다
+            comments: list[Comment] = await read_list(
+                self.session_factory,
+                post_id,
+                orm_query,
+                sort_key=lambda comment: (comment.created_at, comment.id),
+                limit=self.items_per_page,
+                offset=offset,
+                read_only=True,
+            )
+            return comments
+
+        # 유저별, 전체 코멘트는 여러 샤드에 걸쳐 있으므로 샤드별 결과를 병합한다
+        async def _get_shard_comments(
+            session: AsyncSession, last_comment: Comment | None, batch_size: int
+        ) -> list[Comment]:
+            shard_query = orm_query
+            position = (
+                (last_comment.created_at, last_comment.id) if last_comment else after
+            )
+            if position:
+                shard_query = shard_query.where(after_cursor(Comment, position))  # type: ignore
+            result = await session.exec(shard_query.limit(batch_size))
+            return list(result.all())
 
-            return list(comments)
+        merged = await merge_sorted_shards(
+            self.session_factory,
+            _get_shard_comments,
+            sort_key=lambda comment: Descending((comment.created_at, comment.id)),
+            limit=self.items_per_page,
+            skip=offset,
+            read_only=True,
+        )
+
+        return [comment for _, comment in merged]
 
     async def get_comment(self, comment_id: int) -> Comment | None:
-        async with self.session_factory(comment_id) as session:  # type: ignore
-            result = await session.exec(select(Comment).where(Comment.id == comment_id))
-            comment: Comment | None = result.first()
+        comment: Comment | None = await read_by_id(
+            self.session_factory,
+            comment_id,
+            select(Comment).where(Comment.id == comment_id),
+        )
 
-            return comment
+        return comment
 
     async def edit_comment(self, comment: Comment, content: str | None = None) -> None:
         if content:
             comment.content = content
-        async with self.session_factory(comment.id) as session:  # type: ignore
-            session.add(comment)
-            await session.commit()
+        # 이전 id 체계의 코멘트는 자기 id의 샤드나 포스트 샤드에 있으므로 후보 샤드 모두에 반영한다
+        for shard in get_row_shards(comment.post_id, comment.id):  # type: ignore
+            async with self.session_factory(shard) as session:  # type: ignore
+                await session.exec(  # type: ignore
+                    update(Comment)
+                    .where(Comment.id == comment.id)  # type: ignore
+                    .values(content=comment.content)
+                )
+                await session.commit()
 
     async def delete_comment(self, comment: Comment) -> None:
-        async with self.session_factory(comment.id) as session:  # type: ignore
-            await session.delete(comment)
-            await session.commit()
+        for shard in get_row_shards(comment.post_id, comment.id):  # type: ignore
+            async with self.session_factory(shard) as session:  # type: ignore
+                await session.exec(delete(Comment).where(Comment.id == comment.id))  # type: ignore
+                await session.commit()
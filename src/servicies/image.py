@@ -1,5 +1,4 @@
 import asyncio
-import hashlib
 import os
 from datetime import datetime, timedelta, timezone
 
@@ -8,19 +7,19 @@ from google.cloud import storage
 from sqlalchemy import update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from ulid import ULID
 
 from src.config import config
-from src.database import DATABASE_URLS, get_session_factory
+from src.database import get_session_factory, scatter_gather
 from src.domains.image import Image, SaveType, State, UseType
 from src.gcp_client import gcp_client
+from src.id_generator import id_generator
 
 
 class ImageService:
     def __init__(
         self, session_factory: AsyncSession = Depends(get_session_factory)
     ) -> None:
-        session_factory = session_factory
+        self.session_factory = session_factory
 
     async def save_profile_img(
         self,
@@ -29,8 +28,7 @@ class ImageService:
         save_type: SaveType,
         user_id: int | None = None,
     ) -> Image:
-        new_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_id.encode()).hexdigest(), 16) % (2**30)
+        sharding_key = id_generator.next_id()
         async with self.session_factory(sharding_key) as session:  # type: ignore
             prev_image_result = await session.exec(
                 select(Image).where(
@@ -119,13 +117,23 @@ class ImageService:
 
     async def remove_old_pending_images(self) -> None:
         one_day_ago = datetime.now(timezone.utc) - timedelta(days=1)
-        for i in range(len(DATABASE_URLS)):
-            async with self.session_factory(i) as session:  # type: ignore
-                result = await session.exec(
-                    select(Image).where(
-                        Image.state == State.PENDING, Image.created_at < one_day_ago
-                    )
+
+        async def _remove_shard_images(session: AsyncSession) -> list[Image]:
+            result = await session.exec(
+                select(Image).where(
+                    Image.state == State.PENDING, Image.created_at < one_day_ago
                 )
-                old_pending_images = result.all()
-                for image in old_pending_images:
-                    await session.delete(image)
+            )
+            old_pending_images = list(result.all())
+            for image in old_pending_images:
+                await session.delete(image)
+            await session.commit()
+
+            return old_pending_images
+
+        # 응답하지 않은 샤드는 다음 스케줄에 정리된다
+        await scatter_gather(
+            self.session_factory,
+            _remove_shard_images,
+            timeout=config.SHARD_MAINTENANCE_TIMEOUT,
+        )
@@ -1,18 +1,30 @@
-import hashlib
 from abc import ABCMeta, abstractmethod
-from datetime import datetime
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from ulid import ULID
 
-from src.database import get_session_factory
+from src.database import (
+    Descending,
+    get_row_shards,
+    get_session_factory,
+    merge_sorted_shards,
+    read_by_id,
+    read_first,
+    read_list,
+)
 from src.domains.like import Like
-from src.domains.user import User
+from src.id_generator import id_generator
+from src.pagination import Cursor, after_cursor
+from src.servicies.user import get_users_by_id
+from src.shard_router import ShardRouter
 
 
 class LikeServiceBase(metaclass=ABCMeta):
+    items_per_page: int
+
     @abstractmethod
     async def create_like(self, user_id: int, post_id: int) -> Like:
         pass
@@ -28,7 +40,9 @@ class LikeServiceBase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def get_liked_users(self, post_id: int | None = None) -> list[User]:
+    async def get_likes(
+        self, post_id: int | None = None, after: Cursor | None = None
+    ) -> list[Like]:
         pass
 
     @abstractmethod
@@ -40,55 +54,102 @@ class LikeService(LikeServiceBase):
     def __init__(
         self, session_factory: AsyncSession = Depends(get_session_factory)
     ) -> None:
+        self.items_per_page = 20
         self.session_factory = session_factory
 
     async def create_like(self, user_id: int, post_id: int) -> Like:
-        new_post_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_post_id.encode()).hexdigest(), 16) % (2**30)
+        # 포스트와 같은 슬롯의 id를 발급해 포스트가 있는 샤드에 저장한다
+        sharding_key = id_generator.next_id(slot=ShardRouter.get_slot(post_id))
         async with self.session_factory(sharding_key) as session:  # type: ignore
             new_like = Like(id=sharding_key, user_id=user_id, post_id=post_id)
             session.add(new_like)
-            await session.commit()
+            try:
+                await session.commit()
+            except IntegrityError:
+                # 같은 유저가 동시에 같은 포스트에 좋아요한 경우
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="이미 좋아요 한 포스트입니다",
+                )
             await session.refresh(new_like)
             return new_like
 
     async def get_like_by_user_and_post(
         self, user_id: int, post_id: int
     ) -> Like | None:
-        new_post_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_post_id.encode()).hexdigest(), 16) % (2**30)
-        async with self.session_factory(sharding_key) as session:  # type: ignore
-            result = await session.exec(
-                select(Like).where(Like.user_id == user_id, Like.post_id == post_id)
-            )
-            like = result.first()
+        # 재배치 중에는 이전 샤드의 좋아요도 확인해 중복 좋아요를 막는다
+        like = await read_first(
+            self.session_factory,
+            post_id,
+            select(Like).where(Like.user_id == user_id, Like.post_id == post_id),
+        )
 
-            return like  # type: ignore
+        return like  # type: ignore
 
     async def get_like(self, like_id: int) -> Like | None:
-        async with self.session_factory(like_id) as session:  # type: ignore
-
-            orm_query = select(Like).where(Like.id == like_id)
-            result = await session.exec(orm_query)
-            like = result.first()
-
-            return like  # type: ignore
-
-    async def get_liked_users(self, post_id: int | None = None) -> list[User]:
-        new_post_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_post_id.encode()).hexdigest(), 16) % (2**30)
-        async with self.session_factory(sharding_key) as session:  # type: ignore
+        orm_query = select(Like).where(Like.id == like_id)
+        like = await read_by_id(self.session_factory, like_id, orm_query)
+
+        return like  # type: ignore
+
+    async def get_likes(
+        self, post_id: int | None = None, after: Cursor | None = None
+    ) -> list[Like]:
+        # 좋아요한 순서(최신순)
+        orm_query = select(Like).order_by(
+            Like.created_at.desc(), Like.id.desc()  # type: ignore
+        )
+
+        # 포스트의 좋아요는 포스트 샤드에 모여 있으므로 한 샤드만 조회
+        if post_id:
+            orm_query = orm_query.where(Like.post_id == post_id)
+            if after:
+                orm_query = orm_query.where(after_cursor(Like, after))
+            # 재배치 중에는 옮기고 있는 이전 샤드의 좋아요도 함께 읽는다
+            likes: list[Like] = await read_list(
+                self.session_factory,
+                post_id,
+                orm_query,
+                sort_key=lambda like: (like.created_at, like.id),
+                limit=self.items_per_page,
+                read_only=True,
+            )
+        else:
+
+            async def _get_shard_likes(
+                session: AsyncSession, last_like: Like | None, batch_size: int
+            ) -> list[Like]:
+                shard_query = orm_query
+                position = after
+                if last_like and last_like.id is not None:
+                    position = (last_like.created_at, last_like.id)
+                if position:
+                    shard_query = shard_query.where(after_cursor(Like, position))
+                result = await session.exec(shard_query.limit(batch_size))
+                return list(result.all())
+
+            merged = await merge_sorted_shards(
+                self.session_factory,
+                _get_shard_likes,
+                sort_key=lambda like: Descending((like.created_at, like.id)),
+                limit=self.items_per_page,
+                read_only=True,
+            )
+            likes = [like for _, like in merged]
 
-            orm_query = select(User).join(Like)
-            if post_id:
-                orm_query = orm_query.where(Like.post_id == post_id)
-            result = await session.exec(orm_query)
-            like_users = result.all()
+        # 유저는 유저 샤드에 있으므로 샤드별로 따로 불러와 붙인다
+        users = await get_users_by_id(
+            self.session_factory, {like.user_id for like in likes}
+        )
+        # 재배치 중 이전 샤드에서도 찾지 못했거나 탈퇴한 유저는 None. 페이지 커서는 그대로 이어진다
+        for like in likes:
+            like.user = users.get(like.user_id)  # type: ignore
 
-            return list(like_users)
+        return likes
 
     async def delete_like(self, like: Like) -> None:
-        async with self.session_factory(like.id) as session:  # type: ignore
-
-            await session.delete(like)
-            await session.commit()
+        # 이전 id 체계의 좋아요는 자기 id의 샤드나 포스트 샤드에 있으므로 후보 샤드 모두에서 지운다
+        for shard in get_row_shards(like.post_id, like.id):  # type: ignore
+            async with self.session_factory(shard) as session:  # type: ignore
+                await session.exec(delete(Like).where(Like.id == like.id))  # type: ignore
+                await session.commit()
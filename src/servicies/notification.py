@@ -6,9 +6,12 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.database import get_session_factory
 from src.domains.notification import Notification
+from src.pagination import Cursor, after_cursor
 
 
 class NotificationServiceBase(metaclass=ABCMeta):
+    items_per_page: int
+
     @abstractmethod
     async def create_notification(
         self, user_id: int, actor_user_id: int, post_id: int
@@ -16,7 +19,9 @@ class NotificationServiceBase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def get_notifications_by_user_id(self, user_id: int) -> list[Notification]:
+    async def get_notifications_by_user_id(
+        self, user_id: int, after: Cursor | None = None
+    ) -> list[Notification]:
         pass
 
 
@@ -24,6 +29,7 @@ class NotificationService(NotificationServiceBase):
     def __init__(
         self, session_factory: AsyncSession = Depends(get_session_factory)
     ) -> None:
+        self.items_per_page = 20
         self.session_factory = session_factory
 
     async def create_notification(
@@ -39,11 +45,17 @@ class NotificationService(NotificationServiceBase):
 
             return new_notification
 
-    async def get_notifications_by_user_id(self, user_id: int) -> list[Notification]:
-        async with self.session_factory(user_id) as session:  # type: ignore
-            result = await session.exec(
-                select(Notification).where(Notification.target_user_id == user_id)
-            )
+    async def get_notifications_by_user_id(
+        self, user_id: int, after: Cursor | None = None
+    ) -> list[Notification]:
+        orm_query = select(Notification).where(Notification.target_user_id == user_id)
+        if after:
+            orm_query = orm_query.where(after_cursor(Notification, after))
+        orm_query = orm_query.order_by(
+            Notification.created_at.desc(), Notification.id.desc()  # type: ignore
+        ).limit(self.items_per_page)
+        async with self.session_factory(user_id, read_only=True) as session:  # type: ignore
+            result = await session.exec(orm_query)
             notifications = result.all()
 
             return list(notifications)
@@ -1,16 +1,23 @@
-import hashlib
-from datetime import datetime
+import asyncio
 
 from fastapi import Depends
 from sqlalchemy import update
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from ulid import ULID
 
-from src.database import DATABASE_URLS, get_session_factory
+from src.database import (
+    Descending,
+    ShardRows,
+    get_session_factory,
+    merge_sorted_shards,
+    read_first,
+)
 from src.domains.post import Post
 from src.domains.post_view import PostView
+from src.id_generator import id_generator
+from src.pagination import Cursor, after_cursor
+from src.servicies.user import get_users_by_id
 
 
 class PostService:
@@ -21,9 +28,7 @@ class PostService:
         self.session_factory = session_factory
 
     async def create_post(self, user_id: int, title: str, content: str) -> Post:
-        # TODO 안맞음. str인데 포스트 아이디. 통일?
-        new_post_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_post_id.encode()).hexdigest(), 16) % (2**30)
+        sharding_key = id_generator.next_id()
         new_post = Post(
             id=sharding_key,
             author_id=user_id,
@@ -42,26 +47,62 @@ class PostService:
 
             return new_post
 
-    async def get_posts(self, page: int) -> list[Post]:
-        offset = (page - 1) * self.items_per_page
-        results: list[Post] = []
-        for i in range(len(DATABASE_URLS)):
-            async with self.session_factory(i) as session:  # type: ignore
+    async def get_posts(self, page: int = 1, after: Cursor | None = None) -> ShardRows:
+        # 커서가 있으면 커서 다음부터 읽고, 없으면 page로 건너뛴다 (느린 레거시 방식)
+        offset = 0 if after else (page - 1) * self.items_per_page
+
+        # 최신순(created_at, id 내림차순). 샤드마다 이전 배치의 마지막 행 다음부터 읽는다
+        async def _get_shard_posts(
+            session: AsyncSession, last_post: Post | None, batch_size: int
+        ) -> list[Post]:
+            orm_query = select(Post)
+            position = (last_post.created_at, last_post.id) if last_post else after
+            if position:
+                orm_query = orm_query.where(after_cursor(Post, position))  # type: ignore
+            result = await session.exec(
+                orm_query.order_by(
+                    Post.created_at.desc(), Post.id.desc()  # type: ignore
+                ).limit(batch_size)
+            )
+            return list(result.all())
+
+        merged = await merge_sorted_shards(
+            self.session_factory,
+            _get_shard_posts,
+            sort_key=lambda post: Descending((post.created_at, post.id)),
+            limit=self.items_per_page,
+            skip=offset,
+            read_only=True,
+        )
+
+        # 병합 결과로 뽑힌 페이지의 포스트만 연관 데이터를 불러온다
+        shard_post_ids: dict[str, list[int]] = {}
+        for shard, post in merged:
+            shard_post_ids.setdefault(shard, []).append(post.id)  # type: ignore
+
+        async def _load_posts(shard: str, post_ids: list[int]) -> list[Post]:
+            async with self.session_factory(shard, read_only=True) as session:  # type: ignore
                 result = await session.exec(
                     select(Post)
                     .options(
                         selectinload(Post.comments),  # type: ignore
-                        selectinload(Post.user),  # type: ignore
                         selectinload(Post.likes),  # type: ignore
                         selectinload(Post.post_view),  # type: ignore
                     )
-                    .offset(offset)
-                    .limit(self.items_per_page)
+                    .where(Post.id.in_(post_ids))  # type: ignore
                 )
-                posts = result.all()
-                results.extend(posts)
+                return list(result.all())
 
-        return results
+        loaded = await asyncio.gather(
+            *(_load_posts(shard, ids) for shard, ids in shard_post_ids.items())
+        )
+        posts_by_id = {post.id: post for posts in loaded for post in posts}
+        await self._attach_authors(list(posts_by_id.values()))
+
+        return ShardRows(
+            rows=[posts_by_id[post.id] for _, post in merged if post.id in posts_by_id],
+            timed_out_shards=merged.timed_out_shards,
+        )
 
     async def increase_post_view(self, post_id: int) -> None:
         async with self.session_factory(post_id) as session:  # type: ignore
@@ -78,19 +119,26 @@ class PostService:
             await session.commit()
 
     async def get_post(self, post_id: int) -> Post | None:
-        async with self.session_factory(post_id) as session:  # type: ignore
-            result = await session.exec(
-                select(Post)
-                .options(  # type: ignore
-                    selectinload(Post.user),  # type: ignore
-                )
-                .where(Post.id == post_id)
-            )
-            post = result.first()
-            if not post:
-                return None
+        post = await read_first(
+            self.session_factory,
+            post_id,
+            select(Post).where(Post.id == post_id),
+            read_only=True,
+        )
+        if not post:
+            return None
 
-            return post  # type: ignore
+        await self._attach_authors([post])
+        return post  # type: ignore
+
+    async def _attach_authors(self, posts: list[Post]) -> None:
+        # 작성자는 유저 샤드에 있으므로 같은 샤드 조인 대신 유저 샤드에서 불러와 붙인다.
+        # 찾지 못한(탈퇴 등) 작성자는 None
+        users = await get_users_by_id(
+            self.session_factory, {post.author_id for post in posts}
+        )
+        for post in posts:
+            post.user = users.get(post.author_id)  # type: ignore
 
     async def edit_post(
         self, post: Post, title: str | None = None, content: str | None = None
@@ -1,17 +1,65 @@
+import asyncio
 import hashlib
-from datetime import datetime
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from ulid import ULID
 
 from src.auth import hash_password
-from src.database import DATABASE_URLS, get_session_factory
+from src.config import config
+from src.database import (
+    get_session_factory,
+    get_shard,
+    read_first,
+    scatter_gather,
+    shard_router,
+)
 from src.domains.image import Image, State, UseType
 from src.domains.user import User
+from src.domains.user_nickname import UserNickname
+from src.id_generator import id_generator
+from src.shard_router import ShardRouter
+
+
+def get_nickname_key(nickname: str) -> int:
+    return int(hashlib.md5(nickname.encode()).hexdigest(), 16)
+
+
+async def _get_shard_users(
+    session_factory, user_shards: dict[int, str]
+) -> dict[int, User]:
+    shard_user_ids: dict[str, list[int]] = {}
+    for user_id, shard in user_shards.items():
+        shard_user_ids.setdefault(shard, []).append(user_id)
+
+    async def _get_users(shard: str, ids: list[int]) -> list[User]:
+        async with session_factory(shard, read_only=True) as session:
+            result = await session.exec(select(User).where(User.id.in_(ids)))  # type: ignore
+            return list(result.all())
+
+    results = await asyncio.gather(
+        *(_get_users(shard, ids) for shard, ids in shard_user_ids.items())
+    )
+    return {user.id: user for users in results for user in users}  # type: ignore
+
+
+async def get_users_by_id(session_factory, user_ids: set[int]) -> dict[int, User]:
+    # 작성자, 좋아요한 유저 등은 유저 샤드에 있으므로 샤드별로 따로 불러온다
+    users = await _get_shard_users(
+        session_factory, {user_id: get_shard(user_id) for user_id in user_ids}
+    )
+    # 재배치 중이면 아직 옮겨지지 않은 유저를 이전 샤드에서 찾는다
+    previous_shards = {
+        user_id: previous_shard
+        for user_id in user_ids - users.keys()
+        if (previous_shard := shard_router.get_previous_shard(user_id))
+    }
+    if previous_shards:
+        users.update(await _get_shard_users(session_factory, previous_shards))
+    return users
 
 
 class UserService:
@@ -24,12 +72,21 @@ class UserService:
         self, nickname: str, password: str, img_id: int | None = None
     ) -> User:
         hashed_password = hash_password(plain_password=password)
-        new_id = str(ULID.from_datetime(datetime.now()))
-        sharding_key = int(hashlib.md5(new_id.encode()).hexdigest(), 16) % (2**30)
+        # 닉네임 인덱스와 같은 슬롯의 id를 발급해 유저와 인덱스를 한 샤드, 한 트랜잭션에 쓴다
+        nickname_slot = ShardRouter.get_slot(get_nickname_key(nickname))
+        sharding_key = id_generator.next_id(slot=nickname_slot)
         new_user = User(id=sharding_key, nickname=nickname, password=hashed_password)
         async with self.session_factory(sharding_key) as session:  # type: ignore
             session.add(new_user)
-            await session.commit()
+            session.add(UserNickname(nickname=nickname, user_id=sharding_key))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # 동시에 같은 닉네임으로 가입한 경우
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="이미 가입한 유저입니다",
+                )
             await session.refresh(new_user)
 
             # image ACTIVE 처리
@@ -44,30 +101,76 @@ class UserService:
             return new_user
 
     async def get_user_by_nickname(self, nickname: str) -> User | None:
-        for i in range(len(DATABASE_URLS)):
-            async with self.session_factory(i) as session:  # type: ignore
-                result = await session.exec(
-                    select(User).where(User.nickname == nickname)
-                )
-                user = result.first()
-                if user:
-                    return user  # type: ignore
+        # 닉네임 인덱스가 있는 샤드 하나만 조회한다. 인덱스 이후 가입한 유저는 같은 샤드에 있다
+        row = await read_first(
+            self.session_factory,
+            get_nickname_key(nickname),
+            select(UserNickname, User)
+            .outerjoin(User, UserNickname.user_id == User.id)  # type: ignore
+            .where(UserNickname.nickname == nickname),
+        )
+        if row:
+            index, user = row
+            if user:
+                return user  # type: ignore
+            # 인덱스 도입 전에 가입한 유저는 다른 샤드에 있다
+            return await read_first(  # type: ignore
+                self.session_factory,
+                index.user_id,
+                select(User).where(User.id == index.user_id),
+            )
+
+        if not config.NICKNAME_INDEX_FALLBACK:
+            return None
+
+        # 백필 전에는 인덱스에 없는 유저가 있을 수 있으므로 전체 샤드에서 찾고 인덱스를 채운다
+        user = await self._find_user_by_nickname(nickname)
+        if user:
+            await self._repair_nickname_index(user)
+        return user  # type: ignore
+
+    async def _find_user_by_nickname(self, nickname: str) -> User | None:
+        async def _get_shard_user(session: AsyncSession) -> list[User]:
+            result = await session.exec(
+                select(User).where(User.nickname == nickname).limit(1)
+            )
+            return list(result.all())
+
+        users = await scatter_gather(self.session_factory, _get_shard_user)
+        if users:
+            return users[0]  # type: ignore
+
+        # 응답하지 않은 샤드에 유저가 있을 수 있으므로 없다고 단정하지 않는다
+        if users.partial:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="일부 데이터베이스가 응답하지 않습니다. 잠시 후 다시 시도해주세요",
+            )
 
         return None
 
+    async def _repair_nickname_index(self, user: User) -> None:
+        async with self.session_factory(get_nickname_key(user.nickname)) as session:  # type: ignore
+            session.add(UserNickname(nickname=user.nickname, user_id=user.id))  # type: ignore
+            try:
+                await session.commit()
+            except IntegrityError:
+                # 다른 요청이 먼저 채운 경우
+                await session.rollback()
+
     async def get_user(self, user_id: int) -> User | None:
-        async with self.session_factory(user_id) as session:  # type: ignore
-            result = await session.exec(
-                select(User)
-                .options(
-                    selectinload(
-                        User.images.and_(  # type: ignore
-                            Image.state == State.ACTIVE,
-                            Image.use_type == UseType.USER_PROFILE,
-                        )
+        user = await read_first(
+            self.session_factory,
+            user_id,
+            select(User)
+            .options(
+                selectinload(
+                    User.images.and_(  # type: ignore
+                        Image.state == State.ACTIVE,
+                        Image.use_type == UseType.USER_PROFILE,
                     )
                 )
-                .where(User.id == user_id)
             )
-            user = result.first()
-            return user  # type: ignore
+            .where(User.id == user_id),
+        )
+        return user  # type: ignore
@@ -0,0 +1,230 @@
+"""
+샤드 재배치 도구
+
+config.PREVIOUS_SHARDS에 이전 토폴로지를 지정하고 앱을 배포하면 읽기는 새 샤드 -> 이전 샤드
+순으로 이뤄진다(read_first). 그 상태에서 아래 명령으로 주인이 바뀐 행을 옮기고,
+완료되면 PREVIOUS_SHARDS를 비운다.
+
+python -m src.shard_migration
+"""
+
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import make_transient
+from sqlmodel import SQLModel, select
+
+from src.database import get_session_factory, shard_router
+from src.domains.comment import Comment
+from src.domains.image import Image
+from src.domains.like import Like
+from src.domains.login_session import LoginSession
+from src.domains.notification import Notification
+from src.domains.post import Post
+from src.domains.post_view import PostView
+from src.domains.user import User
+from src.domains.user_nickname import UserNickname
+from src.servicies.auth import get_sharding_key
+from src.servicies.user import get_nickname_key
+from src.shard_router import ShardRouter
+
+
+@dataclass
+class MigrationTarget:
+    model: type[SQLModel]
+    # 행이 어느 샤드에 속하는지 결정하는 키. 서비스에서 session_factory에 넘기는 값과 같아야 한다.
+    sharding_key: Callable[[Any], int]
+    # autoincrement pk인 테이블은 샤드마다 id가 겹칠 수 있어 새로 발급받는다
+    reassign_id: bool = False
+    primary_key: str = "id"
+    # 같은 행인지 판단하는 컬럼. 없으면 pk로 판단한다. 첫 컬럼으로 대상 샤드를 조회한다.
+    # 복사 후 원본을 지우기 전에 중단되어 다시 실행해도 같은 행을 또 복사하지 않는다
+    natural_key: tuple[str, ...] = ()
+
+
+MIGRATION_TARGETS = [
+    MigrationTarget(User, lambda row: row.id),
+    MigrationTarget(
+        UserNickname, lambda row: get_nickname_key(row.nickname), primary_key="nickname"
+    ),
+    MigrationTarget(Image, lambda row: row.id),
+    MigrationTarget(Post, lambda row: row.id),
+    MigrationTarget(
+        PostView,
+        lambda row: row.post_id,
+        reassign_id=True,
+        natural_key=("post_id",),
+    ),
+    # 코멘트, 좋아요는 포스트 샤드에 모아둔다
+    MigrationTarget(Comment, lambda row: row.post_id),
+    # 재배치 중 두 샤드에 따로 생긴 같은 유저의 좋아요는 대상 샤드의 것만 남긴다
+    MigrationTarget(Like, lambda row: row.post_id, natural_key=("post_id", "user_id")),
+    MigrationTarget(
+        Notification,
+        lambda row: row.target_user_id,
+        reassign_id=True,
+        natural_key=("target_user_id", "actor_user_id", "post_id", "created_at"),
+    ),
+    MigrationTarget(LoginSession, lambda row: get_sharding_key(row.id)),
+]
+
+
+@dataclass
+class MigrationStats:
+    scanned: int = 0
+    moved: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+@asynccontextmanager
+async def _foreign_key_checks_disabled(session):
+    # 샤드를 넘나드는 FK는 보장할 수 없으므로 이동 중에는 검사를 끈다 (MySQL만 해당)
+    if session.get_bind().dialect.name != "mysql":
+        yield
+        return
+
+    # 커밋하면 커넥션이 풀로 돌아가므로 끄고 켜는 것 모두 커밋 전에 같은 커넥션에서 한다
+    connection = await session.connection()
+    await connection.exec_driver_sql("SET FOREIGN_KEY_CHECKS=0")
+    try:
+        yield
+    finally:
+        try:
+            await connection.exec_driver_sql("SET FOREIGN_KEY_CHECKS=1")
+        except:
+            # 되돌리지 못한 커넥션은 검사가 꺼진 채로 재사용되지 않게 버린다
+            await connection.invalidate()
+
+
+def _natural_key(target: MigrationTarget, row) -> tuple:
+    return tuple(getattr(row, column) for column in target.natural_key)
+
+
+class ShardMigrator:
+    def __init__(
+        self,
+        session_factory,
+        router: ShardRouter,
+        batch_size: int = 500,
+        pause: float = 0.1,
+    ) -> None:
+        self.session_factory = session_factory
+        self.router = router
+        self.batch_size = batch_size
+        # 배치 사이 쉬는 시간. 서비스 트래픽에 주는 부하를 제한한다.
+        self.pause = pause
+        self.stats = MigrationStats()
+
+    async def run(self) -> MigrationStats:
+        if not self.router.previous_shards:
+            return self.stats
+
+        for target in MIGRATION_TARGETS:
+            for source_shard in self.router.previous_shards:
+                await self.migrate_table(target, source_shard)
+
+        return self.stats
+
+    async def migrate_table(self, target: MigrationTarget, source_shard: str) -> None:
+        primary_key = getattr(target.model, target.primary_key)
+        last_id = None
+        while True:
+            orm_query = (
+                select(target.model).order_by(primary_key).limit(self.batch_size)
+            )
+            if last_id is not None:
+                orm_query = orm_query.where(primary_key > last_id)
+
+            async with self.session_factory(source_shard) as session:  # type: ignore
+                result = await session.exec(orm_query)
+                rows = list(result.all())
+            if not rows:
+                return
+
+            last_id = getattr(rows[-1], target.primary_key)
+            self.stats.scanned += len(rows)
+
+            moving: dict[str, list] = defaultdict(list)
+            for row in rows:
+                owner = self.router.get_shard(target.sharding_key(row))
+                if owner != source_shard:
+                    moving[owner].append(row)
+
+            for owner, owner_rows in moving.items():
+                await self._move_rows(target, source_shard, owner, owner_rows)
+
+            if len(rows) < self.batch_size:
+                return
+            await asyncio.sleep(self.pause)
+
+    async def _move_rows(
+        self, target: MigrationTarget, source_shard: str, owner: str, rows: list
+    ) -> None:
+        ids = [getattr(row, target.primary_key) for row in rows]
+        # 복사를 커밋한 뒤 원본을 지운다. 그 사이에 중단되면 다시 실행할 때 복사된 행은 건너뛴다
+        await self._copy_rows(target, owner, rows)
+        await self._delete_rows(target, source_shard, ids)
+        self.stats.moved[target.model.__tablename__] += len(ids)  # type: ignore
+
+    async def _copy_rows(self, target: MigrationTarget, owner: str, rows: list) -> None:
+        model = target.model
+        async with self.session_factory(owner) as session:  # type: ignore
+            # 이동 중에 새 샤드에 먼저 쓰여진 행이 더 최신이므로 덮어쓰지 않는다
+            if target.natural_key:
+                column = getattr(model, target.natural_key[0])
+                values = {getattr(row, target.natural_key[0]) for row in rows}
+                result = await session.exec(select(model).where(column.in_(values)))
+                existing_keys = {_natural_key(target, row) for row in result.all()}
+                rows = [
+                    row
+                    for row in rows
+                    if _natural_key(target, row) not in existing_keys
+                ]
+            else:
+                primary_key = getattr(model, target.primary_key)
+                ids = [getattr(row, target.primary_key) for row in rows]
+                result = await session.exec(
+                    select(primary_key).where(primary_key.in_(ids))
+                )
+                existing_ids = set(result.all())
+                rows = [
+                    row
+                    for row in rows
+                    if getattr(row, target.primary_key) not in existing_ids
+                ]
+
+            async with _foreign_key_checks_disabled(session):
+                for row in rows:
+                    make_transient(row)
+                    if target.reassign_id:
+                        row.id = None
+                    session.add(row)
+                await session.flush()
+            await session.commit()
+
+    async def _delete_rows(
+        self, target: MigrationTarget, source_shard: str, ids: list
+    ) -> None:
+        model = target.model
+        primary_key = getattr(model, target.primary_key)
+        async with self.session_factory(source_shard) as session:  # type: ignore
+            async with _foreign_key_checks_disabled(session):
+                await session.exec(delete(model).where(primary_key.in_(ids)))  # type: ignore
+            await session.commit()
+
+
+async def main() -> None:
+    session_factory = await get_session_factory()
+    migrator = ShardMigrator(session_factory=session_factory, router=shard_router)
+    stats = await migrator.run()
+
+    print(f"scanned={stats.scanned}")
+    for table, count in stats.moved.items():
+        print(f"{table}: moved={count}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
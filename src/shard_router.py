@@ -0,0 +1,57 @@
+from src.consistent_hash import ConsistentHash, md5_hash
+from src.id_generator import SLOT_BITS, SLOT_COUNT, get_slot, is_snowflake_id
+
+# 키는 먼저 고정된 개수의 슬롯으로 나눠지고, 슬롯이 링을 통해 샤드에 배정된다.
+# 샤드가 추가되면 링에서 자리를 빼앗긴 슬롯(약 1/N)만 새 샤드로 옮겨간다.
+_MASK_64 = (1 << 64) - 1
+_FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+class ShardRouter:
+    def __init__(
+        self,
+        shards: list[str],
+        virtual_nodes: int = 100,
+        previous_shards: list[str] | None = None,
+    ):
+        self.shards = shards
+        # 슬롯 -> 샤드 배정이 바뀌면 데이터를 옮겨야 하므로 기존 md5 링 순서를 유지한다
+        self.ring = ConsistentHash(shards, virtual_nodes, hash_fn=md5_hash)
+        self.slots: list[str] = self._build_slots(self.ring)
+
+        # 재배치 중에는 이전 토폴로지의 슬롯 테이블도 들고 있는다.
+        self.previous_shards = previous_shards or []
+        self.previous_slots: list[str] | None = None
+        if self.previous_shards:
+            self.previous_slots = self._build_slots(
+                ConsistentHash(self.previous_shards, virtual_nodes, hash_fn=md5_hash)
+            )
+
+    @staticmethod
+    def _build_slots(ring: ConsistentHash) -> list[str]:
+        # 슬롯 -> 샤드 조회 테이블. 요청마다 링을 탐색하지 않도록 미리 계산해 둔다.
+        return [ring.get_node(f"slot:{slot}")[0] for slot in range(SLOT_COUNT)]
+
+    @staticmethod
+    def get_slot(key: int) -> int:
+        # Snowflake id는 슬롯이 id 안에 들어있으므로 그대로 꺼낸다
+        if is_snowflake_id(key):
+            return get_slot(key)
+        # 이전 id, 세션 키 등은 피보나치 해싱. md5보다 훨씬 싸고, 연속된 pk도 슬롯에 고르게 퍼진다.
+        return ((key * _FIBONACCI_MULTIPLIER) & _MASK_64) >> (64 - SLOT_BITS)
+
+    def get_shard(self, key: int | str) -> str:
+        # 샤드 이름이 들어오면 그대로 사용 (전체 샤드 순회용)
+        if isinstance(key, str):
+            return key
+        return self.slots[self.get_slot(key)]
+
+    def get_previous_shard(self, key: int | str) -> str | None:
+        # 재배치 중이고 키의 주인이 바뀐 경우에만 이전 샤드를 반환
+        if isinstance(key, str) or self.previous_slots is None:
+            return None
+        slot = self.get_slot(key)
+        previous_shard = self.previous_slots[slot]
+        if previous_shard == self.slots[slot]:
+            return None
+        return previous_shard
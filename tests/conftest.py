@@ -0,0 +1,9 @@
+import pytest
+
+from src.id_generator import id_generator
+
+
+@pytest.fixture(autouse=True)
+def active_id_generator(monkeypatch) -> None:
+    # 테스트는 한 프로세스에서만 id를 만들므로 임대 없이 기본 워커 번호로 발급한다
+    monkeypatch.setattr(id_generator, "active", True)
@@ -46,7 +46,7 @@ async def test_session(test_engine: AsyncEngine) -> AsyncSession:
 
         async def test_get_session_factory():
             @asynccontextmanager
-            async def _test_get_session(key=None):
+            async def _test_get_session(key=None, read_only=False):
                 print("1->", id(session))
                 yield session
 
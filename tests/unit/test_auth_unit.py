@@ -0,0 +1,196 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth import get_admin_user, get_current_user
+from src.domains.user import Role
+from src.schemas.auth import SessionContent
+from src.servicies import auth
+from src.servicies.auth import AuthService
+
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock(spec=AsyncSession)
+    session.add = MagicMock()
+    return session
+
+
+@pytest.fixture
+def auth_service(mock_session):
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield mock_session
+
+    return AuthService(session_factory=session_factory)  # type: ignore
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, ex: int, nx: bool = False) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+
+@pytest.fixture
+def redis(monkeypatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr(auth, "redis", redis)
+    return redis
+
+
+def session_content(expires_in: timedelta) -> SessionContent:
+    return SessionContent(
+        id=7,
+        nickname="테스트유저",
+        role=Role.member,
+        expire=datetime.now(tz=timezone.utc) + expires_in,
+    )
+
+
+def login_session(content: SessionContent) -> MagicMock:
+    return MagicMock(id="session", session_data=content.model_dump_json())
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_current_user_from_cache(auth_service: AuthService, redis) -> None:
+    # Given
+    redis.values["session:session"] = session_content(
+        timedelta(hours=1)
+    ).model_dump_json()
+    auth_service.find_session = AsyncMock()  # type: ignore
+
+    # When
+    user = await get_current_user(session_id="session", service=auth_service)
+
+    # Then
+    # 캐시에 있으면 DB를 조회하지 않는다
+    assert user.id == 7
+    auth_service.find_session.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_current_user_caches_until_expire(
+    auth_service: AuthService, redis
+) -> None:
+    # Given
+    content = session_content(timedelta(minutes=10))
+    auth_service.find_session = AsyncMock(return_value=login_session(content))  # type: ignore
+
+    # When
+    user = await get_current_user(session_id="session", service=auth_service)
+
+    # Then
+    # DB에서 읽은 세션은 만료 시각까지만 캐시에 둔다
+    assert user == content
+    assert "session:session" in redis.values
+    assert 590 <= redis.ttls["session:session"] <= 600
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_current_user_expired_session(
+    auth_service: AuthService, redis
+) -> None:
+    # Given
+    content = session_content(timedelta(minutes=-1))
+    auth_service.find_session = AsyncMock(return_value=login_session(content))  # type: ignore
+
+    # When
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(session_id="session", service=auth_service)
+
+    # Then
+    assert exc_info.value.status_code == 401
+    assert not redis.values
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_delete_session_revokes_cached_session(
+    auth_service: AuthService, redis, mock_session
+) -> None:
+    # Given
+    content = session_content(timedelta(hours=1))
+    session = login_session(content)
+    await auth_service.cache_session("session", content)
+    auth_service.find_session = AsyncMock(return_value=session)  # type: ignore
+
+    # When
+    await auth_service.delete_session(session)
+
+    # Then
+    # 모든 워커가 읽는 Redis에 로그아웃 표시를 남겨 DB를 조회하지 않고 거절한다
+    mock_session.delete.assert_awaited_once_with(session)
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(session_id="session", service=auth_service)
+    assert exc_info.value.status_code == 401
+    auth_service.find_session.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_logout_during_concurrent_read(
+    auth_service: AuthService, redis, mock_session
+) -> None:
+    # Given
+    content = session_content(timedelta(hours=1))
+    session = login_session(content)
+    read_db = asyncio.Event()
+    logged_out = asyncio.Event()
+
+    async def find_session(session_id: str) -> MagicMock:
+        # 로그아웃 전에 DB에서 세션을 읽고, 로그아웃이 끝난 뒤 캐시한다
+        read_db.set()
+        await logged_out.wait()
+        return session
+
+    auth_service.find_session = find_session  # type: ignore
+
+    async def logout() -> None:
+        await read_db.wait()
+        await auth_service.delete_session(session)
+        logged_out.set()
+
+    # When
+    await asyncio.gather(
+        get_current_user(session_id="session", service=auth_service), logout()
+    )
+
+    # Then
+    # 겹친 요청이 읽은 세션은 로그아웃 표시를 덮어쓰지 못하므로 이후 요청은 거절된다
+    assert redis.values["session:session"] == auth.REVOKED_SESSION
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(session_id="session", service=auth_service)
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_admin_user_rejects_member() -> None:
+    # Given
+    member = session_content(timedelta(hours=1))
+
+    # When
+    with pytest.raises(HTTPException) as exc_info:
+        await get_admin_user(current_user=member)
+
+    # Then
+    # 처리율 제한 정책은 클러스터 전체에 적용되므로 관리자만 바꿀 수 있다
+    assert exc_info.value.status_code == 403
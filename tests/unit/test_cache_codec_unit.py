@@ -0,0 +1,52 @@
+import datetime
+
+import pytest
+from pydantic import BaseModel
+
+from src.cache_codec import (
+    CODECS,
+    COMPRESSION_NONE,
+    COMPRESSION_ZLIB,
+    JsonCodec,
+    pack,
+    unpack,
+)
+
+
+class Payload(BaseModel):
+    id: int
+    content: str
+    created_at: datetime.datetime
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("codec", list(CODECS.values()), ids=lambda codec: codec.name)
+def test_codec_round_trip(codec) -> None:
+    # Given
+    payload = Payload(id=1, content="a" * 100, created_at=datetime.datetime(2024, 1, 1))
+
+    # When
+    packed = pack(codec, codec.dumps(payload), 123.0, COMPRESSION_ZLIB, 10)
+    soft_expires_at, unpacked_codec, data = unpack(packed)
+
+    # Then
+    # 어떤 코덱이든 응답 본문은 pydantic이 만드는 JSON과 같은 값이다
+    assert soft_expires_at == 123.0
+    assert unpacked_codec is codec
+    assert len(packed) < len(codec.dumps(payload))
+    assert unpacked_codec.loads(data, Payload) == payload
+    assert Payload.model_validate_json(unpacked_codec.to_json(data)) == payload
+
+
+@pytest.mark.unit
+def test_unpack_rejects_legacy_value() -> None:
+    # Given
+    legacy = b'9999999999.000\n{"value": 1}'
+    small = pack(JsonCodec(), b"{}", 1.0, COMPRESSION_ZLIB, 4096)
+
+    # When / Then
+    # 이전 텍스트 형식은 미스로 처리되고, 작은 값은 압축하지 않는다
+    with pytest.raises(ValueError):
+        unpack(legacy)
+    assert small[-2:] == b"{}"
+    assert small[10] == COMPRESSION_NONE
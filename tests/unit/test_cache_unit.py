@@ -0,0 +1,507 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import pytest
+from pydantic import BaseModel
+from redis.exceptions import ConnectionError
+
+from src import cache
+from src.cache import (
+    LocalCache,
+    get_cached,
+    get_or_build,
+    get_or_build_response,
+    invalidate_namespace,
+    namespaced_key,
+    refresh_key,
+)
+from src.cache_migration import (
+    RESTORE_IF_ABSENT_SCRIPT,
+    CacheWarmer,
+    _is_copyable,
+    plan_ring_change,
+)
+from src.consistent_hash import ConsistentHash
+from src.database import (
+    COPY_IF_ABSENT_SCRIPT,
+    CacheClient,
+    HotKeyTracker,
+    request_state,
+)
+
+
+def use_cache_nodes(monkeypatch, servers: list[str]) -> dict[str, AsyncMock]:
+    nodes = {server: AsyncMock() for server in servers}
+
+    async def get_connection(server):
+        return nodes[server]
+
+    pool = SimpleNamespace(get_connection=get_connection)
+    monkeypatch.setattr(
+        cache, "cache_client", CacheClient(ConsistentHash(servers), pool)
+    )
+    return nodes
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_namespaced_key(monkeypatch) -> None:
+    # Given
+    redis = use_cache_nodes(monkeypatch, ["node_1"])["node_1"]
+    redis.get.return_value = b"3"
+
+    # When
+    key = await namespaced_key("posts", "page:1")
+
+    # Then
+    redis.get.assert_awaited_once_with("posts:generation")
+    assert key == "posts:3:page:1"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_invalidate_namespace_all_nodes(monkeypatch) -> None:
+    # Given
+    nodes = use_cache_nodes(monkeypatch, ["node_1", "node_2", "node_3"])
+    nodes["node_2"].incr.side_effect = ConnectionError
+
+    # When
+    await invalidate_namespace("comments")
+
+    # Then
+    # 한 노드가 실패해도 나머지 노드의 세대 번호는 올라간다
+    for node in nodes.values():
+        node.incr.assert_awaited_once_with("comments:generation")
+    assert cache.cache_client.down == {"node_2": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_cache_client_failover_and_recover(monkeypatch) -> None:
+    # Given
+    nodes = use_cache_nodes(monkeypatch, ["node_1", "node_2", "node_3"])
+    client = cache.cache_client
+    key = "post:post_id:1"
+    owner, fallback = client.ring.get_nodes(key, 2)
+    nodes[owner].get.side_effect = ConnectionError
+    nodes[fallback].get.return_value = b"cached"
+
+    # When
+    value = await client.get(key)
+
+    # Then
+    # 주인 노드가 응답하지 않으면 링의 다음 노드에서 읽고, 주인 노드는 제외된다
+    assert value == b"cached"
+    assert client.get_nodes(key)[0] == fallback
+
+    # 헬스 체크를 연속으로 통과하면 다시 사용한다. 다른 워커가 쓰는 노드이므로 비우지 않는다
+    await client.health_check()
+    assert owner in client.down
+    await client.health_check()
+    assert client.get_nodes(key)[0] == owner
+    nodes[owner].flushdb.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_cache_client_hot_key_replicas() -> None:
+    # Given
+    nodes = {server: AsyncMock() for server in ["node_1", "node_2", "node_3"]}
+
+    async def get_connection(server):
+        return nodes[server]
+
+    client = CacheClient(
+        ConsistentHash(list(nodes)),
+        SimpleNamespace(get_connection=get_connection),
+        replicas=2,
+        hot_keys=HotKeyTracker(threshold=3),
+    )
+    key = "post:post_id:1"
+    replicas = client.ring.get_nodes(key, 2)
+    other = next(node for node in nodes if node not in replicas)
+
+    # When
+    for _ in range(3):
+        await client.get(key)
+    await client.setex(key, 60, b"cached")
+    await client.delete(key)
+
+    # Then
+    # 자주 읽히는 키는 다음 노드까지 복제해 쓰고, 무효화도 모든 사본에서 한다
+    assert client.hot_keys.is_hot(key)
+    for replica in replicas:
+        nodes[replica].setex.assert_awaited_once_with(
+            name=key, time=60, value=b"cached"
+        )
+        nodes[replica].delete.assert_awaited_once_with(key)
+    nodes[other].setex.assert_not_awaited()
+    assert client.ring.loads[replicas[0]] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_cache_client_keeps_owner_under_concurrency() -> None:
+    # Given
+    nodes = {server: AsyncMock() for server in ["node_1", "node_2", "node_3"]}
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def get_connection(server):
+        return nodes[server]
+
+    async def slow_get(key):
+        started.set()
+        await release.wait()
+        return b"cached"
+
+    client = CacheClient(
+        ConsistentHash(list(nodes)),
+        SimpleNamespace(get_connection=get_connection),
+        replicas=2,
+        hot_keys=HotKeyTracker(threshold=100),
+    )
+    key = "post:post_id:1"
+    owner, replica = client.ring.get_nodes(key, 2)
+    nodes[owner].get.side_effect = slow_get
+
+    # When
+    # 주인 노드에 처리 중인 요청이 있는 동안 같은 노드의 키를 다시 읽는다
+    pending = asyncio.create_task(client.get(key))
+    await started.wait()
+    nodes[owner].get.side_effect = None
+    nodes[owner].get.return_value = b"cached"
+    value = await client.get(key)
+    release.set()
+    await pending
+
+    # Then
+    # 사본이 없는 일반 키는 부하 상한과 관계없이 주인 노드에서 읽는다
+    assert value == b"cached"
+    assert nodes[owner].get.await_count == 2
+    nodes[replica].get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_ring_change_grace_and_warm(monkeypatch) -> None:
+    # Given
+    nodes = use_cache_nodes(monkeypatch, ["node_1", "node_2", "node_3"])
+    client = cache.cache_client
+    previous = client.ring.copy()
+    client.ring.set_virtual_nodes(10)
+    plan = plan_ring_change(previous, client.ring)
+    key = next(
+        f"post:post_id:{i}"
+        for i in range(1000)
+        if plan.get_move(f"post:post_id:{i}") is not None
+    )
+    move = plan.get_move(key)
+    assert move is not None
+    source, target = move
+    nodes[target].get.return_value = None
+    nodes[source].get.return_value = b"cached"
+    nodes[source].pttl.return_value = 5000
+
+    # When
+    client.start_grace(previous, 60)
+    value = await client.get(key)
+
+    # Then
+    # 유예 시간에는 새 노드에서 미스가 나면 이전 노드를 읽어 남은 TTL로 옮겨 담는다.
+    # 새 노드에 값이나 버전이 생겼으면 덮어쓰지 않는다
+    assert value == b"cached"
+    nodes[target].eval.assert_awaited_once_with(
+        COPY_IF_ABSENT_SCRIPT, 2, key, f"version:{key}", b"cached", 5000
+    )
+
+    # 지우면 이전 노드의 값도 지워 다시 옮겨 담기지 않는다
+    await client.delete(key)
+    nodes[target].delete.assert_awaited_once_with(key)
+    nodes[source].delete.assert_awaited_once_with(key)
+
+    # SCAN/DUMP/RESTORE로 이전 노드에서 주인이 바뀐 캐시 항목만 복사한다
+    nodes[source].scan.return_value = (0, [key.encode(), b"lock:" + key.encode()])
+    nodes[source].dump.return_value = b"dumped"
+    nodes[target].eval.reset_mock()
+    await CacheWarmer(client.pool, plan).copy_node(source)
+    nodes[target].eval.assert_awaited_once_with(
+        RESTORE_IF_ABSENT_SCRIPT, 2, key, f"version:{key}", 5000, b"dumped"
+    )
+    nodes[target].restore.assert_not_awaited()
+    # 버전과 세션은 옮기지 않는다
+    assert not _is_copyable(f"version:{key}")
+    assert not _is_copyable("session:abc")
+
+
+@pytest.mark.unit
+def test_local_cache_lru_and_ttl(monkeypatch) -> None:
+    # Given
+    now = 100.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    local_cache = LocalCache(maxsize=2, ttl=10)
+    local_cache.set("a", "1")
+    local_cache.set("b", "2")
+
+    # When
+    local_cache.get("a")
+    local_cache.set("c", "3")
+
+    # Then
+    # 최근에 읽은 a는 남고 b가 밀려난다
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == "1"
+    now = 111.0
+    assert local_cache.get("c") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_cached_tiers(monkeypatch) -> None:
+    # Given
+    redis = use_cache_nodes(monkeypatch, ["node_1"])["node_1"]
+    redis.get.return_value = b'{"id": 1}'
+    monkeypatch.setattr(cache, "local_cache", LocalCache(maxsize=10, ttl=10))
+    monkeypatch.setattr(cache, "cache_stats", Counter())
+
+    # When
+    first = await get_cached("post:post_id:1")
+    second = await get_cached("post:post_id:1")
+
+    # Then
+    assert first == second == b'{"id": 1}'
+    redis.get.assert_awaited_once()
+    assert cache.cache_stats == Counter(l1_miss=1, l2_hit=1, l1_hit=1)
+
+
+class Payload(BaseModel):
+    value: int
+
+
+@pytest.fixture
+def cache_node(monkeypatch):
+    redis = use_cache_nodes(monkeypatch, ["node_1"])["node_1"]
+    redis.get.return_value = None
+    redis.set.return_value = True
+    monkeypatch.setattr(cache, "local_cache", LocalCache(maxsize=10, ttl=10))
+    monkeypatch.setattr(cache.config, "CACHE_LOCK_TIMEOUT", 1.0)
+    return redis
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_or_build_single_flight(cache_node) -> None:
+    # Given
+    builds = 0
+
+    async def build() -> Payload:
+        nonlocal builds
+        builds += 1
+        await asyncio.sleep(0.05)
+        return Payload(value=1)
+
+    # When
+    responses = await asyncio.gather(
+        *(
+            get_or_build("posts:0:page:1", Payload, build, soft_ttl=10, hard_ttl=60)
+            for _ in range(10)
+        )
+    )
+
+    # Then
+    assert builds == 1
+    assert all(response == Payload(value=1) for response in responses)
+    cache_node.setex.assert_awaited_once()
+    cache_node.eval.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_or_build_waits_for_other_worker(cache_node) -> None:
+    # Given
+    # 다른 워커가 락을 잡고 있고, 잠시 후 캐시를 채운다
+    cache_node.set.return_value = False
+    cache_node.get.side_effect = [None, None, cache._pack(b'{"value": 2}', 60)]
+    build = AsyncMock()
+
+    # When
+    response = await get_or_build(
+        "post:post_id:1", Payload, build, soft_ttl=10, hard_ttl=60
+    )
+
+    # Then
+    assert response == Payload(value=2)
+    build.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_or_build_stale_while_revalidate(cache_node) -> None:
+    # Given
+    # 소프트 TTL이 지난 캐시 값
+    cache_node.get.return_value = cache._pack(b'{"value": 1}', -1)
+    build = AsyncMock(return_value=Payload(value=2))
+
+    # When
+    response = await get_or_build(
+        "posts:0:page:1", Payload, build, soft_ttl=10, hard_ttl=60
+    )
+    await asyncio.sleep(0.01)
+
+    # Then
+    # 이전 값을 바로 반환하고, 갱신은 백그라운드에서 한 번 실행된다
+    assert response == Payload(value=1)
+    build.assert_awaited_once()
+    cache_node.setex.assert_awaited_once()
+    assert cache_node.setex.await_args.kwargs["time"] == 60
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_or_build_response_raw_hit(cache_node, monkeypatch) -> None:
+    # Given
+    cache_node.get.return_value = cache._pack(b'{"value":3}', 60)
+    validate = Mock(side_effect=AssertionError)
+    monkeypatch.setattr(Payload, "model_validate_json", validate)
+
+    # When
+    response = await get_or_build_response(
+        "post:post_id:1", Payload, AsyncMock(), soft_ttl=10, hard_ttl=60
+    )
+
+    # Then
+    # 캐시 히트는 모델을 만들지 않고 저장된 JSON을 그대로 응답한다
+    assert response.body == b'{"value":3}'
+    assert response.media_type == "application/json"
+    validate.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_versioned_rebuild_and_refresh(cache_node) -> None:
+    # Given
+    key = "post:post_id:1"
+    cache_node.get.side_effect = [None, b"3"]
+    cache_node.incr.return_value = 4
+    cache_node.eval.return_value = 1
+    calls = []
+
+    async def build() -> Payload:
+        # 버전은 DB를 읽기 전에 받아 둔다
+        calls.append(cache_node.get.await_count)
+        return Payload(value=1)
+
+    # When
+    await get_or_build(key, Payload, build, soft_ttl=10, hard_ttl=60, versioned=True)
+    await refresh_key(key, Payload(value=2), soft_ttl=10, hard_ttl=60)
+
+    # Then
+    # 재구성은 읽기 전 버전(3)으로, 수정 후 갱신은 올린 버전(4)으로 비교해 쓴다
+    assert calls == [2]
+    rebuild_args, refresh_args = (
+        call.args
+        for call in cache_node.eval.await_args_list
+        if call.args[0] == cache.SET_IF_NEWER_SCRIPT
+    )
+    assert rebuild_args[1:5] == (2, key, f"version:{key}", 3)
+    assert refresh_args[1:5] == (2, key, f"version:{key}", 4)
+    assert cache._unpack(refresh_args[5])[2] == b'{"value":2}'
+    cache_node.incr.assert_awaited_once_with(f"version:{key}")
+    cache_node.delete.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_versioned_rebuild_reads_primary(cache_node) -> None:
+    # Given
+    cache_node.get.side_effect = [None, b"3"]
+    read_primary = []
+
+    async def build() -> Payload:
+        state = request_state.get()
+        read_primary.append(state is not None and state.read_primary)
+        return Payload(value=1)
+
+    # When
+    await get_or_build(
+        "post:post_id:1", Payload, build, soft_ttl=10, hard_ttl=60, versioned=True
+    )
+    await get_or_build("posts:0:page:1", Payload, build, soft_ttl=10, hard_ttl=60)
+
+    # Then
+    # 버전을 붙여 캐시하는 값만 primary에서 읽고, 끝나면 요청 상태를 되돌린다
+    assert read_primary == [True, False]
+    assert request_state.get() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_versioned_hot_key_keeps_version_on_replicas(monkeypatch) -> None:
+    # Given
+    nodes = use_cache_nodes(monkeypatch, ["node_1", "node_2", "node_3"])
+    client = cache.cache_client
+    client.replicas = 2
+    client.hot_keys = HotKeyTracker(threshold=1)
+    monkeypatch.setattr(cache, "local_cache", LocalCache(maxsize=10, ttl=10))
+    key = "post:post_id:1"
+    owner, replica = client.ring.get_nodes(key, 2)
+    other = next(node for node in nodes if node not in (owner, replica))
+    # 수정 후 갱신이 주인 노드의 버전만 올려 둔 상태
+    nodes[owner].get.side_effect = lambda name: (
+        b"5" if name.startswith("version:") else None
+    )
+    nodes[replica].get.return_value = None
+    nodes[owner].incr.return_value = 6
+    nodes[replica].incr.return_value = 1
+
+    async def build() -> Payload:
+        return Payload(value=1)
+
+    # When
+    await get_or_build(key, Payload, build, soft_ttl=10, hard_ttl=60, versioned=True)
+    await refresh_key(key, Payload(value=2), soft_ttl=10, hard_ttl=60)
+
+    # Then
+    # 재구성은 값을 쓸 사본들에서 읽은 가장 큰 버전으로 비교하고,
+    # 갱신은 모든 사본의 버전을 올려 사본마다 오래된 재구성을 거부할 수 있게 한다
+    for node in (owner, replica):
+        versions = [
+            call.args[4]
+            for call in nodes[node].eval.await_args_list
+            if call.args[0] == cache.SET_IF_NEWER_SCRIPT
+        ]
+        assert versions == [5, 6]
+        nodes[node].incr.assert_awaited_once_with(f"version:{key}")
+    nodes[other].eval.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_listen_invalidations_closes_pubsub_on_reconnect(monkeypatch) -> None:
+    # Given
+    monkeypatch.setattr(asyncio, "sleep", AsyncMock())
+    pubsubs: list[MagicMock] = []
+
+    def pubsub():
+        connection = MagicMock()
+        connection.__aenter__ = AsyncMock(return_value=connection)
+        connection.__aexit__ = AsyncMock(return_value=False)
+        connection.subscribe = AsyncMock()
+        # 두 번 끊기고 세 번째 구독에서 종료한다
+        error = ConnectionError if len(pubsubs) < 2 else asyncio.CancelledError
+        connection.listen = Mock(side_effect=error)
+        pubsubs.append(connection)
+        return connection
+
+    redis = Mock(pubsub=pubsub)
+
+    # When
+    with pytest.raises(asyncio.CancelledError):
+        await cache.listen_invalidations(redis)
+
+    # Then
+    # 다시 연결할 때마다 이전 구독 커넥션을 닫는다
+    assert len(pubsubs) == 3
+    assert all(connection.__aexit__.await_count == 1 for connection in pubsubs)
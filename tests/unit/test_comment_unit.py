@@ -0,0 +1,122 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import database
+from src.domains.comment import Comment
+from src.servicies.comment import CommentService
+from src.shard_router import ShardRouter
+
+SHARDS = ["shard_1", "shard_2"]
+
+
+@pytest_asyncio.fixture
+async def engines():
+    engines = {
+        shard: create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        for shard in SHARDS
+    }
+    for engine in engines.values():
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.fixture
+def router(monkeypatch) -> ShardRouter:
+    # shard_1 하나에서 두 개로 늘리는 중
+    router = ShardRouter(SHARDS, previous_shards=["shard_1"])
+    monkeypatch.setattr(database, "shard_router", router)
+    return router
+
+
+@pytest.fixture
+def comment_service(engines, router) -> CommentService:
+    @asynccontextmanager
+    async def session_factory(key, read_only=False):
+        async with AsyncSession(
+            engines[router.get_shard(key)], expire_on_commit=False
+        ) as session:
+            yield session
+
+    return CommentService(session_factory=session_factory)  # type: ignore
+
+
+async def select_comments(engines, shard: str) -> list[Comment]:
+    async with AsyncSession(engines[shard]) as session:
+        result = await session.exec(select(Comment))
+        return list(result.all())
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_legacy_comment_on_post_shard(
+    engines, router, comment_service: CommentService
+) -> None:
+    # Given
+    # 이전 id 체계의 코멘트가 재배치로 포스트 샤드(shard_2)에 옮겨졌고,
+    # 코멘트 id로는 shard_1만 가리키는 경우
+    post_id = next(key for key in range(1, 1000) if router.get_shard(key) == "shard_2")
+    comment_id = next(
+        key
+        for key in range(1, 1000)
+        if router.get_shard(key) == "shard_1" and router.get_previous_shard(key) is None
+    )
+    async with AsyncSession(engines["shard_2"]) as session:
+        session.add(
+            Comment(id=comment_id, author_id=1, post_id=post_id, content="legacy")
+        )
+        await session.commit()
+
+    # When
+    comment = await comment_service.get_comment(comment_id)
+    assert comment is not None
+    await comment_service.edit_comment(comment, content="edited")
+    edited = await select_comments(engines, "shard_2")
+    await comment_service.delete_comment(comment)
+
+    # Then
+    # id로 찾지 못하면 모든 샤드에서 찾고, 수정과 삭제는 행이 있는 샤드에 반영한다
+    assert [row.content for row in edited] == ["edited"]
+    assert await select_comments(engines, "shard_2") == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_comments_during_rebalance(
+    engines, router, comment_service: CommentService
+) -> None:
+    # Given
+    # 포스트가 shard_1에서 shard_2로 옮겨가는 중. 코멘트 하나는 복사만 되고 아직 지워지지 않았다
+    post_id = next(
+        key for key in range(1, 1000) if router.get_previous_shard(key) == "shard_1"
+    )
+    created_at = datetime(2024, 10, 1, 12, 0, 0)
+    for shard, ids in (("shard_1", [1, 2, 3]), ("shard_2", [3, 4])):
+        async with AsyncSession(engines[shard]) as session:
+            session.add_all(
+                Comment(
+                    id=id,
+                    author_id=1,
+                    post_id=post_id,
+                    content=f"{id}",
+                    created_at=created_at + timedelta(minutes=id),
+                )
+                for id in ids
+            )
+            await session.commit()
+
+    # When
+    comments = await comment_service.get_comments(post_id=post_id)
+
+    # Then
+    # 두 샤드의 코멘트를 최신순으로 병합하고, 양쪽에 있는 코멘트는 한 번만 보여준다
+    assert [comment.id for comment in comments] == [4, 3, 2, 1]
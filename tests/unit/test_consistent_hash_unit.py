@@ -0,0 +1,95 @@
+import pytest
+
+from src.consistent_hash import ConsistentHash, diff_rings
+
+NODES = ["localhost:6379", "localhost:6380", "localhost:6381"]
+
+
+@pytest.mark.unit
+def test_get_node() -> None:
+    # Given
+    ring = ConsistentHash(NODES)
+
+    # When
+    results = [ring.get_node(f"post:post_id:{i}") for i in range(3000)]
+
+    # Then
+    assert all(NODES[index] == node for node, index in results)
+    # 가상 노드로 키가 모든 노드에 퍼진다
+    assert {node for node, _ in results} == set(NODES)
+
+
+@pytest.mark.unit
+def test_get_nodes_ring_order() -> None:
+    # Given
+    ring = ConsistentHash(NODES)
+
+    # When
+    nodes = ring.get_nodes("post:post_id:1", 5)
+
+    # Then
+    assert nodes[0] == ring.get_node("post:post_id:1")[0]
+    assert sorted(nodes) == sorted(NODES)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_rebuild_swaps_ring() -> None:
+    # Given
+    ring = ConsistentHash(NODES, virtual_nodes=10)
+    keys = [f"post:post_id:{i}" for i in range(1000)]
+    expected = ConsistentHash(NODES, virtual_nodes=200)
+
+    # When
+    await ring.rebuild(virtual_nodes=200)
+
+    # Then
+    assert ring.virtual_nodes == 200
+    assert [ring.get_node(key) for key in keys] == [
+        expected.get_node(key) for key in keys
+    ]
+
+
+@pytest.mark.unit
+def test_get_node_bounded() -> None:
+    # Given
+    ring = ConsistentHash(NODES)
+    key = "post:post_id:1"
+    owner, second, _ = ring.get_nodes(key, 3)
+
+    # When
+    # 주인 노드에 요청이 몰려 평균의 (1+ε)배를 넘는다
+    ring.add_load(owner, 10)
+    ring.add_load(second, 2)
+    bounded = ring.get_node_bounded(key, epsilon=0.25)
+    ring.remove_load(owner, 10)
+
+    # Then
+    # 용량이 남은 링의 다음 노드로 보내고, 부하가 풀리면 다시 주인 노드
+    assert bounded == second
+    assert ring.get_node_bounded(key, epsilon=0.25) == owner
+    # 모두 가득 차면 주인 노드
+    assert ring.pick_bounded([owner], epsilon=0.25) == owner
+
+
+@pytest.mark.unit
+def test_diff_rings() -> None:
+    # Given
+    old = ConsistentHash(NODES)
+    new = ConsistentHash(NODES + ["localhost:6382"])
+    keys = [f"post:post_id:{i}" for i in range(5000)]
+
+    # When
+    moved = diff_rings(old, new)
+
+    # Then
+    # 노드를 추가하면 새 노드로 가는 구간만 바뀐다
+    assert {moved_range.target for moved_range in moved} == {"localhost:6382"}
+    for key in keys:
+        hash_key = old.hash_fn(key)
+        in_range = [r for r in moved if r.start <= hash_key < r.end]
+        changed = old.get_node(key)[0] != new.get_node(key)[0]
+        assert bool(in_range) == changed
+        if in_range:
+            assert in_range[0].source == old.get_node(key)[0]
+    assert 0.15 < sum(moved_range.fraction for moved_range in moved) < 0.35
@@ -0,0 +1,216 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import create_engine
+
+from src import database
+from src.database import Descending, merge_sorted_shards, scatter_gather
+from src.shard_router import ShardRouter
+
+
+@pytest.fixture
+def two_shards(monkeypatch):
+    monkeypatch.setattr(database, "shard_router", ShardRouter(["shard_1", "shard_2"]))
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_scatter_gather(two_shards) -> None:
+    # Given
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield key
+
+    async def query_fn(shard):
+        return [f"{shard}:row"]
+
+    # When
+    result = await scatter_gather(session_factory, query_fn, timeout=1)
+
+    # Then
+    assert sorted(result) == ["shard_1:row", "shard_2:row"]
+    assert result.partial is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_scatter_gather_slow_shard(two_shards) -> None:
+    # Given
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield key
+
+    async def query_fn(shard):
+        if shard == "shard_2":
+            await asyncio.sleep(1)
+        return [f"{shard}:row"]
+
+    # When
+    result = await scatter_gather(session_factory, query_fn, timeout=0.05)
+
+    # Then
+    assert list(result) == ["shard_1:row"]
+    assert result.partial is True
+    assert result.timed_out_shards == ["shard_2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_merge_sorted_shards(two_shards) -> None:
+    # Given
+    shard_data = {
+        "shard_1": [10, 8, 7, 3, 1],
+        "shard_2": [9, 6, 5, 4, 2],
+    }
+
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield key
+
+    async def query_fn(shard, last_row, batch_size):
+        rows = [row for row in shard_data[shard] if last_row is None or row < last_row]
+        return rows[:batch_size]
+
+    # When
+    result = await merge_sorted_shards(
+        session_factory,
+        query_fn,
+        sort_key=Descending,
+        limit=3,
+        skip=3,
+    )
+
+    # Then
+    assert [row for _, row in result] == [7, 6, 5]
+    assert [shard for shard, _ in result] == ["shard_1", "shard_2", "shard_2"]
+    assert result.partial is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_merge_sorted_shards_deep_page(two_shards) -> None:
+    # Given
+    shard_data = {
+        "shard_1": list(range(2000, 0, -2)),
+        "shard_2": list(range(1999, 0, -2)),
+    }
+    fetched = {"shard_1": 0, "shard_2": 0}
+
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield key
+
+    async def query_fn(shard, last_row, batch_size):
+        rows = [row for row in shard_data[shard] if last_row is None or row < last_row]
+        fetched[shard] += len(rows[:batch_size])
+        return rows[:batch_size]
+
+    # When
+    result = await merge_sorted_shards(
+        session_factory,
+        query_fn,
+        sort_key=Descending,
+        limit=20,
+        skip=200,
+    )
+
+    # Then
+    assert [row for _, row in result] == list(range(1800, 1780, -1))
+    # 샤드마다 skip + limit 만큼 읽지 않고, 합쳐서 그 정도만 읽는다
+    assert all(count < 220 for count in fetched.values())
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_replica_pool_least_connections(tmp_path) -> None:
+    # Given
+    pool = database.ReplicaPool(
+        "shard_1",
+        [f"sqlite+aiosqlite:///{tmp_path}/replica_{idx}.db" for idx in range(2)],
+    )
+
+    # When
+    async with pool.session() as first:
+        async with pool.session() as second:
+            in_use = list(pool.in_use)
+
+    # Then
+    assert first.bind is pool.engines[0]
+    assert second.bind is pool.engines[1]
+    assert in_use == [1, 1]
+    assert pool.in_use == [0, 0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_session_factory_read_primary_after_write(
+    monkeypatch, two_shards
+) -> None:
+    # Given
+    def fake_session(name):
+        @asynccontextmanager
+        async def _session():
+            yield name
+
+        return _session
+
+    replica_pool = SimpleNamespace(session=fake_session("replica"))
+    monkeypatch.setattr(database, "replica_pools", {"shard_1": replica_pool})
+    monkeypatch.setattr(
+        database, "shard_sessions", {"shard_1": fake_session("primary")}
+    )
+    session_factory = await database.get_session_factory()
+    state = database.RequestState()
+    token = database.request_state.set(state)
+
+    # When
+    async with session_factory("shard_1", read_only=True) as before_write:
+        pass
+    state.wrote = True
+    async with session_factory("shard_1", read_only=True) as after_write:
+        pass
+    database.request_state.reset(token)
+
+    # Then
+    assert before_write == "replica"
+    assert after_write == "primary"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_pool_stats_exhausted(monkeypatch, tmp_path) -> None:
+    # Given
+    engine = AsyncEngine(
+        create_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+            poolclass=database.InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+    )
+    monkeypatch.setattr(database, "shard_engines", {"shard_1": engine})
+    monkeypatch.setattr(database, "replica_pools", {})
+
+    # When
+    async with engine.connect():
+        pass
+    async with engine.connect():
+        with pytest.raises(TimeoutError):
+            async with engine.connect():
+                pass
+        [stats] = database.get_pool_stats()
+    await engine.dispose()
+
+    # Then
+    # 쉬는 커넥션을 바로 받은 경우는 대기로 세지 않는다
+    assert stats["name"] == "shard_1"
+    assert stats["checked_out"] == 1
+    assert stats["checkout_count"] == 3
+    assert stats["wait_count"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
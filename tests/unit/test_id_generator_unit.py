@@ -0,0 +1,166 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src import id_generator
+from src.id_generator import (
+    SLOT_COUNT,
+    WORKER_COUNT,
+    SnowflakeIdGenerator,
+    acquire_worker_id,
+    get_slot,
+    get_timestamp_ms,
+    is_snowflake_id,
+    renew_worker_id,
+    worker_id_lease,
+)
+from src.shard_router import ShardRouter
+
+
+@pytest.mark.unit
+def test_next_id_unique_and_increasing() -> None:
+    # Given
+    generator = SnowflakeIdGenerator(worker_id=1)
+
+    # When
+    ids = [generator.next_id(slot=0) for _ in range(10000)]
+
+    # Then
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(is_snowflake_id(id) for id in ids)
+
+
+@pytest.mark.unit
+def test_next_id_unique_across_workers() -> None:
+    # Given
+    generators = [SnowflakeIdGenerator(worker_id=i) for i in range(4)]
+
+    # When
+    ids = [generator.next_id(slot=7) for _ in range(2000) for generator in generators]
+
+    # Then
+    assert len(set(ids)) == len(ids)
+
+
+@pytest.mark.unit
+def test_next_id_embeds_slot_and_timestamp(mocker) -> None:
+    # Given
+    generator = SnowflakeIdGenerator()
+    mocker.patch.object(generator, "_now_ms", return_value=1730000000000)
+
+    # When
+    id = generator.next_id(slot=SLOT_COUNT - 1)
+
+    # Then
+    assert get_slot(id) == SLOT_COUNT - 1
+    assert get_timestamp_ms(id) == 1730000000000
+
+
+@pytest.mark.unit
+def test_next_id_clock_moves_backwards(mocker) -> None:
+    # Given
+    generator = SnowflakeIdGenerator()
+    now_ms = mocker.patch.object(generator, "_now_ms", return_value=1730000000000)
+    first_id = generator.next_id()
+
+    # When
+    now_ms.return_value = 1729999999000
+    second_id = generator.next_id()
+
+    # Then
+    assert second_id != first_id
+    assert get_timestamp_ms(second_id) == 1730000000000
+
+
+@pytest.mark.unit
+def test_invalid_worker_id() -> None:
+    # When, Then
+    with pytest.raises(ValueError):
+        SnowflakeIdGenerator(worker_id=32)
+
+
+@pytest.mark.unit
+def test_router_reads_slot_from_id() -> None:
+    # Given
+    generator = SnowflakeIdGenerator()
+    router = ShardRouter(["shard_1", "shard_2"])
+
+    # When
+    ids = [generator.next_id(slot=slot) for slot in range(SLOT_COUNT)]
+
+    # Then
+    assert [router.get_shard(id) for id in ids] == router.slots
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_acquire_worker_id_leases_free_id() -> None:
+    # Given
+    redis = MagicMock()
+    redis.set = AsyncMock(side_effect=[None, None, True])
+
+    # When
+    worker_id = await acquire_worker_id(redis, "token", ttl=30)
+
+    # Then
+    # 다른 워커가 임대 중인 번호는 건너뛴다
+    assert worker_id == 2
+    redis.set.assert_awaited_with("id_generator:worker:2", "token", nx=True, ex=30)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_acquire_worker_id_refuses_when_exhausted() -> None:
+    # Given
+    redis = MagicMock()
+    redis.set = AsyncMock(return_value=None)
+
+    # When, Then
+    # 번호를 추측하지 않고 시작하지 않는다
+    with pytest.raises(RuntimeError):
+        await acquire_worker_id(redis, "token", ttl=30)
+    assert redis.set.await_count == WORKER_COUNT
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_lost_worker_id_lease_stops_id_generation(monkeypatch) -> None:
+    # Given
+    generator = SnowflakeIdGenerator(worker_id=3)
+    monkeypatch.setattr(id_generator, "id_generator", generator)
+    redis = MagicMock()
+    redis.register_script.return_value = AsyncMock(return_value=0)
+    redis.set = AsyncMock(return_value=None)
+
+    # When
+    # 연장하지 못했고 다른 워커가 같은 번호를 임대했다
+    task = asyncio.create_task(renew_worker_id(redis, 3, "token", 30, 0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    # Then
+    assert not generator.active
+    with pytest.raises(RuntimeError):
+        generator.next_id()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_id_generation_requires_worker_id(monkeypatch) -> None:
+    # Given
+    # 스크립트나 스케줄러처럼 lifespan 밖에서 만든 생성기
+    generator = SnowflakeIdGenerator(active=False)
+    monkeypatch.setattr(id_generator, "id_generator", generator)
+
+    # When
+    with pytest.raises(RuntimeError):
+        generator.next_id()
+    async with worker_id_lease(MagicMock(), worker_id=5):
+        id = generator.next_id(slot=0)
+
+    # Then
+    # 워커 번호를 지정한 동안만 발급하고, 벗어나면 다시 멈춘다
+    assert (id >> id_generator.WORKER_SHIFT) & (WORKER_COUNT - 1) == 5
+    assert not generator.active
@@ -0,0 +1,82 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.servicies import like as like_module
+from src.servicies import user as user_module
+from src.servicies.like import LikeService
+from src.shard_router import ShardRouter
+
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock(spec=AsyncSession)
+    session.add = MagicMock()
+    return session
+
+
+@pytest.fixture
+def like_service(mock_session):
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield mock_session
+
+    return LikeService(session_factory=session_factory)  # type: ignore
+
+
+def exec_result(rows: list) -> MagicMock:
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_create_like_on_post_shard(
+    monkeypatch, like_service: LikeService, mock_session
+) -> None:
+    # Given
+    monkeypatch.setattr(like_module, "Like", lambda **kwargs: MagicMock(**kwargs))
+    post_id = 123456789
+
+    # When
+    like = await like_service.create_like(user_id=1, post_id=post_id)
+
+    # Then
+    # 좋아요 id를 포스트와 같은 슬롯으로 발급해 포스트 샤드에 저장한다
+    assert ShardRouter.get_slot(like.id) == ShardRouter.get_slot(post_id)  # type: ignore
+    mock_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_likes_with_missing_user(
+    monkeypatch, like_service: LikeService, mock_session
+) -> None:
+    # Given
+    monkeypatch.setattr(user_module, "get_shard", lambda key: "shard_1")
+    monkeypatch.setattr(
+        user_module.shard_router,
+        "get_previous_shard",
+        # 유저만 재배치 중
+        lambda key: "shard_0" if key in (1, 2) else None,
+    )
+    likes = [MagicMock(user_id=1), MagicMock(user_id=2)]
+    user = MagicMock(id=1)
+    mock_session.exec.side_effect = [
+        exec_result(likes),
+        exec_result([]),
+        exec_result([user]),
+    ]
+
+    # When
+    result = await like_service.get_likes(post_id=10)
+
+    # Then
+    # 이전 샤드에서 유저를 찾고, 끝내 없는 유저는 500 대신 None으로 둔다
+    assert result == likes
+    assert likes[0].user is user
+    assert likes[1].user is None
+    assert mock_session.exec.await_count == 3
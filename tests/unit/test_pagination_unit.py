@@ -0,0 +1,47 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+@pytest.mark.unit
+def test_cursor_round_trip() -> None:
+    # Given
+    created_at = datetime(2024, 10, 1, 12, 30, 15)
+
+    # When
+    cursor = encode_cursor(created_at, 123)
+
+    # Then
+    assert decode_cursor(cursor) == (created_at, 123)
+
+
+@pytest.mark.unit
+def test_decode_invalid_cursor() -> None:
+    # When
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("invalid-cursor")
+
+    # Then
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.unit
+def test_next_cursor() -> None:
+    # Given
+    created_at = datetime(2024, 10, 1, 12, 30, 15)
+    posts = [
+        SimpleNamespace(id=2, created_at=created_at),
+        SimpleNamespace(id=1, created_at=created_at),
+    ]
+
+    # When
+    full_page_cursor = next_cursor(posts, limit=2)
+    last_page_cursor = next_cursor(posts, limit=20)
+
+    # Then
+    assert decode_cursor(full_page_cursor) == (created_at, 1)  # type: ignore
+    assert last_page_cursor is None
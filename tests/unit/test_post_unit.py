@@ -2,8 +2,12 @@ from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi import BackgroundTasks, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.apis import post as post_api
+from src.domains.comment import Comment
+from src.domains.like import Like
 from src.domains.post import Post
 from src.domains.user import User
 from src.servicies.post import PostService
@@ -19,7 +23,7 @@ def mock_session():
     session.exec = AsyncMock()
 
     @asynccontextmanager
-    async def session_factory(key=None):
+    async def session_factory(key=None, read_only=False):
         yield session
 
     return session_factory
@@ -51,26 +55,33 @@ async def test_create_post(mocker, post_service: PostService) -> None:
 
 @pytest.mark.asyncio
 @pytest.mark.unit
-async def test_get_posts(mock_session: AsyncMock, post_service: PostService) -> None:
+async def test_get_posts(
+    mocker, mock_session: AsyncMock, post_service: PostService
+) -> None:
     # Given
+    # 작성자는 유저 샤드에서 따로 불러온다
+    mocker.patch(
+        "src.servicies.post.get_users_by_id",
+        AsyncMock(return_value={1: User(id=1, nickname="테스트 닉네임1")}),
+    )
     mock_posts = [
         Post(
             id=1,
             title="테스트 제목 1",
             content="테스트 내용 1",
-            user=User(id=1, nickname="테스트 닉네임1"),
+            author_id=1,
         ),
         Post(
             id=2,
             title="테스트 제목 2",
             content="테스트 내용 2",
-            user=User(id=1, nickname="테스트 닉네임1"),
+            author_id=1,
         ),
         Post(
             id=3,
             title="테스트 제목 3",
             content="테스트 내용 3",
-            user=User(id=1, nickname="테스트 닉네임1"),
+            author_id=1,
         ),
     ]
     mock_result = MagicMock()
@@ -92,13 +103,19 @@ async def test_get_posts(mock_session: AsyncMock, post_service: PostService) ->
 
 @pytest.mark.asyncio
 @pytest.mark.unit
-async def test_get_post(mock_session: AsyncMock, post_service: PostService) -> None:
+async def test_get_post(
+    mocker, mock_session: AsyncMock, post_service: PostService
+) -> None:
     # Given
+    mocker.patch(
+        "src.servicies.post.get_users_by_id",
+        AsyncMock(return_value={1: User(id=1, nickname="테스트 닉네임1")}),
+    )
     mock_post = Post(
         id=1,
         title="테스트 제목 1",
         content="테스트 내용 1",
-        user=User(id=1, nickname="테스트 닉네임1"),
+        author_id=1,
     )
 
     mock_result = MagicMock()
@@ -117,6 +134,28 @@ async def test_get_post(mock_session: AsyncMock, post_service: PostService) -> N
     assert isinstance(result.user, User)
 
 
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_post_counts_view_on_cache_hit(mocker) -> None:
+    # Given
+    # 캐시에 저장된 응답이 있어 포스트를 다시 만들지 않는 경우
+    mocker.patch.object(
+        post_api, "get_or_build_response", AsyncMock(return_value=Response())
+    )
+    service = MagicMock()
+    background_tasks = BackgroundTasks()
+
+    # When
+    for _ in range(2):
+        await post_api.get_post(1, background_tasks, service)
+    await background_tasks()
+
+    # Then
+    # 조회수는 요청마다 한 번씩 올린다
+    assert service.increase_post_view.call_count == 2
+    service.increase_post_view.assert_called_with(post_id=1)
+
+
 @pytest.mark.asyncio
 @pytest.mark.unit
 async def test_edit_post(mock_session: AsyncMock, post_service: PostService) -> None:
@@ -145,3 +184,17 @@ async def test_delete_post(mock_session: AsyncMock, post_service: PostService) -
 
     # Then
     assert result is None
+
+
+@pytest.mark.unit
+def test_no_cross_shard_user_foreign_keys() -> None:
+    # When
+    targets = {
+        model.__tablename__: {fk.target_fullname for fk in model.__table__.foreign_keys}  # type: ignore
+        for model in (Post, Comment, Like)
+    }
+
+    # Then
+    # 작성자와 좋아요한 유저는 다른 샤드에 있을 수 있으므로 FK로 묶지 않는다
+    assert all("user.id" not in fks for fks in targets.values())
+    assert targets["comment"] == {"post.id"}
@@ -0,0 +1,222 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+
+from src import rate_limit_policy
+from src.cache import LocalCache
+from src.middlewares import rate_limit
+from src.middlewares.rate_limit import BucketRateLimitMiddleware, LocalTokenLeases
+from src.rate_limit_policy import PolicyTable
+from src.schemas.rate_limit import RateLimitAlgorithm, RateLimitPolicy, RateLimitScope
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(rate_limit, "token_leases", LocalTokenLeases(maxsize=10))
+    monkeypatch.setattr(rate_limit, "policy_table", PolicyTable())
+    monkeypatch.setattr(rate_limit.config, "RATE_LIMIT_EXEMPT_PATHS", ["/"])
+    app = FastAPI()
+    app.add_middleware(BucketRateLimitMiddleware)
+
+    @app.get("/")
+    async def health() -> None:
+        return
+
+    @app.get("/posts")
+    async def posts() -> dict:
+        return {}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for i in range(3):
+                yield f"{i}".encode()
+
+        return StreamingResponse(chunks())
+
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_rate_limit_single_script_call(client, monkeypatch) -> None:
+    # Given
+    token_bucket = AsyncMock(side_effect=[[1, "9.5", "0"], [0, "0.4", "1.2"]])
+    monkeypatch.setattr(rate_limit, "token_bucket", token_bucket)
+
+    # When
+    allowed = client.get("/posts")
+    limited = client.get("/posts")
+
+    # Then
+    # 스크립트 한 번으로 충전과 차감을 끝낸다
+    assert allowed.status_code == 200
+    assert allowed.headers["X-Ratelimit-Remaining"] == "9"
+    assert limited.status_code == 429
+    assert limited.headers["X-Ratelimit-Retry-After"] == "2"
+    assert token_bucket.await_count == 2
+    assert token_bucket.await_args_list[-1].kwargs["keys"] == [
+        "rate_limit:default:ip:testclient"
+    ]
+
+
+@pytest.mark.unit
+def test_rate_limit_fail_open(client, monkeypatch) -> None:
+    # Given
+    monkeypatch.setattr(
+        rate_limit, "token_bucket", AsyncMock(side_effect=ConnectionError)
+    )
+
+    # When
+    response = client.get("/posts")
+
+    # Then
+    # Redis에 연결할 수 없어도 요청은 처리한다
+    assert response.status_code == 200
+    assert "X-Ratelimit-Remaining" not in response.headers
+
+
+@pytest.mark.unit
+def test_rate_limit_headers_on_streaming_response(client, monkeypatch) -> None:
+    # Given
+    monkeypatch.setattr(
+        rate_limit, "token_bucket", AsyncMock(return_value=[1, "4.0", "0"])
+    )
+
+    # When
+    response = client.get("/stream")
+
+    # Then
+    # 응답 시작 메시지에 헤더를 넣고 본문은 그대로 흘려보낸다
+    assert response.text == "012"
+    assert response.headers["X-Ratelimit-Remaining"] == "4"
+    assert response.headers["X-Ratelimit-Limit"] == "10.0"
+
+
+@pytest.mark.unit
+def test_rate_limit_local_lease(client, monkeypatch) -> None:
+    # Given
+    token_bucket = AsyncMock(side_effect=[[2, "8.0", "0"], [0, "0.2", "0.8"]])
+    monkeypatch.setattr(rate_limit, "token_bucket", token_bucket)
+
+    # When
+    responses = [client.get("/posts") for _ in range(5)]
+    health = [client.get("/") for _ in range(3)]
+
+    # Then
+    # 토큰을 버킷 크기의 1/4까지 빌려와 워커 안에서 쓰고,
+    # 거절되면 다시 시도할 수 있을 때까지 Redis에 묻지 않는다
+    assert [response.status_code for response in responses] == [200] * 2 + [429] * 3
+    assert [
+        response.headers["X-Ratelimit-Remaining"] for response in responses[:2]
+    ] == ["9", "8"]
+    assert token_bucket.await_count == 2
+    assert token_bucket.await_args_list[0].kwargs["args"][2] == 2
+    # 허용 목록의 경로는 제한하지 않는다
+    assert all(response.status_code == 200 for response in health)
+    assert "X-Ratelimit-Remaining" not in health[0].headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_local_lease_concurrent_refill(monkeypatch) -> None:
+    # Given
+    async def take(keys, args):
+        await asyncio.sleep(0.01)
+        return [args[2], "5.0", "0"]
+
+    token_bucket = AsyncMock(side_effect=take)
+    monkeypatch.setattr(rate_limit, "token_bucket", token_bucket)
+    leases = LocalTokenLeases(maxsize=10)
+
+    # When
+    results = await asyncio.gather(
+        *(leases.acquire("bucket", 20, 1, 5, 1.0) for _ in range(5))
+    )
+
+    # Then
+    # 같은 키의 동시 요청은 한 번 빌려온 토큰을 나눠 쓴다
+    assert all(allowed for allowed, _, _ in results)
+    assert token_bucket.await_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_local_lease_returns_unused_tokens(monkeypatch) -> None:
+    # Given
+    now = 100.0
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now)
+    token_bucket = AsyncMock(return_value=[5, "5.0", "0"])
+    monkeypatch.setattr(rate_limit, "token_bucket", token_bucket)
+    leases = LocalTokenLeases(maxsize=10)
+    await leases.acquire("bucket", 20, 1, 5, 1.0)
+
+    # When
+    now = 101.0
+    await leases.acquire("bucket", 20, 1, 5, 1.0)
+
+    # Then
+    # 만료될 때까지 쓰지 않은 토큰 4개는 다음에 빌려올 때 버킷에 돌려준다
+    assert [call.kwargs["args"][4] for call in token_bucket.await_args_list] == [0, 4]
+
+
+@pytest.mark.unit
+def test_policy_table_match() -> None:
+    # Given
+    table = PolicyTable()
+    table.replace(
+        [
+            RateLimitPolicy(name="posts", route="/posts*", limit=100),
+            RateLimitPolicy(name="write", route="/posts*", method="post", limit=10),
+            RateLimitPolicy(name="vip", route="*", user_id=7, limit=1000),
+            RateLimitPolicy(name="default", limit=30, burst=5),
+        ]
+    )
+
+    # When & Then
+    # 유저 지정 > 메서드 지정 > 경로가 구체적인 정책 순서로 고르고, 없으면 기본 정책
+    assert table.match("/posts/1", "GET").name == "posts"
+    assert table.match("/posts", "POST").name == "write"
+    assert table.match("/posts", "POST", user_id=7).name == "vip"
+    assert table.match("/comments", "GET").capacity == 5
+    assert table.needs_user
+
+
+@pytest.mark.unit
+def test_rate_limit_user_policy(client, monkeypatch) -> None:
+    # Given
+    rate_limit.policy_table.replace(
+        [
+            RateLimitPolicy(
+                name="posts",
+                route="/posts",
+                scope=RateLimitScope.user,
+                algorithm=RateLimitAlgorithm.gcra,
+                limit=60,
+            )
+        ]
+    )
+    monkeypatch.setattr(
+        rate_limit_policy, "verified_sessions", LocalCache(maxsize=10, ttl=60)
+    )
+    rate_limit_policy.remember_session("verified", 7)
+    gcra = AsyncMock(return_value=[1, "3", "0"])
+    monkeypatch.setattr(rate_limit, "gcra", gcra)
+
+    # When
+    user = client.get("/posts", headers={"Cookie": "session_id=verified"})
+    forged = client.get("/posts", headers={"Cookie": "session_id=forged"})
+
+    # Then
+    # get_current_user가 검증한 세션만 유저로 세고, 모르는 세션은 IP로 센다
+    assert user.status_code == 200
+    assert user.headers["X-Ratelimit-Limit"] == "60"
+    assert [call.kwargs["keys"] for call in gcra.await_args_list] == [
+        ["rate_limit:posts:user:7"],
+        ["rate_limit:posts:ip:testclient"],
+    ]
+    assert gcra.await_args_list[-1].kwargs["args"] == [1.0, 60]
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.database import request_state
+from src.middlewares.read_your_writes import (
+    STICKY_PRIMARY_COOKIE,
+    ReadYourWritesMiddleware,
+)
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/posts")
+    async def write() -> dict:
+        request_state.get().wrote = True  # type: ignore
+        return {}
+
+    @app.get("/posts")
+    async def read() -> dict:
+        return {"read_primary": request_state.get().read_primary}  # type: ignore
+
+    return TestClient(app)
+
+
+@pytest.mark.unit
+def test_sticky_primary_after_write(client) -> None:
+    # When
+    write = client.post("/posts")
+    primary_until = write.cookies[STICKY_PRIMARY_COOKIE]
+    read = client.get(
+        "/posts", headers={"Cookie": f"{STICKY_PRIMARY_COOKIE}={primary_until}"}
+    )
+    expired = client.get("/posts", headers={"Cookie": f"{STICKY_PRIMARY_COOKIE}=1"})
+    invalid = client.get("/posts", headers={"Cookie": f"{STICKY_PRIMARY_COOKIE}=x"})
+
+    # Then
+    # 쓰기 응답 시작 메시지에 쿠키를 붙이고, 쿠키가 유효한 동안만 primary에서 읽는다
+    assert "HttpOnly" in write.headers["set-cookie"]
+    assert float(primary_until) <= time.time() + 5
+    assert read.json() == {"read_primary": True}
+    assert expired.json() == {"read_primary": False}
+    assert invalid.json() == {"read_primary": False}
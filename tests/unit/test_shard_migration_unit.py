@@ -0,0 +1,184 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.domains.like import Like
+from src.domains.notification import Notification
+from src.domains.post_view import PostView
+from src.shard_migration import ShardMigrator, _foreign_key_checks_disabled
+from src.shard_router import ShardRouter
+
+SHARDS = ["shard_1", "shard_2"]
+
+
+@pytest_asyncio.fixture
+async def engines():
+    engines = {
+        shard: create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        for shard in SHARDS
+    }
+    for engine in engines.values():
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+    yield engines
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engines):
+    @asynccontextmanager
+    async def _get_session(shard, read_only=False):
+        async with AsyncSession(engines[shard], expire_on_commit=False) as session:
+            yield session
+
+    return _get_session
+
+
+@pytest.fixture
+def router() -> ShardRouter:
+    # shard_1 하나에서 두 개로 늘린다
+    return ShardRouter(SHARDS, previous_shards=["shard_1"])
+
+
+async def insert_rows(session_factory, shard: str, rows: list) -> None:
+    async with session_factory(shard) as session:
+        session.add_all(rows)
+        await session.commit()
+
+
+async def select_rows(session_factory, shard: str, model) -> list:
+    async with session_factory(shard) as session:
+        result = await session.exec(select(model))
+        return list(result.all())
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_migrate_moves_rows_to_owner(session_factory, router) -> None:
+    # Given
+    await insert_rows(
+        session_factory,
+        "shard_1",
+        [PostView(post_id=post_id, count=post_id) for post_id in range(1, 41)],
+    )
+    moving = {
+        post_id for post_id in range(1, 41) if router.get_shard(post_id) == "shard_2"
+    }
+
+    # When
+    stats = await ShardMigrator(session_factory, router, batch_size=7, pause=0).run()
+
+    # Then
+    source = await select_rows(session_factory, "shard_1", PostView)
+    target = await select_rows(session_factory, "shard_2", PostView)
+    assert moving
+    assert {row.post_id for row in target} == moving
+    assert {row.post_id for row in source} == set(range(1, 41)) - moving
+    assert all(row.count == row.post_id for row in target)
+    assert stats.moved["postview"] == len(moving)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_migrate_rerun_does_not_duplicate(session_factory, router) -> None:
+    # Given
+    await insert_rows(
+        session_factory,
+        "shard_1",
+        [PostView(post_id=post_id) for post_id in range(1, 41)],
+    )
+    await ShardMigrator(session_factory, router, pause=0).run()
+
+    # When
+    stats = await ShardMigrator(session_factory, router, pause=0).run()
+
+    # Then
+    target = await select_rows(session_factory, "shard_2", PostView)
+    assert len(target) == len({row.post_id for row in target})
+    assert not stats.moved
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_migrate_resumes_after_partial_failure(session_factory, router) -> None:
+    # Given
+    created_at = datetime(2024, 10, 1, 12, 0, 0)
+    notifications = [
+        Notification(
+            target_user_id=user_id, actor_user_id=1, post_id=1, created_at=created_at
+        )
+        for user_id in range(1, 41)
+    ]
+    await insert_rows(session_factory, "shard_1", notifications)
+    moving = {
+        user_id for user_id in range(1, 41) if router.get_shard(user_id) == "shard_2"
+    }
+    crashed = ShardMigrator(session_factory, router, pause=0)
+    crashed._delete_rows = AsyncMock(side_effect=RuntimeError)  # type: ignore
+
+    # When
+    # 대상 샤드에 커밋한 뒤 원본을 지우기 전에 중단되고 다시 실행한다
+    with pytest.raises(RuntimeError):
+        await crashed.run()
+    await ShardMigrator(session_factory, router, pause=0).run()
+
+    # Then
+    # id를 새로 발급받는 테이블도 자연 키로 같은 행을 알아보고 다시 복사하지 않는다
+    source = await select_rows(session_factory, "shard_1", Notification)
+    target = await select_rows(session_factory, "shard_2", Notification)
+    assert sorted(row.target_user_id for row in target) == sorted(moving)
+    assert {row.target_user_id for row in source} == set(range(1, 41)) - moving
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_foreign_key_checks_reset_on_same_connection() -> None:
+    # Given
+    connection = AsyncMock()
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "mysql"
+    session.connection = AsyncMock(return_value=connection)
+
+    # When
+    with pytest.raises(RuntimeError):
+        async with _foreign_key_checks_disabled(session):
+            raise RuntimeError
+
+    # Then
+    # 실패해도 풀로 돌려보내기 전에 같은 커넥션에서 검사를 다시 켠다
+    assert [call.args[0] for call in connection.exec_driver_sql.await_args_list] == [
+        "SET FOREIGN_KEY_CHECKS=0",
+        "SET FOREIGN_KEY_CHECKS=1",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_migrate_drops_duplicate_like(session_factory, router) -> None:
+    # Given
+    # 재배치 중 같은 유저의 좋아요가 이전 샤드와 새 샤드에 따로 생겼다
+    post_id = next(key for key in range(1, 1000) if router.get_shard(key) == "shard_2")
+    await insert_rows(
+        session_factory, "shard_1", [Like(id=1, user_id=7, post_id=post_id)]
+    )
+    await insert_rows(
+        session_factory, "shard_2", [Like(id=2, user_id=7, post_id=post_id)]
+    )
+
+    # When
+    await ShardMigrator(session_factory, router, pause=0).run()
+
+    # Then
+    # 새 샤드의 좋아요만 남기고 이전 샤드의 중복은 복사하지 않고 지운다
+    assert [
+        like.id for like in await select_rows(session_factory, "shard_2", Like)
+    ] == [2]
+    assert await select_rows(session_factory, "shard_1", Like) == []
@@ -0,0 +1,58 @@
+import pytest
+
+from src.shard_router import SLOT_COUNT, ShardRouter
+
+
+@pytest.mark.unit
+def test_get_shard_is_deterministic() -> None:
+    # Given
+    router = ShardRouter(["shard_1", "shard_2"])
+    other_router = ShardRouter(["shard_1", "shard_2"])
+
+    # When
+    shards = [router.get_shard(key) for key in range(1000)]
+    other_shards = [other_router.get_shard(key) for key in range(1000)]
+
+    # Then
+    assert shards == other_shards
+    assert set(shards) == {"shard_1", "shard_2"}
+
+
+@pytest.mark.unit
+def test_get_shard_with_shard_name() -> None:
+    # Given
+    router = ShardRouter(["shard_1", "shard_2"])
+
+    # When
+    result = router.get_shard("shard_2")
+
+    # Then
+    assert result == "shard_2"
+
+
+@pytest.mark.unit
+def test_get_slot_in_range() -> None:
+    # Given
+    keys = [0, 1, 2**30, 2**63 - 1, 2**127 + 12345]
+
+    # When
+    slots = [ShardRouter.get_slot(key) for key in keys]
+
+    # Then
+    assert all(0 <= slot < SLOT_COUNT for slot in slots)
+
+
+@pytest.mark.unit
+def test_add_shard_moves_about_one_nth_of_keys() -> None:
+    # Given
+    before = ShardRouter(["shard_1", "shard_2"])
+    after = ShardRouter(["shard_1", "shard_2", "shard_3"])
+    keys = range(0, 2**30, 2**30 // 20000)
+
+    # When
+    moved = [key for key in keys if before.get_shard(key) != after.get_shard(key)]
+
+    # Then
+    assert 0.2 < len(moved) / len(keys) < 0.45
+    # 옮겨지는 키는 모두 새 샤드로만 간다
+    assert all(after.get_shard(key) == "shard_3" for key in moved)
@@ -0,0 +1,72 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import config
+from src.domains.user_nickname import UserNickname
+from src.servicies.user import UserService, get_nickname_key
+from src.shard_router import ShardRouter
+
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock(spec=AsyncSession)
+    session.add = MagicMock()
+    session.commit = AsyncMock()
+    session.refresh = AsyncMock()
+    session.exec = AsyncMock()
+    return session
+
+
+@pytest.fixture
+def user_service(mock_session):
+    @asynccontextmanager
+    async def session_factory(key=None, read_only=False):
+        yield mock_session
+
+    return UserService(session_factory=session_factory)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_signup_account_writes_nickname_index(
+    mocker, user_service: UserService, mock_session
+) -> None:
+    # Given
+    mocker.patch("src.servicies.user.hash_password", return_value="hashed")
+    nickname = "테스트유저"
+
+    # When
+    user = await user_service.signup_account(nickname=nickname, password="password")
+
+    # Then
+    added = [call.args[0] for call in mock_session.add.call_args_list]
+    index = next(row for row in added if isinstance(row, UserNickname))
+    assert index.nickname == nickname
+    assert index.user_id == user.id
+    # 유저와 인덱스가 같은 슬롯(같은 샤드)에 있다
+    assert ShardRouter.get_slot(user.id) == ShardRouter.get_slot(  # type: ignore
+        get_nickname_key(nickname)
+    )
+    mock_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_user_by_nickname_without_fallback(
+    monkeypatch, user_service: UserService, mock_session
+) -> None:
+    # Given
+    monkeypatch.setattr(config, "NICKNAME_INDEX_FALLBACK", False)
+    result = MagicMock()
+    result.first.return_value = None
+    mock_session.exec.return_value = result
+
+    # When
+    user = await user_service.get_user_by_nickname("없는유저")
+
+    # Then
+    assert user is None
+    mock_session.exec.assert_awaited_once()